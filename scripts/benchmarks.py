@@ -0,0 +1,289 @@
+"""
+Mehr Network -- Analysis Kernel Benchmark Suite
+
+Times the hot kernels behind the docs analyses on fixed, reproducible
+inputs and compares them with a stored baseline (benchmarks_baseline.json
+next to this file).
+
+For each benchmark:
+  - wall time per call: best of REPEATS runs of enough calls to fill
+    MIN_RUN_SEC (so fast kernels are not dominated by timer resolution)
+  - calls/sec: the inverse of that
+  - peak memory: tracemalloc peak over one call (NumPy buffers included)
+
+A benchmark regresses when its time per call exceeds the baseline by more
+than --time-tolerance or its peak memory by more than --memory-tolerance;
+any regression exits non-zero. Plot builders write to a scratch output
+directory so the committed figures under scripts/output are untouched.
+Everything runs offline on the standard library plus NumPy / matplotlib.
+
+Usage:
+    python scripts/benchmarks.py                   # compare with baseline
+    python scripts/benchmarks.py --update-baseline # record a new baseline
+    python scripts/benchmarks.py --only sweep      # substring filter
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import adversarial_gossip
+import breakeven_solver
+import defense_comparison
+import double_spend_analysis
+import epoch_partition_analysis
+import exact_emission
+import isolated_partition_analysis
+import localhost_partition_analysis
+import payment_channels
+import sca_partition_analysis
+import trust_graph
+from emission_schedule import EPOCHS_PER_YEAR, circulating_supply_at_epoch
+from output_paths import OUTPUT_ENV
+from result_cache import CACHE_ENV
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "benchmarks_baseline.json")
+MIN_RUN_SEC = 0.2                        # per timing repeat
+REPEATS = 3
+TIME_TOLERANCE = 0.50                    # +50% time per call = regression (timer noise)
+MEMORY_TOLERANCE = 0.10                  # +10% peak memory = regression
+
+
+# --- BENCHMARKS -------------------------------------------------------------
+
+def _in_scratch_dir(plot):
+    """Run a plot builder with its output directory pointed at a temporary
+    directory and its console output discarded."""
+    def run():
+        previous = os.environ.get(OUTPUT_ENV)
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ[OUTPUT_ENV] = tmp
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    plot()
+            finally:
+                if previous is None:
+                    del os.environ[OUTPUT_ENV]
+                else:
+                    os.environ[OUTPUT_ENV] = previous
+    return run
+
+
+# Plot 6 input for the plot benchmark, so it times drawing, not the Monte Carlo
+_COLLUSION_SAMPLE = {}
+
+
+def _collusion_sample():
+    if not _COLLUSION_SAMPLE:
+        _COLLUSION_SAMPLE.update(adversarial_gossip.collusion_rounds(
+            (1_000,), (0.0, 0.2, 0.4), seeds=20, workers=1))
+    return _COLLUSION_SAMPLE
+
+
+# Plot 3 input for the same reason: the channel simulations behind it
+_SETTLEMENT_RATES = {}
+
+
+def _settlement_rates():
+    if not _SETTLEMENT_RATES:
+        _SETTLEMENT_RATES.update(epoch_partition_analysis.measured_settlement_rates())
+    return _SETTLEMENT_RATES
+
+
+# Realized gain table for the sweep and plot benchmarks: the race
+# measurement behind it is not what they time
+_REALIZED_GAIN = []
+
+
+def _realized_gain():
+    if not _REALIZED_GAIN:
+        _REALIZED_GAIN.append(double_spend_analysis.realized_gain_table())
+    return _REALIZED_GAIN[0]
+
+
+# Merge-audit discounts for the SCA plot: the trust graph audit behind them
+_SCA_AUDIT = []
+
+
+def _sca_audit():
+    if not _SCA_AUDIT:
+        _SCA_AUDIT.extend(float(d) for d in trust_graph.audit_discount(
+            trust_graph.attacker_trust_scores([0, 50], cluster_size=100)))
+    return tuple(_SCA_AUDIT)
+
+
+BENCHMARKS = {
+    "isolated.simulate_partition[optimal]": lambda: isolated_partition_analysis.simulate_partition(
+        100, 1.0, EPOCHS_PER_YEAR, "optimal"),
+    "isolated.simulate_partition[full_velocity]": lambda: isolated_partition_analysis.simulate_partition(
+        100, 1.0, EPOCHS_PER_YEAR, "full_velocity"),
+    "localhost.simulate_partition": lambda: localhost_partition_analysis.simulate_partition(
+        100, 1.0, EPOCHS_PER_YEAR),
+    "sca.simulate_partition": lambda: sca_partition_analysis.simulate_partition(
+        100, 1.0, EPOCHS_PER_YEAR),
+    "sca.simulate_sca_attack": lambda: sca_partition_analysis.simulate_sca_attack(
+        100, 1.0, 1_000, 5 * EPOCHS_PER_YEAR),
+    "defense.approach_a_dilution": lambda: defense_comparison.approach_a_dilution(5, 0.1),
+    "double_spend.sweep_parameters": lambda: double_spend_analysis.sweep_parameters(
+        realized_gain=_realized_gain()),
+    "breakeven_solver.breakeven_epochs": lambda: breakeven_solver.breakeven_epochs(
+        np.logspace(0, 4, 10_000), 50_000, 0.1, realized_gain=_realized_gain()),
+    "double_spend.reputation_at": lambda: double_spend_analysis.reputation_at(1_000),
+    "emission.circulating_supply_at_epoch": lambda: circulating_supply_at_epoch(10_000_000),
+    "exact_emission.exact_supply": lambda: exact_emission.exact_supply(1_000_000, 10),
+    "payment_channels.simulate_channels": lambda: payment_channels.simulate_channels(
+        1_000, 60, rng=0),
+    "adversarial_gossip.run_seeds": lambda: adversarial_gossip.run_seeds(
+        10_000, 2_000, 20, workers=1),
+    "double_spend.plot_all": _in_scratch_dir(
+        lambda: double_spend_analysis.plot_all(collusion=_collusion_sample(),
+                                               realized_gain=_realized_gain())),
+    "epoch_partition.plot_all": _in_scratch_dir(
+        lambda: epoch_partition_analysis.plot_all(rates=_settlement_rates())),
+    "isolated.plot_all": _in_scratch_dir(isolated_partition_analysis.plot_all),
+    "localhost.plot_all": _in_scratch_dir(localhost_partition_analysis.plot_all),
+    "sca.plot_all": _in_scratch_dir(
+        lambda: sca_partition_analysis.plot_all(audit=_sca_audit())),
+}
+
+
+# --- MEASUREMENT ------------------------------------------------------------
+
+def time_per_call(fn, min_run_sec=MIN_RUN_SEC, repeats=REPEATS):
+    """Best-of-repeats seconds per call, calibrated to fill min_run_sec."""
+    t0 = time.perf_counter()
+    fn()
+    single = time.perf_counter() - t0
+    calls = max(1, int(min_run_sec / max(single, 1e-9)))
+    best = single
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / calls)
+    return best
+
+
+def peak_bytes(fn):
+    """tracemalloc peak over one call, above the allocations live before it."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(names):
+    """{name: {"sec_per_call", "calls_per_sec", "peak_bytes"}} for names."""
+    os.environ[CACHE_ENV] = "0"          # time the kernels, not cache hits
+    results = {}
+    for name in names:
+        fn = BENCHMARKS[name]
+        sec = time_per_call(fn)
+        results[name] = {"sec_per_call": sec, "calls_per_sec": 1.0 / sec,
+                         "peak_bytes": peak_bytes(fn)}
+    return results
+
+
+# --- BASELINE ---------------------------------------------------------------
+
+def machine_info():
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "numpy": np.__version__, "cpus": os.cpu_count()}
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "benchmarks": results}, f,
+                  indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE,
+            memory_tolerance=MEMORY_TOLERANCE):
+    """{name: (time_ratio, memory_ratio, regressed)}; ratios are None for
+    benchmarks missing from the baseline."""
+    out = {}
+    for name, r in results.items():
+        base = baseline["benchmarks"].get(name) if baseline else None
+        if base is None:
+            out[name] = (None, None, False)
+            continue
+        t_ratio = r["sec_per_call"] / base["sec_per_call"]
+        m_ratio = (r["peak_bytes"] + 1) / (base["peak_bytes"] + 1)
+        out[name] = (t_ratio, m_ratio,
+                     t_ratio > 1 + time_tolerance or m_ratio > 1 + memory_tolerance)
+    return out
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", default="", help="run benchmarks whose name contains this")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MEHR NETWORK -- ANALYSIS KERNEL BENCHMARKS")
+    print("=" * 70)
+
+    names = [name for name in BENCHMARKS if args.only in name]
+    results = run_benchmarks(names)
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+    verdicts = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if baseline and baseline["machine"] != machine_info():
+        print(f"\n  Note: baseline recorded on {baseline['machine']['platform']} "
+              f"(Python {baseline['machine']['python']}, NumPy {baseline['machine']['numpy']})")
+
+    print(f"\n  {'Benchmark':<44s}  {'Time/call':>10s}  {'Calls/s':>10s}  {'Peak MB':>8s}  "
+          f"{'vs base':>13s}")
+    print(f"  {'-'*44}  {'-'*10}  {'-'*10}  {'-'*8}  {'-'*13}")
+    for name in names:
+        r = results[name]
+        t_ratio, m_ratio, regressed = verdicts[name]
+        status = ("new" if t_ratio is None
+                  else f"{t_ratio:.2f}x/{m_ratio:.2f}x" + (" !" if regressed else ""))
+        print(f"  {name:<44s}  {r['sec_per_call'] * 1e3:>8.2f}ms  {r['calls_per_sec']:>10,.1f}  "
+              f"{r['peak_bytes'] / 2**20:>8.2f}  {status:>13s}")
+
+    if args.update_baseline:
+        if names != list(BENCHMARKS) and os.path.exists(args.baseline):
+            merged = load_baseline(args.baseline)["benchmarks"]
+            results = {**merged, **results}
+        save_baseline(results, args.baseline)
+        print(f"\n  Baseline written: {args.baseline}")
+        return
+
+    regressions = [name for name, (_, _, regressed) in verdicts.items() if regressed]
+    print(f"\n  time x / memory x vs baseline; tolerance +{args.time_tolerance:.0%} time, "
+          f"+{args.memory_tolerance:.0%} memory")
+    if regressions:
+        print(f"  REGRESSED: {', '.join(regressions)}")
+        raise SystemExit(1)
+    print(f"  No regressions")
+
+
+if __name__ == "__main__":
+    main()
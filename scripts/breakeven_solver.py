@@ -0,0 +1,290 @@
+"""
+Mehr Network -- Vectorized Break-Even Solver
+
+For arbitrary arrays of network configurations, finds the smallest
+buildup T (whole epochs), channel count K (whole channels) or credit per
+channel C at which cheating pays: gain >= cost_of_cheating, with the
+credit per channel capped by what the attacker's reputation earns
+(double_spend_analysis.profit_margin).
+
+The gain is the realized one (extracted_gain at network size N, from the
+race simulator's gain table); upper_bound=True solves against the gain()
+upper bound K x C instead. Each solve is a set of broadcast NumPy calls
+over all queries:
+
+  K: above the largest K of the gain table the realized share is held, so
+     the gain is linear in K and the root is a quotient (rounded up and
+     corrected by one either way). Below it the share is not monotone in K
+     (one channel has no other counterparty to warn), so those K are
+     scanned, one broadcast call per K. Under the bound the quotient
+     holds from K = 0.
+  C: extracted credit never falls as the credit line grows, so the margin
+     is nondecreasing in C and the root is bisected in lockstep on
+     [0, reputation cap].
+  T: the margin is not monotone in T, so it is split into segments
+     where it is. Up to the network lifetime L the cost is constant
+     (lost future income + investment = income x L) while the capped
+     credit, and with it the gain, only grows, so the margin is
+     nondecreasing. Past L the cost grows linearly against a saturated
+     credit, so the margin rises to a peak and then falls. The peak is
+     found by bisecting on the sign of the one-epoch difference, and the
+     minimal T by bisecting on the sign of the margin over [0, peak]. Both
+     are integer bisections run in lockstep for every query (about 20
+     rounds of one broadcast call each).
+"""
+
+import time
+
+import numpy as np
+
+from double_spend_analysis import (NETWORK_LIFETIME_EPOCHS, NETWORK_SIZE_DEFAULT,
+                                   PACKETS_PER_MIN_DEFAULT, cost_of_cheating,
+                                   credit_from_reputation, profit_margin,
+                                   realized_gain_table, reputation_at)
+
+T_MAX_EPOCHS = 10 * NETWORK_LIFETIME_EPOCHS   # search horizon for breakeven_epochs
+CREDIT_ROUNDS = 60                            # bisection rounds for breakeven_credit
+
+
+# --- BRACKETED BISECTION ----------------------------------------------------
+
+def _first_true(pred, lo, hi):
+    """Smallest integer n in (lo, hi] with pred(n), per element.
+
+    pred must be monotone (False then True) on [lo, hi], False at lo and
+    True at hi; lo and hi are int64 arrays of the query shape.
+    """
+    lo, hi = lo.copy(), hi.copy()
+    while True:
+        open_ = hi - lo > 1
+        if not open_.any():
+            return hi
+        mid = np.where(open_, (lo + hi) // 2, hi)
+        ok = pred(mid)
+        hi = np.where(open_ & ok, mid, hi)
+        lo = np.where(open_ & ~ok, mid, lo)
+
+
+def _result(x):
+    return x if x.ndim else x.item()
+
+
+def _margin_for(N, realized_gain, upper_bound):
+    """profit_margin(T, K, C, ppm, rate) with the gain model fixed; N is an
+    array of the query shape, subset by the mask passed as `where`."""
+    if realized_gain is None and not upper_bound:
+        realized_gain = realized_gain_table()
+
+    def margin(T, K, C, ppm, rate, where=Ellipsis):
+        return profit_margin(T, K, C, ppm, rate, N=N[where],
+                             realized_gain=realized_gain, upper_bound=upper_bound)
+    return margin, realized_gain
+
+
+# --- SOLVERS ----------------------------------------------------------------
+
+def breakeven_epochs(K_channels, credit_per_channel_uMHR,
+                     packets_per_min=PACKETS_PER_MIN_DEFAULT, successes_per_epoch=10,
+                     T_max=T_MAX_EPOCHS, N=NETWORK_SIZE_DEFAULT, realized_gain=None,
+                     upper_bound=False):
+    """Minimum whole epochs of buildup T with profit_margin(T, ...) >= 0.
+
+    Returns inf where no T in [0, T_max] breaks even. Accepts scalars or
+    broadcastable arrays; N, realized_gain and upper_bound select the gain
+    as in profit_margin.
+    """
+    K, C, ppm, rate, N = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (
+        K_channels, credit_per_channel_uMHR, packets_per_min, successes_per_epoch, N)))
+    full, _ = _margin_for(N, realized_gain, upper_bound)
+
+    def margin(T):
+        return full(T, K, C, ppm, rate)
+
+    zeros = np.zeros(K.shape, dtype=np.int64)
+    lifetime = np.minimum(NETWORK_LIFETIME_EPOCHS, T_max) + zeros
+    horizon = T_max + zeros
+    # Peak of the concave segment [L, T_max]: first T whose next epoch is worse
+    falling = lambda T: margin(T + 1) < margin(T)
+    peak = np.where(falling(lifetime), lifetime,
+                    np.where(falling(horizon), -1, horizon))
+    search = peak < 0
+    if search.any():
+        Ks, Cs, ps, rs = (a[search] for a in (K, C, ppm, rate))
+        peak[search] = _first_true(lambda t: full(t + 1, Ks, Cs, ps, rs, search)
+                                   < full(t, Ks, Cs, ps, rs, search),
+                                   lifetime[search], horizon[search])
+    # Minimal T on the nondecreasing segment [0, peak]
+    at_zero = margin(zeros) >= 0
+    reachable = margin(peak) >= 0
+    T = np.full(K.shape, np.inf)
+    T[at_zero] = 0
+    solve = reachable & ~at_zero
+    if solve.any():
+        Ks, Cs, ps, rs = K[solve], C[solve], ppm[solve], rate[solve]
+        T[solve] = _first_true(lambda t: full(t, Ks, Cs, ps, rs, solve) >= 0,
+                               zeros[solve], peak[solve])
+    return _result(T)
+
+
+def breakeven_channels(T_epochs, credit_per_channel_uMHR,
+                       packets_per_min=PACKETS_PER_MIN_DEFAULT, successes_per_epoch=10,
+                       N=NETWORK_SIZE_DEFAULT, realized_gain=None, upper_bound=False):
+    """Minimum whole channels K with profit_margin(T, K, ...) >= 0.
+
+    The first K below the gain table's largest K that breaks even, by scan;
+    otherwise K* = cost / (C_effective x held share), rounded up and
+    corrected by one either way against profit_margin. Returns inf where
+    the effective credit is zero.
+    """
+    T, C, ppm, rate, N = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (
+        T_epochs, credit_per_channel_uMHR, packets_per_min, successes_per_epoch, N)))
+    margin, realized_gain = _margin_for(N, realized_gain, upper_bound)
+    cost = cost_of_cheating(T, ppm)
+    effective_C = np.minimum(C, credit_from_reputation(reputation_at(T, rate)))
+    free = cost <= 0
+    usable = (effective_C > 0) & ~free
+    # Per-channel extraction on the linear segment K >= K_linear
+    K_linear = 0 if upper_bound else int(np.max(realized_gain[1]))
+    per_channel = np.where(usable, margin(T, max(K_linear, 1), C, ppm, rate)
+                           + cost, 0.0) / max(K_linear, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        K = np.ceil(np.where(per_channel > 0, cost / per_channel, 0.0))
+    K = np.maximum(K, K_linear)
+    K = np.where((K > K_linear) & (margin(T, K - 1, C, ppm, rate) >= 0), K - 1, K)
+    K = np.where(margin(T, K, C, ppm, rate) < 0, K + 1, K)
+    K = np.where(usable & (per_channel > 0), K, np.inf)
+    for k in range(K_linear - 1, 0, -1):
+        K = np.where(usable & (margin(T, k, C, ppm, rate) >= 0), k, K)
+    return _result(np.where(free, 0.0, K))
+
+
+def breakeven_credit(T_epochs, K_channels, packets_per_min=PACKETS_PER_MIN_DEFAULT,
+                     successes_per_epoch=10, N=NETWORK_SIZE_DEFAULT, realized_gain=None,
+                     upper_bound=False):
+    """Minimum credit per channel C with profit_margin(T, K, C) >= 0.
+
+    Bisected on [0, credit_from_reputation] (CREDIT_ROUNDS rounds; the
+    upper end of the final bracket is returned). Under the bound this is
+    find_breakeven_credit's cost / K; either way it is inf where even the
+    full reputation-capped credit falls short of the cost.
+    """
+    T, K, ppm, rate, N = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (
+        T_epochs, K_channels, packets_per_min, successes_per_epoch, N)))
+    margin, _ = _margin_for(N, realized_gain, upper_bound)
+    cap = credit_from_reputation(reputation_at(T, rate))
+    lo, hi = np.zeros(T.shape), cap.copy()
+    for _ in range(CREDIT_ROUNDS):
+        mid = (lo + hi) / 2
+        ok = margin(T, K, mid, ppm, rate) >= 0
+        hi, lo = np.where(ok, mid, hi), np.where(ok, lo, mid)
+    C = np.where(margin(T, K, cap, ppm, rate) >= 0, hi, np.inf)
+    return _result(np.where(cost_of_cheating(T, ppm) <= 0, 0.0, C))
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _scan_epochs(K, C, ppm, realized_gain, T_max=T_MAX_EPOCHS):
+    """Reference: first T in range(T_max + 1) that breaks even, by full scan."""
+    T = np.arange(T_max + 1)
+    hits = np.flatnonzero(profit_margin(T, K, C, ppm, realized_gain=realized_gain) >= 0)
+    return T[hits[0]] if hits.size else np.inf
+
+
+def _scan_channels(T, C, ppm, realized_gain, K_max=10_000):
+    """Reference: first K in range(K_max + 1) that breaks even, by full scan."""
+    K = np.arange(K_max + 1)
+    hits = np.flatnonzero(profit_margin(T, K, C, ppm, realized_gain=realized_gain) >= 0)
+    return K[hits[0]] if hits.size else np.inf
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- VECTORIZED BREAK-EVEN SOLVER")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    n = 100_000
+    K = np.round(10 ** rng.uniform(0, 4, n))
+    C = 10 ** rng.uniform(3, 7, n)
+    T = np.round(10 ** rng.uniform(0, 5.5, n))
+    ppm = 10 ** rng.uniform(-2, 1, n)
+    realized = realized_gain_table()
+    print(f"\n  {n:,} random configurations: K in [1, 1e4], C in [1e3, 1e7] uMHR, "
+          f"T in [1, 3e5], pkt/min in [0.01, 10]; realized gain at N={NETWORK_SIZE_DEFAULT:,}")
+    print(f"  {'solve for':>10s}  {'time':>7s}  {'queries/s':>12s}  {'finite':>7s}  "
+          f"{'check':>24s}")
+    print(f"  {'-'*10}  {'-'*7}  {'-'*12}  {'-'*7}  {'-'*24}")
+    ok = True
+
+    def margin(T, K, C, ppm):
+        return profit_margin(T, K, C, ppm, realized_gain=realized)
+
+    # T: compare a sample against the full scan it replaces
+    t0 = time.perf_counter()
+    T_star = breakeven_epochs(K, C, ppm, realized_gain=realized)
+    elapsed = time.perf_counter() - t0
+    sample = rng.choice(n, 30, replace=False)
+    sample = np.concatenate([sample, np.flatnonzero(np.isfinite(T_star))[:30]])
+    scanned = np.array([_scan_epochs(K[i], C[i], ppm[i], realized) for i in sample])
+    agree = int(np.sum(scanned == T_star[sample]))
+    ok &= agree == len(sample)
+    print(f"  {'T':>10s}  {elapsed:>6.2f}s  {n / elapsed:>12,.0f}  "
+          f"{np.isfinite(T_star).mean():>7.1%}  {f'{agree}/{len(sample)} match scan':>24s}")
+
+    # K: minimal means K breaks even and K - 1 does not; a sample is scanned
+    t0 = time.perf_counter()
+    K_star = breakeven_channels(T, C, ppm, realized_gain=realized)
+    elapsed = time.perf_counter() - t0
+    f = np.isfinite(K_star)
+    minimal = ((margin(T[f], K_star[f], C[f], ppm[f]) >= 0)
+               & ((K_star[f] == 0) | (margin(T[f], K_star[f] - 1, C[f], ppm[f]) < 0)))
+    sample = np.concatenate([rng.choice(n, 30, replace=False),
+                             np.flatnonzero(f & (K_star <= 10_000))[:30]])
+    scanned = np.array([_scan_channels(T[i], C[i], ppm[i], realized) for i in sample])
+    in_range = np.where(K_star[sample] <= 10_000, K_star[sample], np.inf)
+    agree = int(np.sum(scanned == in_range))
+    ok &= bool(minimal.all()) and agree == len(sample)
+    print(f"  {'K':>10s}  {elapsed:>6.2f}s  {n / elapsed:>12,.0f}  {f.mean():>7.1%}  "
+          f"{f'{minimal.sum():,}/{f.sum():,} min, {agree}/{len(sample)} scan':>24s}")
+
+    # C: finite exactly where the reputation cap allows break-even
+    t0 = time.perf_counter()
+    C_star = breakeven_credit(T, K, ppm, realized_gain=realized)
+    elapsed = time.perf_counter() - t0
+    f = np.isfinite(C_star)
+    cap = credit_from_reputation(reputation_at(T))
+    expect = margin(T, K, cap, ppm) >= 0
+    tight = bool(np.all(margin(T[f], K[f], C_star[f], ppm[f]) >= 0)
+                 and np.all(margin(T[f], K[f], C_star[f] * (1 - 1e-9), ppm[f]) < 0))
+    ok &= bool(np.array_equal(f, expect) and tight)
+    print(f"  {'C':>10s}  {elapsed:>6.2f}s  {n / elapsed:>12,.0f}  {f.mean():>7.1%}  "
+          f"{'G = L at C*, cap respected' if tight else 'MISMATCH':>24s}")
+
+    # Under the bound C* is find_breakeven_credit's cost / K
+    C_bound = breakeven_credit(T, K, ppm, upper_bound=True)
+    fb = np.isfinite(C_bound)
+    quotient = bool(np.array_equal(fb, K * cap >= cost_of_cheating(T, ppm))
+                    and np.allclose(C_bound[fb], cost_of_cheating(T[fb], ppm[fb]) / K[fb],
+                                    rtol=1e-12))
+    ok &= quotient
+    print(f"  {'C (bound)':>10s}  {'':>7s}  {'':>12s}  {fb.mean():>7.1%}  "
+          f"{'cost / K' if quotient else 'MISMATCH':>24s}")
+
+    # Where cheating starts to pay, at C = 50,000 uMHR/ch
+    K_grid = np.array([1, 10, 100, 1_000, 10_000])
+    ppm_grid = np.array([0.1, 1, PACKETS_PER_MIN_DEFAULT])
+    for title, kwargs in [("realized gain", {"realized_gain": realized}),
+                          ("gain() upper bound", {"upper_bound": True})]:
+        table = breakeven_epochs(K_grid[None, :], 50_000, ppm_grid[:, None], **kwargs)
+        print(f"\n  Minimal buildup T (epochs) for C = 50,000 uMHR/ch, {title}:")
+        print(f"  {'pkt/min':>8s}" + "".join(f"  {f'K={k:,}':>10s}" for k in K_grid))
+        for p, row in zip(ppm_grid, table):
+            print(f"  {p:>8g}" + "".join(f"  {'never' if np.isinf(t) else f'{t:,.0f}':>10s}"
+                                         for t in row))
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
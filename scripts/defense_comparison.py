@@ -12,14 +12,16 @@ is in the output text.
 import math
 import os
 
+import numpy as np
+
+from emission_schedule import EPOCHS_PER_YEAR, TAIL_MHR_SCHEDULE
+from output_paths import output_path, parse_analysis_args
+from result_cache import cached
+from trust_graph import COMMUNITY_SIZE, attacker_trust_scores, lone_village_scores
+
 # ─── Protocol constants ───────────────────────────────────────────────
-INITIAL_REWARD    = 1_000_000       # MHR per epoch (after μMHR normalization)
-HALVING_INTERVAL  = 100_000         # epochs
 BURN_RATE         = 0.02
 MINTING_CAP       = 0.50            # 50% of net income
-TAIL_REWARD       = 100             # floor reward per epoch (tail emission)
-EPOCHS_PER_YEAR   = 52_600          # ~1 epoch per 10 minutes
-REFERENCE_SIZE    = 100             # active-set cap
 
 # ─── Attack parameters ────────────────────────────────────────────────
 ATTACKER_NODES    = 100             # virtual nodes on localhost
@@ -29,23 +31,72 @@ HONEST_NETWORK    = 1000            # honest nodes in main network
 
 def emission(epoch):
     """Halving emission with tail floor."""
-    halvings = epoch // HALVING_INTERVAL
-    reward = INITIAL_REWARD >> min(halvings, 63)
-    return max(reward, TAIL_REWARD)
+    return TAIL_MHR_SCHEDULE.reward(epoch)
 
 
 def scaled_emission(epoch, active_nodes):
     """Active-set-scaled emission."""
-    return emission(epoch) * min(active_nodes, REFERENCE_SIZE) / REFERENCE_SIZE
+    return TAIL_MHR_SCHEDULE.scaled(active_nodes, epoch)
+
+
+def net_emission_cumsum(start_epoch, n_epochs, active_nodes):
+    """Cumulative net-of-burn scaled emission after 0..n_epochs epochs.
+
+    One array pass; np.cumsum adds left to right, so every entry equals
+    the running total of the old per-epoch loop bit for bit.
+    """
+    epochs = start_epoch + np.arange(n_epochs)
+    totals = np.zeros(n_epochs + 1)
+    np.cumsum(scaled_emission(epochs, active_nodes) * (1 - BURN_RATE), out=totals[1:])
+    return totals
 
 
 def simulate_years(years):
     """Return total honest supply after `years` from epoch 0."""
-    total = 0.0
-    for ep in range(int(years * EPOCHS_PER_YEAR)):
-        e = scaled_emission(ep, HONEST_NETWORK)
-        total += e * (1 - BURN_RATE)  # net after burn
-    return total
+    n_epochs = int(years * EPOCHS_PER_YEAR)
+    return net_emission_cumsum(0, n_epochs, HONEST_NETWORK)[n_epochs]
+
+
+def dilution_tensor(years, cross_trust_fractions, exchange_rates):
+    """Dilution for both approaches over a whole parameter grid in one call.
+
+    Honest and attacker gross supply do not depend on the trust fraction or
+    exchange rate, so they are computed once as cumulative arrays over the
+    longest horizon and indexed per horizon; the trust fraction (A) and
+    exchange rate (B) then only scale the attacker's injection.
+
+    Returns a dict with:
+        years, honest_supply, attacker_gross: shape (Y,)
+        A: approach A dilution %, shape (Y, F) over cross_trust_fractions
+        B: approach B dilution %, shape (Y, R) over exchange_rates
+        tensor: shape (2, Y, F, R), A and B broadcast to the full grid
+    """
+    years = np.atleast_1d(np.asarray(years, dtype=float))
+    fractions = np.atleast_1d(np.asarray(cross_trust_fractions, dtype=float))
+    rates = np.atleast_1d(np.asarray(exchange_rates, dtype=float))
+    n_epochs = (years * EPOCHS_PER_YEAR).astype(int)
+    horizon = int(n_epochs.max())
+
+    honest = net_emission_cumsum(START_EPOCH, horizon, HONEST_NETWORK)[n_epochs]
+    attacker = net_emission_cumsum(START_EPOCH, horizon, ATTACKER_NODES)[n_epochs]
+
+    def dilution(injected):
+        total = honest[:, None] + injected
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total > 0, injected / total * 100, 0.0)
+
+    dilution_a = dilution(attacker[:, None] * fractions[None, :])
+    dilution_b = dilution(attacker[:, None] * rates[None, :])
+    shape = (len(years), len(fractions), len(rates))
+    return {
+        "years": years,
+        "honest_supply": honest,
+        "attacker_gross": attacker,
+        "A": dilution_a,
+        "B": dilution_b,
+        "tensor": np.stack([np.broadcast_to(dilution_a[:, :, None], shape),
+                            np.broadcast_to(dilution_b[:, None, :], shape)]),
+    }
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -60,7 +111,7 @@ def simulate_years(years):
 #     satisfied → full scaled emission
 #   - On merge: cross-partition trust audit applies discount
 #     partition_trust_score = fraction of partition nodes trusted by
-#     main-network nodes
+#     main-network nodes (measured on a trust graph by trust_graph.py)
 #   - Quarantine window: 10 epochs to submit trust proofs
 #
 # Key property: defense is RETROACTIVE (at merge time).
@@ -68,32 +119,24 @@ def simulate_years(years):
 #
 # ═══════════════════════════════════════════════════════════════════════
 
+@cached
 def approach_a_dilution(years, cross_trust_fraction):
     """
     Simulate trust-gated + merge-audit approach.
     
     cross_trust_fraction: fraction of attacker partition nodes that are
-    trusted by main-network nodes (0.0 = fresh IDs, 0.5 = deep infiltration)
+    trusted by main-network nodes (0.0 = fresh IDs, 0.5 = deep infiltration),
+    i.e. the partition_trust_score from trust_graph.attacker_trust_scores
     
     Returns (attacker_accepted_supply, honest_supply, dilution_pct)
     """
-    honest_supply = 0.0
-    attacker_gross = 0.0
-    
+    # Honest network mints normally; attacker partition gets full scaled
+    # emission (trust gate trivially satisfied within partition — all
+    # nodes trust each other)
     total_epochs = int(years * EPOCHS_PER_YEAR)
-    
-    for ep_offset in range(total_epochs):
-        epoch = START_EPOCH + ep_offset
-        
-        # Honest network mints normally
-        h_emission = scaled_emission(epoch, HONEST_NETWORK)
-        honest_supply += h_emission * (1 - BURN_RATE)
-        
-        # Attacker partition: full scaled emission (trust gate trivially
-        # satisfied within partition — all nodes trust each other)
-        a_emission = scaled_emission(epoch, ATTACKER_NODES)
-        attacker_gross += a_emission * (1 - BURN_RATE)
-    
+    honest_supply = net_emission_cumsum(START_EPOCH, total_epochs, HONEST_NETWORK)[-1]
+    attacker_gross = net_emission_cumsum(START_EPOCH, total_epochs, ATTACKER_NODES)[-1]
+
     # On merge: trust audit applies discount
     # partition_trust_score = cross_trust_fraction
     # accepted = gross × partition_trust_score
@@ -122,6 +165,7 @@ def approach_a_dilution(years, cross_trust_fraction):
 #
 # ═══════════════════════════════════════════════════════════════════════
 
+@cached
 def approach_b_dilution(years, attacker_exchange_rate):
     """
     Simulate neighborhood-scoped minting approach.
@@ -134,21 +178,12 @@ def approach_b_dilution(years, attacker_exchange_rate):
     
     Returns effective dilution on honest neighborhoods.
     """
-    honest_supply = 0.0
-    attacker_local_supply = 0.0
-    
+    # Each neighborhood mints independently with its own active set
     total_epochs = int(years * EPOCHS_PER_YEAR)
-    
-    for ep_offset in range(total_epochs):
-        epoch = START_EPOCH + ep_offset
-        
-        # Each neighborhood mints independently with its own active set
-        h_emission = scaled_emission(epoch, HONEST_NETWORK)
-        honest_supply += h_emission * (1 - BURN_RATE)
-        
-        a_emission = scaled_emission(epoch, ATTACKER_NODES)
-        attacker_local_supply += a_emission * (1 - BURN_RATE)
-    
+    honest_supply = net_emission_cumsum(START_EPOCH, total_epochs, HONEST_NETWORK)[-1]
+    attacker_local_supply = net_emission_cumsum(START_EPOCH, total_epochs,
+                                                ATTACKER_NODES)[-1]
+
     # Attacker supply is in MHR-Attacker denomination
     # Its impact on honest supply = attacker_local × exchange_rate
     effective_injection = attacker_local_supply * attacker_exchange_rate
@@ -163,6 +198,22 @@ def approach_b_dilution(years, attacker_exchange_rate):
 # COMPARISON TABLE
 # ═══════════════════════════════════════════════════════════════════════
 
+def trust_score_lines(scenarios, trusts, trusts_random, dil_a_random, villages):
+    """Merge-audit scores behind approach A next to the spec's scalars:
+    vouches placed by the attacker, placed at random, and legitimate
+    villages."""
+    lines = [f"A's partition_trust_score on the trust graph ({HONEST_NETWORK:,} honest "
+             f"nodes, cluster of {ATTACKER_NODES}):",
+             f"{'Scenario':<40} {'spec':>6} {'placed':>7} {'random':>7} {'A:5yr rnd':>10}",
+             "-" * 74]
+    for i, (name, vouches, _) in enumerate(scenarios):
+        lines.append(f"{name:<40} {vouches / ATTACKER_NODES:>6.2f} {trusts[i]:>7.2f} "
+                     f"{trusts_random[i]:>7.2f} {dil_a_random[1, i]:>9.2f}%")
+    lines.append(f"{f'Legitimate village of {COMMUNITY_SIZE}, split alone':<40} {1.0:>6.2f} "
+                 f"{'':>7} {np.median(villages):>7.2f}  (median; min {villages.min():.2f})")
+    return lines
+
+
 def main():
     print("=" * 80)
     print("DEFENSE COMPARISON: Trust-Gated+Audit (A) vs Neighborhood-Scoped (B)")
@@ -172,35 +223,54 @@ def main():
     print("\n## 1. SECURITY (Dilution Outcomes)")
     print("-" * 80)
     
+    # (name, honest vouches for attacker nodes, B exchange rate)
     scenarios = [
-        ("Fresh localhost (0 trust)",       0.00, 0.00),
-        ("Pre-planned, 1/100 trusted",      0.01, 0.00),
-        ("Pre-planned, 10/100 trusted",     0.10, 0.00),
-        ("Deep infiltration (50/100)",      0.50, 0.00),
-        ("Extreme infiltration (90/100)",   0.90, 0.00),
+        ("Fresh localhost (0 trust)",       0, 0.00),
+        ("Pre-planned, 1/100 trusted",      1, 0.00),
+        ("Pre-planned, 10/100 trusted",    10, 0.00),
+        ("Deep infiltration (50/100)",     50, 0.00),
+        ("Extreme infiltration (90/100)",  90, 0.00),
     ]
     
     print(f"\n{'Scenario':<40} {'A: 1yr':<10} {'A: 5yr':<10} {'B: 1yr':<10} {'B: 5yr':<10}")
     print(f"{'':─<40} {'':─<10} {'':─<10} {'':─<10} {'':─<10}")
     
-    for name, a_trust, b_rate in scenarios:
-        _, _, a1 = approach_a_dilution(1, a_trust)
-        _, _, a5 = approach_a_dilution(5, a_trust)
-        _, _, b1 = approach_b_dilution(1, b_rate)
-        _, _, b5 = approach_b_dilution(5, b_rate)
-        print(f"{name:<40} {a1:>8.2f}% {a5:>8.2f}% {b1:>8.2f}% {b5:>8.2f}%")
-    
-    # What if attacker in B provides SOME real services?
-    print(f"\n{'--- B: attacker with real services ---':<40}")
     b_service_scenarios = [
         ("B: attacker, 10% service overlap",   0.10),
         ("B: attacker, 25% service overlap",   0.25),
         ("B: attacker, 50% service overlap",   0.50),
     ]
-    for name, rate in b_service_scenarios:
-        _, _, b1 = approach_b_dilution(1, rate)
-        _, _, b5 = approach_b_dilution(5, rate)
+    # A's trust fraction is the merge audit's partition_trust_score on a
+    # trust graph of the honest network plus the vouched attacker cluster,
+    # with the attacker placing each vouch on a distinct node (the spec's
+    # vouches / 100). The same vouches landing on random cluster nodes, and
+    # legitimate villages splitting off, are audited on the same graph model.
+    # One call covers every row: A depends only on trust, B only on rate
+    vouch_counts = [vouches for _, vouches, _ in scenarios]
+    trusts = attacker_trust_scores(vouch_counts, cluster_size=ATTACKER_NODES,
+                                   n_honest=HONEST_NETWORK)
+    trusts_random = attacker_trust_scores(vouch_counts, cluster_size=ATTACKER_NODES,
+                                          n_honest=HONEST_NETWORK, spread=False)
+    villages = lone_village_scores(HONEST_NETWORK)
+    rates = [b_rate for _, _, b_rate in scenarios] + [r for _, r in b_service_scenarios]
+    grid = dilution_tensor([1, 5], np.concatenate([trusts, trusts_random]), rates)
+    dil_a, dil_b = grid["A"], grid["B"]
+    dil_a_random = dil_a[:, len(scenarios):]
+
+    for i, (name, vouches, b_rate) in enumerate(scenarios):
+        a1, a5 = dil_a[:, i]
+        b1, b5 = dil_b[:, i]
+        print(f"{name:<40} {a1:>8.2f}% {a5:>8.2f}% {b1:>8.2f}% {b5:>8.2f}%")
+    
+    # What if attacker in B provides SOME real services?
+    print(f"\n{'--- B: attacker with real services ---':<40}")
+    for j, (name, rate) in enumerate(b_service_scenarios, start=len(scenarios)):
+        b1, b5 = dil_b[:, j]
         print(f"{name:<40} {'N/A':>8}  {'N/A':>8}  {b1:>8.2f}% {b5:>8.2f}%")
+
+    trust_lines = trust_score_lines(scenarios, trusts, trusts_random, dil_a_random, villages)
+    print()
+    print("\n".join(trust_lines))
     
     # ── Legitimate community impact ─────────────────────────────────
     print("\n\n## 2. LEGITIMATE COMMUNITY IMPACT")
@@ -232,6 +302,10 @@ def main():
     User moves cities               Same MHR, same wallet.   Must exchange MHR-Portland
                                     Zero friction.           for MHR-Tehran. Some loss.
     """)
+    print(f"    On the trust graph a village of {COMMUNITY_SIZE} reconnecting alone scores "
+          f"{np.median(villages):.2f} (min {villages.min():.2f}):\n"
+          f"    A's audit rejects {1 - np.median(villages):.0%} of its minting "
+          f"(up to {1 - villages.min():.0%}), not the 0% above.")
     
     # ── Complexity comparison ────────────────────────────────────────
     print("\n## 3. IMPLEMENTATION COMPLEXITY")
@@ -431,22 +505,21 @@ def main():
     """)
     
     # ── Save output ──────────────────────────────────────────────────
-    os.makedirs("scripts/output", exist_ok=True)
+    path = output_path("defense_comparison.txt")
     
     # Write summary table
-    with open("scripts/output/defense_comparison.txt", "w") as f:
+    with open(path, "w") as f:
         f.write("Defense Comparison: Trust-Gated+Audit (A) vs Neighborhood-Scoped (B)\n")
         f.write("=" * 70 + "\n\n")
         
         f.write(f"{'Scenario':<40} {'A:1yr':>8} {'A:5yr':>8} {'B:1yr':>8} {'B:5yr':>8}\n")
         f.write("-" * 70 + "\n")
         
-        for name, a_trust, b_rate in scenarios:
-            _, _, a1 = approach_a_dilution(1, a_trust)
-            _, _, a5 = approach_a_dilution(5, a_trust)
-            _, _, b1 = approach_b_dilution(1, b_rate)
-            _, _, b5 = approach_b_dilution(5, b_rate)
+        for i, (name, vouches, b_rate) in enumerate(scenarios):
+            a1, a5 = dil_a[:, i]
+            b1, b5 = dil_b[:, i]
             f.write(f"{name:<40} {a1:>7.2f}% {a5:>7.2f}% {b1:>7.2f}% {b5:>7.2f}%\n")
+        f.write("\n" + "\n".join(trust_lines) + "\n")
         
         f.write("\n\nAxis Comparison:\n")
         f.write("-" * 70 + "\n")
@@ -469,8 +542,9 @@ def main():
         
         f.write("\nRecommendation: Approach A (Trust-Gated + Merge-Time Audit)\n")
     
-    print("\nOutput saved to scripts/output/defense_comparison.txt")
+    print(f"\nOutput saved to {os.path.relpath(path)}")
 
 
 if __name__ == "__main__":
+    parse_analysis_args(__doc__.splitlines()[1])  # tables only; --no-plots accepted
     main()
@@ -4,15 +4,25 @@ Mehr Network -- Double-Spend Profitability Analysis
 Empirically determines at what scale (reputation buildup, channel count,
 credit limit, network size) a double-spend attack becomes profitable.
 
+The gain is the credit an attacker actually extracts before the fraud
+news reaches its counterparties, as measured by double_spend_race at the
+attacker's 99th-percentile placement. gain() (all K credit lines drained)
+is kept as an upper-bound comparison column.
+
 All constants are drawn directly from the Mehr protocol specification.
 """
 
 import math
 import os
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from adversarial_gossip import (P99_MIN_RUNS, collusion_rounds, interpolate_multiplier,
+                                multiplier_quantiles)
+from gain_tables import gain_table, interpolate_gain
+from gossip_engine import interpolate_window
+from output_paths import output_path, parse_analysis_args, pyplot
+from profitability_surface import frontier
+from result_cache import cached, cached_figure
 
 # --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
 
@@ -22,6 +32,7 @@ LOTTERY_WIN_PROB = 1 / 100          # payment-channels.md: default win probabili
 GOSSIP_INTERVAL_SEC = 60            # network-protocol.md: gossip round interval
 EPOCH_DURATION_MIN = 10             # mhr-token.md: ~10 min per epoch estimate
 PACKETS_PER_MIN_DEFAULT = 10        # conservative relay throughput assumption
+NETWORK_SIZE_DEFAULT = 10_000       # network size where one N is needed (break-even)
 NETWORK_LIFETIME_EPOCHS = 52_600    # ~1 year at 10 min/epoch
 FRIEND_OF_FRIEND_CREDIT_RATE = 0.10 # trust-neighborhoods.md: FoF = 10%
 REP_MAX = 10_000                    # security.md: max reputation score
@@ -29,40 +40,75 @@ DISCOUNT_RATE = 0.0                 # no discounting (conservative for defender)
 
 # --- REPUTATION MODEL -------------------------------------------------------
 
+REP_DECAY = 1 - 1 / 100             # remaining gap after one success
+
+
 def reputation_trajectory(T_epochs, successes_per_epoch=10):
-    """Iterate the diminishing-returns reputation formula over T epochs.
-    gain per success = (10000 - score) / 100
+    """Reputation score at the end of each of T epochs (epochs 1..T).
+
+    gain per success = (10000 - score) / 100, i.e. every success closes 1%
+    of the remaining gap to REP_MAX.
     """
-    scores = []
-    score = 0.0
-    for _ in range(T_epochs):
-        for _ in range(successes_per_epoch):
-            score += (REP_MAX - score) / 100
-        scores.append(score)
-    return np.array(scores)
+    return reputation_at(np.arange(1, T_epochs + 1), successes_per_epoch)
 
 
 def reputation_at(T_epochs, successes_per_epoch=10):
-    """Return reputation score after T epochs of honest work."""
-    score = 0.0
-    for _ in range(T_epochs):
-        for _ in range(successes_per_epoch):
-            score += (REP_MAX - score) / 100
-    return score
+    """Return reputation score after T epochs of honest work.
+
+    The diminishing-returns update has the exact geometric solution
+    score = REP_MAX × (1 − 0.99^(T × successes)). T_epochs and
+    successes_per_epoch may be scalars or broadcastable arrays.
+    """
+    n = np.multiply(T_epochs, successes_per_epoch)
+    return REP_MAX * (1 - REP_DECAY ** n)
+
+
+def epochs_to_reputation(target_score, successes_per_epoch=10):
+    """Minimum whole epochs of honest work to reach target_score.
+
+    Exact inverse of reputation_at: the log-based estimate is corrected by
+    one step either way so reputation_at(result) >= target_score and
+    reputation_at(result - 1) < target_score. Returns inf where the target
+    is unreachable (>= REP_MAX). Accepts scalars or broadcastable arrays.
+    """
+    target, rate = np.broadcast_arrays(np.asarray(target_score, dtype=float),
+                                       np.asarray(successes_per_epoch, dtype=float))
+    reachable = (target < REP_MAX) & (rate > 0)
+    gap = np.where(reachable, 1 - target / REP_MAX, 1.0)
+    successes = np.log(gap) / math.log(REP_DECAY)
+    T = np.ceil(np.maximum(successes, 0) / np.where(reachable, rate, 1.0))
+    T = np.where((T > 0) & (reputation_at(T - 1, rate) >= target), T - 1, T)
+    T = np.where(reputation_at(T, rate) < target, T + 1, T)
+    T = np.where(reachable, T, np.inf)
+    return T if T.ndim else T.item()
 
 # --- PROPAGATION WINDOW -----------------------------------------------------
 
-def propagation_window_sec(N, M_colluding=0):
+def propagation_window_sec(N, M_colluding=0, measured=None):
     """Gossip convergence time in seconds: O(log2 N) rounds × 60s.
     Colluding nodes extend the window by factor (1 + M/N_honest).
+    measured: optional (N_points, window_sec) table from
+    gossip_engine.window_table, used instead of the log2(N) model.
+    Accepts scalars or broadcastable arrays.
     """
-    if N < 2:
-        return GOSSIP_INTERVAL_SEC
-    base = math.log2(N) * GOSSIP_INTERVAL_SEC
-    if M_colluding > 0:
-        N_honest = max(N - M_colluding, 1)
-        base *= (1 + M_colluding / N_honest)
-    return base
+    if measured is not None:
+        base = interpolate_window(measured, N)
+    else:
+        # N < 2 clamps to one round, which is exactly log2(2) rounds
+        base = np.log2(np.maximum(N, 2)) * GOSSIP_INTERVAL_SEC
+    # As before arrays were accepted, N < 2 is one round with no collusion factor
+    N_honest = np.maximum(np.subtract(N, M_colluding), 1)
+    colluded = np.greater(M_colluding, 0) & np.greater_equal(N, 2)
+    return np.where(colluded, base * (1 + M_colluding / N_honest), base)
+
+
+def gossip_hop_sec(N, M_colluding=0, measured=None):
+    """Gossip delay per hop implied by propagation_window_sec: the window
+    spread over the model's log2(N) rounds. Without collusion or a
+    measured table this is GOSSIP_INTERVAL_SEC at every N; colluders and
+    measured windows lengthen or shorten it. Accepts broadcastable arrays.
+    """
+    return propagation_window_sec(N, M_colluding, measured) / np.log2(np.maximum(N, 2))
 
 # --- GAIN MODEL --------------------------------------------------------------
 
@@ -85,76 +131,179 @@ def credit_from_reputation(score, base_direct_limit_uMHR=100_000):
 def relay_income_per_epoch(packets_per_min=PACKETS_PER_MIN_DEFAULT):
     """Expected relay income per epoch in uMHR.
     Expected value per packet = PER_PACKET_COST (stochastic lottery is neutral).
+    relay_lottery.py samples the lottery payouts around this mean.
     """
     return packets_per_min * 60 * EPOCH_DURATION_MIN * PER_PACKET_COST_uMHR
 
 
 def cost_of_cheating(T_invested_epochs, packets_per_min=PACKETS_PER_MIN_DEFAULT,
-                     remaining_epochs=None):
+                     remaining_epochs=None, income_per_epoch=None):
     """Total cost of cheating: future income lost + reputation investment.
 
+    Accepts scalars or broadcastable arrays of T_invested_epochs.
     Future income = income_per_epoch × remaining_epochs
     Reputation investment = T × income_per_epoch (opportunity cost of honest work)
+    income_per_epoch defaults to the expected relay income; pass a sampled
+    percentile (relay_lottery.cost_of_cheating_quantiles) to price the
+    lottery's variance.
     """
     if remaining_epochs is None:
         remaining_epochs = NETWORK_LIFETIME_EPOCHS - T_invested_epochs
-    income = relay_income_per_epoch(packets_per_min)
-    future_income = income * max(remaining_epochs, 0)
+    income = (relay_income_per_epoch(packets_per_min) if income_per_epoch is None
+              else income_per_epoch)
+    future_income = income * np.maximum(remaining_epochs, 0)
     reputation_investment = income * T_invested_epochs
     return future_income + reputation_investment
 
+# --- REALIZED GAIN ----------------------------------------------------------
+
+REALIZED_N = (100, 1_000, 10_000, 1_000_000)        # race measurement grid
+REALIZED_K = (1, 5, 10, 50, 100)
+REALIZED_C = (100, 1_000, 10_000, 100_000, 1_000_000)
+REALIZED_HOP_SEC = (7.5, 15, 30, 60, 120, 240)      # gossip delay per hop
+_GAIN_TABLES = {}                                   # quantile -> table, per process
+
+
+def realized_gain_table(quantile=0.99):
+    """(N, K, C, hop_sec, fraction) table of the share of gain() the race
+    simulator extracts over REALIZED_N x REALIZED_K x REALIZED_C x
+    REALIZED_HOP_SEC (cached on disk, and once per process). The default
+    takes the attacker's 1-in-100 best placement."""
+    if quantile not in _GAIN_TABLES:
+        from double_spend_race import measure_realized  # imports this module
+        _GAIN_TABLES[quantile] = gain_table(measure_realized(
+            REALIZED_N, REALIZED_K, REALIZED_C, REALIZED_HOP_SEC), quantile)
+    return _GAIN_TABLES[quantile]
+
+
+def extracted_gain(K_channels, credit_per_channel_uMHR, N=NETWORK_SIZE_DEFAULT,
+                   realized_gain=None, hop_sec=GOSSIP_INTERVAL_SEC):
+    """Credit the attacker actually extracts before the fraud news reaches
+    its counterparties: gain() scaled by the realized share at network size
+    N with the records gossiped hop_sec per hop. realized_gain: gain table
+    (default: realized_gain_table()). Accepts broadcastable arrays."""
+    if realized_gain is None:
+        realized_gain = realized_gain_table()
+    return gain(K_channels, credit_per_channel_uMHR) * interpolate_gain(
+        realized_gain, N, K_channels, credit_per_channel_uMHR, hop_sec)
+
 # --- BREAK-EVEN ANALYSIS ----------------------------------------------------
 
+def profit_margin(T_epochs, K_channels, credit_per_channel_uMHR,
+                  packets_per_min=PACKETS_PER_MIN_DEFAULT, successes_per_epoch=10,
+                  N=NETWORK_SIZE_DEFAULT, realized_gain=None, upper_bound=False):
+    """Gain minus cost of cheating (G - L), with the requested credit per
+    channel capped by credit_from_reputation. G is extracted_gain at network
+    size N (realized_gain: gain table, default realized_gain_table());
+    upper_bound=True uses the gain() upper bound instead. Accepts
+    broadcastable arrays."""
+    effective_C = np.minimum(credit_per_channel_uMHR, credit_from_reputation(
+        reputation_at(T_epochs, successes_per_epoch)))
+    total_gain = (gain(K_channels, effective_C) if upper_bound
+                  else extracted_gain(K_channels, effective_C, N, realized_gain))
+    return total_gain - cost_of_cheating(T_epochs, packets_per_min)
+
+
 def find_breakeven_credit(T_epochs, K_channels, packets_per_min=PACKETS_PER_MIN_DEFAULT):
-    """Find minimum credit-per-channel where gain >= cost."""
+    """Find minimum credit-per-channel where gain >= cost.
+    Uses the gain() upper bound and ignores the reputation cap;
+    breakeven_solver.breakeven_credit solves the realized margin with it.
+    """
     total_cost = cost_of_cheating(T_epochs, packets_per_min)
     if K_channels == 0:
         return float("inf")
     return total_cost / K_channels
 
 
-def sweep_parameters():
-    """Full parameter sweep. Returns list of result dicts."""
-    T_values = [10, 50, 100, 500, 1000]
-    K_values = [1, 5, 10, 50, 100]
-    C_values = [1_000, 10_000, 100_000, 1_000_000]
-    N_values = [100, 1_000, 10_000, 1_000_000]
+SWEEP_AXES = ("T", "K", "C_requested", "N", "packets_per_min", "M")
 
-    results = []
-    for T in T_values:
-        score = reputation_at(T)
-        max_credit = credit_from_reputation(score)
-        for K in K_values:
-            for C in C_values:
-                # Credit per channel is min of requested and reputation-allowed
-                effective_C = min(C, max_credit)
-                total_gain = gain(K, effective_C)
-                total_cost = cost_of_cheating(T)
-                ratio = total_gain / total_cost if total_cost > 0 else float("inf")
-                for N in N_values:
-                    window = propagation_window_sec(N)
-                    results.append({
-                        "T": T, "K": K, "C_requested": C,
-                        "C_effective": effective_C,
-                        "N": N, "score": score,
-                        "window_sec": window,
-                        "gain_uMHR": total_gain,
-                        "cost_uMHR": total_cost,
-                        "ratio": ratio,
-                        "profitable": total_gain >= total_cost,
-                    })
-    return results
+def evaluate_scenarios(T, K, C, N, packets_per_min=PACKETS_PER_MIN_DEFAULT,
+                       M_colluding=0, measured_window=None, realized_gain=None):
+    """Evaluate double-spend profitability for broadcastable parameter arrays.
+
+    Returns columnar results: a dict of flat 1-D arrays, one row per
+    scenario, with the SWEEP_AXES columns plus C_effective, score,
+    window_sec, hop_sec, gain_uMHR, gain_bound_uMHR, cost_uMHR, ratio and
+    profitable. measured_window is passed to propagation_window_sec, and the
+    race's gossip delay per hop is gossip_hop_sec of the same window, so
+    the colluders M and measured windows (which vary with N) move the
+    realized gain. realized_gain: (N, K, C, hop_sec, fraction) table from
+    gain_tables.gain_table (default: realized_gain_table()). gain_uMHR is
+    the gain() upper bound scaled by that share and decides ratio and
+    profitable; gain_bound_uMHR is the bound itself, for comparison.
+    """
+    T, K, C, N, ppm, M = np.broadcast_arrays(T, K, C, N, packets_per_min,
+                                              M_colluding)
+    score = reputation_at(T)
+    # Credit per channel is min of requested and reputation-allowed
+    effective_C = np.minimum(C, credit_from_reputation(score))
+    bound = gain(K, effective_C)
+    hop_sec = gossip_hop_sec(N, M, measured_window)
+    total_gain = extracted_gain(K, effective_C, N, realized_gain, hop_sec)
+    total_cost = cost_of_cheating(T, ppm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(total_cost > 0, total_gain / total_cost, np.inf)
+    columns = {
+        "T": T, "K": K, "C_requested": C, "N": N,
+        "packets_per_min": ppm, "M": M,
+        "C_effective": effective_C, "score": score,
+        "window_sec": propagation_window_sec(N, M, measured_window), "hop_sec": hop_sec,
+        "gain_uMHR": total_gain, "gain_bound_uMHR": bound, "cost_uMHR": total_cost,
+        "ratio": ratio, "profitable": total_gain >= total_cost,
+    }
+    return {name: np.ravel(col) for name, col in columns.items()}
+
+
+def sweep_parameters(T_values=(10, 50, 100, 500, 1000),
+                     K_values=(1, 5, 10, 50, 100),
+                     C_values=(1_000, 10_000, 100_000, 1_000_000),
+                     N_values=(100, 1_000, 10_000, 1_000_000),
+                     packets_per_min_values=(PACKETS_PER_MIN_DEFAULT,),
+                     M_values=(0,),
+                     measured_window=None, realized_gain=None):
+    """Full parameter sweep over the cartesian grid.
+
+    Returns columnar results (see evaluate_scenarios) in T-major order.
+    For grids too large for one array pass, see double_spend_sweep.py.
+    """
+    if realized_gain is None:
+        realized_gain = realized_gain_table()
+    return sweep_grid(T_values, K_values, C_values, N_values, packets_per_min_values,
+                      M_values, measured_window, realized_gain)
+
+
+@cached
+def sweep_grid(T_values, K_values, C_values, N_values, packets_per_min_values,
+               M_values, measured_window, realized_gain):
+    """sweep_parameters with every argument given. Cached on the gain table
+    itself, so a change to the race model re-runs the sweep."""
+    grids = np.meshgrid(T_values, K_values, C_values, N_values,
+                        packets_per_min_values, M_values, indexing="ij")
+    return evaluate_scenarios(*grids, measured_window=measured_window,
+                              realized_gain=realized_gain)
 
 # --- COLLUSION MODEL --------------------------------------------------------
 
-def collusion_window_multiplier(M, N):
-    """How much colluding nodes extend the propagation window."""
+def collusion_window_multiplier(M, N, measured=None):
+    """How much colluding nodes extend the propagation window.
+    measured: optional (N_points, fractions, multiplier) table from
+    adversarial_gossip.multiplier_table, used instead of 1 + M/N_honest.
+    """
+    if measured is not None:
+        return interpolate_multiplier(measured, M, N)
     N_honest = max(N - M, 1)
     return 1 + M / N_honest
 
 # --- PLOTTING ----------------------------------------------------------------
 
-def plot_all():
+@cached_figure("double_spend_analysis.png")
+def plot_all(collusion=None, realized_gain=None):
+    """Six-panel figure. collusion: adversarial_gossip.collusion_rounds
+    output for plot 6 (default: simulated here, cached). realized_gain:
+    gain table for plots 1 and 4 (default: realized_gain_table())."""
+    if realized_gain is None:
+        realized_gain = realized_gain_table()
+    plt = pyplot()
     fig, axes = plt.subplots(3, 2, figsize=(16, 20))
     fig.suptitle("Mehr Network -- Double-Spend Profitability Analysis", fontsize=16, y=0.98)
 
@@ -163,10 +312,17 @@ def plot_all():
     N_range = np.logspace(1, 7, 200)
     K, C = 10, 10_000
     T = 100
-    gains = [gain(K, min(C, credit_from_reputation(reputation_at(T)))) for _ in N_range]
+    curve = evaluate_scenarios(T, K, C, N_range, realized_gain=realized_gain)
     costs = [cost_of_cheating(T) for _ in N_range]
     windows = [propagation_window_sec(n) for n in N_range]
-    ax.semilogy(N_range, gains, "r-", linewidth=2, label=f"Gain (K={K}, C={C} uMHR)")
+    ax.semilogy(N_range, curve["gain_uMHR"], "r-", linewidth=2,
+                label=f"Realized gain (K={K}, C={C} uMHR)")
+    colluded = evaluate_scenarios(T, K, C, N_range, M_colluding=0.2 * N_range,
+                                  realized_gain=realized_gain)
+    ax.semilogy(N_range, colluded["gain_uMHR"], "r--", linewidth=1.5,
+                label="Realized gain, 20% colluders")
+    ax.semilogy(N_range, curve["gain_bound_uMHR"], "r:", linewidth=1.5,
+                label="gain() upper bound")
     ax.semilogy(N_range, costs, "g-", linewidth=2, label=f"Cost (T={T} epochs)")
     ax.set_xscale("log")
     ax.set_xlabel("Network Size (N nodes)")
@@ -197,7 +353,7 @@ def plot_all():
     ax.set_yticklabels(T_range)
     ax.set_xlabel("Channels (K)")
     ax.set_ylabel("Buildup Epochs (T)")
-    ax.set_title("Break-Even Credit per Channel (log10 uMHR)")
+    ax.set_title("Break-Even Credit per Channel, gain() bound (log10 uMHR)")
     cbar = fig.colorbar(im, ax=ax)
     cbar.set_label("log10(uMHR)")
     # Annotate cells
@@ -225,27 +381,36 @@ def plot_all():
     ax.grid(True, alpha=0.3)
     ax.set_ylim(0, REP_MAX + 500)
 
-    # -- Plot 4: G-L contour over (T, K) space --
+    # -- Plot 4: G-L surface and break-even frontier over (T, K) space --
     ax = axes[1, 1]
-    T_fine = np.arange(10, 1001, 10)
-    K_fine = np.arange(1, 101, 1)
-    T_grid, K_grid = np.meshgrid(T_fine, K_fine, indexing="ij")
     C_fixed = 50_000  # moderate credit assumption
-    diff_grid = np.zeros_like(T_grid, dtype=float)
-    for i, T in enumerate(T_fine):
-        score = reputation_at(int(T))
-        eff_C = min(C_fixed, credit_from_reputation(score))
-        for j, K in enumerate(K_fine):
-            G = gain(int(K), eff_C)
-            L = cost_of_cheating(int(T))
-            diff_grid[i, j] = G - L
-    # Normalize for color: log scale of absolute value, signed
-    contour = ax.contourf(K_fine, T_fine, diff_grid, levels=50, cmap="RdYlGn_r")
-    ax.contour(K_fine, T_fine, diff_grid, levels=[0], colors="black", linewidths=2)
-    fig.colorbar(contour, ax=ax, label="Gain − Cost (uMHR)")
+    N_fixed = NETWORK_SIZE_DEFAULT
+    K_axis, T_axis = np.logspace(0, 4, 100), np.logspace(1, 5, 100)
+    shade_ppm = 0.1  # only this rate breaks even in range; shade where one exists
+
+    def realized_margin(T, K, ppm):
+        return profit_margin(T, K, C_fixed, ppm, N=N_fixed, realized_gain=realized_gain)
+
+    diff_grid = realized_margin(T_axis[:, None], K_axis[None, :], shade_ppm)
+    # Color: log scale of absolute value, signed
+    shade = np.sign(diff_grid) * np.log10(1 + np.abs(diff_grid))
+    contour = ax.contourf(K_axis, T_axis, shade, levels=50, cmap="RdYlGn_r")
+    fig.colorbar(contour, ax=ax, label=f"sign × log10(1 + |Gain − Cost|) at {shade_ppm} pkt/min")
+    for ppm, style in [(0.1, "k-"), (1, "k--"), (PACKETS_PER_MIN_DEFAULT, "k:")]:
+        edge = frontier(lambda K, T: realized_margin(T, K, ppm),
+                        (K_axis[0], K_axis[-1]), (T_axis[0], T_axis[-1]))
+        for i, line in enumerate(edge["polylines"]):
+            ax.plot(line[:, 0], line[:, 1], style, linewidth=2,
+                    label=f"G = L at {ppm:g} pkt/min" if i == 0 else None)
+        if not edge["polylines"]:
+            ax.plot([], [], style, label=f"{ppm:g} pkt/min: no break-even")
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.legend(fontsize=8, loc="lower right")
     ax.set_xlabel("Channels (K)")
     ax.set_ylabel("Buildup Epochs (T)")
-    ax.set_title(f"Profitability Surface (C={C_fixed} uMHR/ch)")
+    ax.set_title(f"Realized Profitability and Break-Even Frontier "
+                 f"(C={C_fixed} uMHR/ch, N={N_fixed:,})")
 
     # -- Plot 5: Propagation window vs network size --
     ax = axes[2, 0]
@@ -264,61 +429,71 @@ def plot_all():
                     xytext=(10, 10), textcoords="offset points",
                     arrowprops=dict(arrowstyle="->", color="gray"))
 
-    # -- Plot 6: Collusion multiplier --
+    # -- Plot 6: Collusion multiplier, formula vs simulated push-pull --
     ax = axes[2, 1]
-    for N in [100, 1000, 10_000]:
-        M_range = np.arange(0, int(N * 0.4), max(1, int(N * 0.01)))
-        multipliers = [collusion_window_multiplier(m, N) for m in M_range]
-        fractions = M_range / N * 100
-        ax.plot(fractions, multipliers, label=f"N={N:,}")
+    if collusion is None:
+        collusion = collusion_rounds((1_000, 10_000, 1_000_000),
+                                     (0.0, 0.1, 0.2, 0.3, 0.4), seeds=(400, 200, 4))
+    f_range = np.linspace(0, 0.4, 81)
+    ax.plot(f_range * 100, [collusion_window_multiplier(f * 1e6, 1e6) for f in f_range],
+            "k--", linewidth=2, label="Formula 1 + M/N_honest")
+    quantiles = multiplier_quantiles(collusion)
+    for i, N in enumerate(collusion["N"]):
+        runs = collusion["rounds"][i].shape[1]
+        line, = ax.plot(collusion["fraction"] * 100, quantiles[i, :, 0], "o-",
+                        label=f"N={N:,} median ({runs} runs)")
+        if runs >= P99_MIN_RUNS:
+            ax.plot(collusion["fraction"] * 100, quantiles[i, :, 1], ":",
+                    color=line.get_color(), label=f"N={N:,} p99 ({runs} runs)")
     ax.set_xlabel("Colluding Nodes (% of network)")
     ax.set_ylabel("Window Multiplier")
-    ax.set_title("Collusion Effect on Propagation Window")
-    ax.legend()
+    ax.set_title("Collusion Effect on Propagation Window (colluders drop)")
+    ax.legend(fontsize=8)
     ax.grid(True, alpha=0.3)
     ax.set_xlim(0, 40)
 
     plt.tight_layout(rect=[0, 0, 1, 0.96])
-    os.makedirs("scripts/output", exist_ok=True)
-    plt.savefig("scripts/output/double_spend_analysis.png", dpi=150, bbox_inches="tight")
+    plt.savefig(output_path("double_spend_analysis.png"), dpi=150, bbox_inches="tight")
     plt.close()
-    print("  Saved: scripts/output/double_spend_analysis.png")
 
 
 def print_table(results):
-    """Print and save the break-even summary table."""
+    """Print and save the break-even summary table from columnar results."""
     header = (f"{'T':>6} {'K':>5} {'C_req':>10} {'C_eff':>10} {'N':>10} "
-              f"{'Score':>7} {'Gain':>14} {'Cost':>14} {'G/C':>8} {'Verdict':>10}")
+              f"{'Score':>7} {'Gain':>14} {'Bound':>14} {'Cost':>14} {'G/C':>8} "
+              f"{'Verdict':>10}")
     lines = [header, "-" * len(header)]
 
-    # Filter to interesting cases: show only where ratio > 0.01 or profitable
-    interesting = [r for r in results if r["ratio"] > 0.001 or r["profitable"]]
-    # Deduplicate by (T, K, C_requested) since N doesn't affect gain/cost
-    seen = set()
-    for r in interesting:
-        key = (r["T"], r["K"], r["C_requested"])
-        if key in seen:
-            continue
-        seen.add(key)
+    # Filter to interesting cases: show only where ratio > 0.001 under the
+    # realized gain or the bound, or profitable
+    bound_ratio = results["gain_bound_uMHR"] / results["cost_uMHR"]
+    interesting = np.flatnonzero((results["ratio"] > 0.001) | (bound_ratio > 0.001)
+                                 | results["profitable"])
+    for i in interesting:
+        r = {name: col[i] for name, col in results.items()}
         verdict = "PROFITABLE" if r["profitable"] else "unprofitable"
         lines.append(
             f"{r['T']:>6} {r['K']:>5} {r['C_requested']:>10,} "
             f"{r['C_effective']:>10,.0f} {r['N']:>10,} {r['score']:>7,.0f} "
-            f"{r['gain_uMHR']:>14,.0f} {r['cost_uMHR']:>14,.0f} "
+            f"{r['gain_uMHR']:>14,.0f} {r['gain_bound_uMHR']:>14,.0f} {r['cost_uMHR']:>14,.0f} "
             f"{r['ratio']:>8.4f} {verdict:>10}"
         )
 
     table_text = "\n".join(lines)
     print(table_text)
 
-    os.makedirs("scripts/output", exist_ok=True)
-    with open("scripts/output/double_spend_table.txt", "w") as f:
+    path = output_path("double_spend_table.txt")
+    with open(path, "w") as f:
         f.write(table_text)
-    print("\n  Saved: scripts/output/double_spend_table.txt")
+    print(f"\n  Saved: {os.path.relpath(path)}")
 
 
-def print_key_findings(results):
-    """Print the most important conclusions."""
+def print_key_findings(results, realized_gain=None):
+    """Print the most important conclusions from columnar results.
+    realized_gain: gain table for the reputation-constrained rows
+    (default: realized_gain_table())."""
+    if realized_gain is None:
+        realized_gain = realized_gain_table()
     print("\n" + "=" * 70)
     print("KEY FINDINGS")
     print("=" * 70)
@@ -327,27 +502,29 @@ def print_key_findings(results):
     print(f"\n  Expected relay income per epoch: {income_per_epoch:,.0f} uMHR")
     print(f"  Expected relay income per year:  {income_per_epoch * NETWORK_LIFETIME_EPOCHS:,.0f} uMHR")
 
-    # Find minimum T where reputation > 50%
-    for t in range(1, 2000):
-        if reputation_at(t) >= 5000:
-            print(f"\n  Epochs to 50% reputation (10 successes/epoch): {t}")
-            break
-
-    for t in range(1, 2000):
-        if reputation_at(t) >= 9000:
-            print(f"  Epochs to 90% reputation (10 successes/epoch): {t}")
-            break
+    t50, t90 = epochs_to_reputation([5000, 9000])
+    print(f"\n  Epochs to 50% reputation (10 successes/epoch): {t50:.0f}")
+    print(f"  Epochs to 90% reputation (10 successes/epoch): {t90:.0f}")
 
     # Break-even at different scales
-    print("\n  Break-even credit per channel (to make cheating profitable):")
-    for T in [10, 100, 500, 1000]:
-        for K in [1, 10, 100]:
+    from breakeven_solver import breakeven_credit  # imports this module
+    print("\n  Break-even credit per channel (to make cheating profitable, gain() bound;"
+          f" realized at N={NETWORK_SIZE_DEFAULT:,}):")
+    T_values, K_values = [10, 100, 500, 1000], [1, 10, 100]
+    # One vectorized bisection for the whole grid
+    realized_credit = breakeven_credit(np.array(T_values)[:, None], np.array(K_values),
+                                       realized_gain=realized_gain)
+    for i, T in enumerate(T_values):
+        for j, K in enumerate(K_values):
             be = find_breakeven_credit(T, K)
             score = reputation_at(T)
             max_c = credit_from_reputation(score)
             achievable = "YES" if max_c >= be / K else "NO"
+            realized_c = realized_credit[i, j]
+            realized_s = "never" if np.isinf(realized_c) else f"{realized_c:,.0f}/ch"
             print(f"    T={T:>4}, K={K:>3}: need {be:>14,.0f} uMHR total "
-                  f"(rep allows {max_c:>10,.0f}/ch) -> Achievable: {achievable}")
+                  f"(rep allows {max_c:>10,.0f}/ch) -> Achievable: {achievable}; "
+                  f"realized: {realized_s}")
 
     # Propagation windows
     print("\n  Propagation windows:")
@@ -356,50 +533,60 @@ def print_key_findings(results):
         print(f"    N={N:>10,}: {w:>6.0f}s ({w/60:>5.1f} min)")
 
     # Core conclusion
-    any_profitable = any(r["profitable"] for r in results)
-    if any_profitable:
-        profitable = [r for r in results if r["profitable"]]
-        min_gain = min(r["gain_uMHR"] for r in profitable)
+    profitable = np.flatnonzero(results["profitable"])
+    if profitable.size:
+        min_gain = results["gain_uMHR"][profitable].min()
         print(f"\n  WARNING: Profitable scenarios exist! Minimum gain: {min_gain:,.0f} uMHR")
         # Find the easiest profitable scenario
-        easiest = min(profitable, key=lambda r: r["T"])
-        print(f"    Easiest: T={easiest['T']}, K={easiest['K']}, "
-              f"C={easiest['C_requested']:,} uMHR, G/C ratio={easiest['ratio']:.4f}")
+        easiest = profitable[np.argmin(results["T"][profitable])]
+        print(f"    Easiest: T={results['T'][easiest]}, K={results['K'][easiest]}, "
+              f"C={results['C_requested'][easiest]:,} uMHR, "
+              f"G/C ratio={results['ratio'][easiest]:.4f}")
     else:
         print("\n  No profitable double-spend scenario found in parameter sweep.")
         print("  The protocol's claim holds: cheating is unprofitable at all tested scales.")
 
+    bound_profitable = int(np.sum(results["gain_bound_uMHR"] >= results["cost_uMHR"]))
+    print(f"  Profitable under the gain() upper bound instead: {bound_profitable}")
+
     # Reputation-constrained analysis
-    print("\n  Reputation-constrained analysis (credit limited by earned reputation):")
+    print("\n  Reputation-constrained analysis (credit limited by earned reputation, N=10,000):")
     for T in [100, 500, 1000]:
         score = reputation_at(T)
         max_c = credit_from_reputation(score)
         cost = cost_of_cheating(T)
         # Max channels an attacker could plausibly have
         for K in [10, 50, 100]:
-            max_gain = gain(K, max_c)
+            r = evaluate_scenarios(T, K, max_c, 10_000, realized_gain=realized_gain)
+            max_gain = r["gain_uMHR"][0]
             ratio = max_gain / cost if cost > 0 else 0
             print(f"    T={T:>4}, K={K:>3}, rep={score:>7,.0f}, "
                   f"max_credit/ch={max_c:>10,.0f}, "
-                  f"gain={max_gain:>12,.0f}, cost={cost:>12,.0f}, "
-                  f"ratio={ratio:.6f}")
+                  f"gain={max_gain:>12,.0f} (bound {r['gain_bound_uMHR'][0]:>12,.0f}), "
+                  f"cost={cost:>12,.0f}, ratio={ratio:.6f}")
 
 
 # --- MAIN --------------------------------------------------------------------
 
 if __name__ == "__main__":
+    args = parse_analysis_args(__doc__.splitlines()[1])
     print("=" * 70)
     print("MEHR NETWORK -- DOUBLE-SPEND PROFITABILITY ANALYSIS")
     print("=" * 70)
     print()
 
     print("Running parameter sweep...")
-    results = sweep_parameters()
+    realized = realized_gain_table()
+    results = sweep_parameters(realized_gain=realized)
 
-    print(f"  {len(results)} scenarios evaluated\n")
+    print(f"  {len(results['T'])} scenarios evaluated")
+    print("  Gain: share of gain() extracted at the 99th-percentile placement "
+          "(double_spend_race)\n")
     print_table(results)
-    print_key_findings(results)
+    print_key_findings(results, realized)
 
-    print("\nGenerating plots...")
-    plot_all()
+    if args.plots:
+        print("\nGenerating plots...")
+        plot_all(realized_gain=realized)
+        print(f"  Saved: {os.path.relpath(output_path('double_spend_analysis.png'))}")
     print("\nDone.")
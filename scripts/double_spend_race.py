@@ -0,0 +1,444 @@
+"""
+Mehr Network -- Double-Spend Race Simulator
+
+double_spend_analysis.gain assumes the attacker extracts the full credit
+line on all K channels before the blacklist arrives. This module places
+the attacker and its K counterparties on a generated mesh, replays the
+simultaneous-broadcast attack against the gossip of the conflicting
+spends, and records the credit actually extracted from each counterparty
+before it learns of the fraud.
+
+Attack timeline (modelling assumptions, not spec values):
+  - at t = 0 the attacker sends a spend of the same balance to every
+    counterparty; the spend to j arrives after hops(attacker, j) x
+    ROUTE_HOP_SEC
+  - from its arrival, j serves the attacker on credit at DRAIN_RATE_uMHR
+    per second, up to the credit line C
+  - j gossips its spend record from arrival, one hop per gossip round;
+    the attacker does not relay it
+  - counterparty c stops serving at its first record of another
+    counterparty's spend:
+        learn_c = min over j != c of arrival_j + hops'(j, c) x GOSSIP_INTERVAL_SEC
+    (hops' avoids the attacker). A blacklist raised by any other node that
+    saw two records is never faster, since it needs one of those records
+    to reach that node first, and then has to travel on to c.
+  - extracted_c = min(C, DRAIN_RATE_uMHR x (learn_c - arrival_c))
+
+Counterparties are either the attacker's K nearest nodes (its channels run
+to mesh neighbors, as in payment-channels.md) or K uniform nodes (credit
+lines granted anywhere in the trust neighborhood).
+
+The race is a shortest-path problem with K labelled sources. learn_c needs
+only the two nearest distinct sources of each node, so one batched BFS
+per placement replaces K per-counterparty searches. A heap of event times
+drives it: each event holds the (placement, node, label) arrivals due at
+that time, and the whole batch is relaxed over the CSR adjacency in one
+vectorized pass. Placements are processed in row chunks that share
+reusable (rows x n) state buffers, with no per-event Python objects.
+
+On a radio mesh (gossip_engine.grid_mesh) the race is decided within a
+few hops, so a placement costs well under a millisecond even at 10^6
+nodes. On a random peer graph the records only meet after ~log N hops
+and the flood covers most of the graph, so each placement costs O(N);
+measure_realized therefore defaults to the mesh.
+
+measure_realized also replays each placement at several gossip delays per
+hop: double_spend_analysis.gossip_hop_sec derives the delay from the
+propagation window, so colluders and measured gossip windows reach the
+realized gain.
+"""
+
+import heapq
+import time
+import numpy as np
+
+from double_spend_analysis import (GOSSIP_INTERVAL_SEC, PER_PACKET_COST_uMHR,
+                                   gain, sweep_parameters)
+from gain_tables import gain_table
+from gossip_engine import _sorted_unique, grid_mesh, random_peer_graph
+from result_cache import cached
+
+# --- ATTACK MODEL (assumptions) ---------------------------------------------
+
+ROUTE_HOP_SEC = 1.0                      # per-hop latency of a routed spend
+DRAIN_PACKETS_PER_SEC = 10               # attacker traffic a counterparty serves
+DRAIN_RATE_uMHR = DRAIN_PACKETS_PER_SEC * PER_PACKET_COST_uMHR   # credit drawn per second
+PLACEMENTS = 1_000                       # attack placements per topology
+BFS_CELLS = 2**22                        # rows x n cells per state buffer chunk
+
+
+# --- PLACEMENT --------------------------------------------------------------
+
+def _expand(indptr, indices, keys, n):
+    """CSR neighbors of a batch of (row * n + node) keys, as keys."""
+    rows, nodes = np.divmod(keys, n)
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    edge = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return np.repeat(rows, counts) * n + indices[edge]
+
+
+def _distinct(keys):
+    """_sorted_unique that also accepts an empty batch."""
+    return _sorted_unique(keys) if keys.size else keys
+
+
+def _chunks(n_rows, n):
+    """Row slices whose (rows x n) state fits in BFS_CELLS."""
+    step = max(1, BFS_CELLS // max(n, 1))
+    return [slice(lo, min(lo + step, n_rows)) for lo in range(0, n_rows, step)]
+
+
+def hop_distances(indptr, indices, sources, targets):
+    """Hop counts from sources[i] to each node in targets[i].
+
+    Batched BFS over row chunks; a row stops expanding once all of its
+    targets are reached. Returns a float (S, T) array, inf if unreachable.
+    """
+    n = len(indptr) - 1
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64).reshape(len(sources), -1)
+    hops = np.full(targets.shape, np.inf)
+    depth = np.full(min(len(sources), max(1, BFS_CELLS // n)) * n, -1, dtype=np.int32)
+    for rows in _chunks(len(sources), n):
+        s = rows.stop - rows.start
+        local = np.arange(s, dtype=np.int64)
+        want = (local[:, None] * n + targets[rows]).ravel()
+        frontier = local * n + sources[rows]
+        depth[frontier] = 0
+        touched, level = [frontier], 0
+        while frontier.size:
+            # Rows with every target reached drop out of the frontier
+            found = (depth[want] >= 0).reshape(s, -1).all(axis=1)
+            frontier = frontier[~found[frontier // n]]
+            nxt = _expand(indptr, indices, frontier, n)
+            nxt = _distinct(nxt[depth[nxt] < 0])
+            level += 1
+            depth[nxt] = level
+            touched.append(nxt)
+            frontier = nxt
+        d = depth[want].reshape(s, -1)
+        hops[rows] = np.where(d >= 0, d, np.inf)
+        depth[np.concatenate(touched)] = -1
+    return hops
+
+
+def nearest_nodes(indptr, indices, sources, k, rng=None):
+    """The k nodes nearest each source (excluding it), ties broken at random.
+
+    Returns (nodes, hops): int (S, k) node ids and their hop counts, each
+    row ordered by distance. Raises ValueError if a source's component
+    holds fewer than k other nodes.
+    """
+    rng = np.random.default_rng(rng)
+    n = len(indptr) - 1
+    sources = np.asarray(sources, dtype=np.int64)
+    nodes = np.empty((len(sources), k), dtype=np.int64)
+    hops = np.empty((len(sources), k))
+    depth = np.full(min(len(sources), max(1, BFS_CELLS // n)) * n, -1, dtype=np.int32)
+    for rows in _chunks(len(sources), n):
+        s = rows.stop - rows.start
+        frontier = np.arange(s, dtype=np.int64) * n + sources[rows]
+        depth[frontier] = 0
+        reached, levels, seen, level = [], [], np.zeros(s, dtype=np.int64), 0
+        while frontier.size:
+            frontier = frontier[seen[frontier // n] < k]
+            nxt = _expand(indptr, indices, frontier, n)
+            nxt = _distinct(nxt[depth[nxt] < 0])
+            level += 1
+            depth[nxt] = level
+            seen += np.bincount(nxt // n, minlength=s)
+            reached.append(nxt)
+            levels.append(np.full(nxt.size, level))
+            frontier = nxt
+        depth[np.arange(s) * n + sources[rows]] = -1
+        for keys in reached:
+            depth[keys] = -1
+        if (seen < k).any():
+            raise ValueError(f"a source reaches only {seen.min()} other nodes, k = {k}")
+        keys, level = np.concatenate(reached), np.concatenate(levels)
+        order = np.lexsort((rng.random(keys.size), level, keys // n))
+        keys, level = keys[order], level[order]
+        row = keys // n
+        rank = np.arange(keys.size) - np.searchsorted(row, row)
+        pick = rank < k
+        nodes[rows] = (keys[pick] % n).reshape(s, k)
+        hops[rows] = level[pick].reshape(s, k)
+    return nodes, hops
+
+
+def place_attacks(indptr, indices, K, placements=PLACEMENTS, placement="nearest",
+                  rng=None):
+    """Random attacker nodes and their K counterparties.
+
+    placement: "nearest" (the attacker's K nearest nodes) or "random"
+    (K distinct uniform nodes). Returns (attacker (P,), counterparties
+    (P, K), route_hops (P, K)).
+    """
+    rng = np.random.default_rng(rng)
+    n = len(indptr) - 1
+    attacker = rng.integers(0, n, size=placements)
+    if placement == "nearest":
+        counterparties, route_hops = nearest_nodes(indptr, indices, attacker, K, rng)
+        return attacker, counterparties, route_hops
+    # K distinct uniform nodes other than the attacker: the K smallest of
+    # n - 1 random keys per row, in key order
+    counterparties = np.empty((placements, K), dtype=np.int64)
+    for rows in _chunks(placements, n):
+        keys = rng.random((rows.stop - rows.start, n - 1))
+        pick = np.argpartition(keys, K - 1, axis=1)[:, :K]
+        pick = np.take_along_axis(pick, np.argsort(
+            np.take_along_axis(keys, pick, axis=1), axis=1), axis=1)
+        counterparties[rows] = pick + (pick >= attacker[rows, None])
+    return attacker, counterparties, hop_distances(indptr, indices, attacker,
+                                                   counterparties)
+
+
+# --- RACE -------------------------------------------------------------------
+
+def learn_times(indptr, indices, attacker, counterparties, arrival_sec,
+                gossip_sec=GOSSIP_INTERVAL_SEC):
+    """Second each counterparty first holds another counterparty's spend.
+
+    Args:
+        attacker: (P,) attacker node per placement (never relays)
+        counterparties: (P, K) counterparty nodes
+        arrival_sec: (P, K) arrival time of the attacker's spend at each
+        gossip_sec: delay per gossip hop
+
+    Every node keeps the first two distinct spend labels to reach it and
+    forwards only those, which is enough for the nearest other label of
+    each counterparty. Returns a float (P, K) array, inf if no other
+    record ever reaches it.
+    """
+    n = len(indptr) - 1
+    attacker = np.asarray(attacker, dtype=np.int64)
+    counterparties = np.asarray(counterparties, dtype=np.int64)
+    P, K = counterparties.shape
+    learn = np.full((P, K), np.inf)
+    cells = min(P, max(1, BFS_CELLS // n)) * n
+    first = np.full(cells, -1, dtype=np.int32)       # first label held (-1 none)
+    second = np.full(cells, -1, dtype=np.int32)      # second label (-2 = blocked)
+    slot = np.full(cells, -1, dtype=np.int32)        # counterparty index at a node
+    labels = np.tile(np.arange(K, dtype=np.int64), P).reshape(P, K)
+    degree = np.diff(indptr)
+
+    for rows in _chunks(P, n):
+        s = rows.stop - rows.start
+        local = np.arange(s, dtype=np.int64)
+        own = local[:, None] * n + counterparties[rows]
+        blocked = local * n + attacker[rows]
+        slot[own] = labels[rows]
+        second[blocked] = -2
+        touched = [own.ravel(), blocked]
+
+        # Event loop: heap of times, each a batch of key * K + label arrivals
+        heap, pending = [], {}
+        arrival = arrival_sec[rows].ravel()
+        seeds = own.ravel() * K + labels[rows].ravel()
+        for t in _distinct(arrival[np.isfinite(arrival)]):
+            pending[t] = [seeds[arrival == t]]
+            heapq.heappush(heap, t)
+        left = np.isfinite(arrival_sec[rows]).sum(axis=1) if K > 1 else np.zeros(s, dtype=np.int64)
+        while heap and left.any():
+            t = heapq.heappop(heap)
+            code = np.concatenate(pending.pop(t))
+            key, label = np.divmod(code, K)
+            keep = (second[key] == -1) & (first[key] != label)
+            code = _distinct(code[keep])
+            if not code.size:
+                continue
+            key, label = np.divmod(code, K)
+            # Rank among this batch's distinct labels at each node
+            rank = np.arange(key.size) - np.searchsorted(key, key)
+            empty = first[key] == -1
+            take = rank < np.where(empty, 2, 1)
+            key, label, rank, empty = key[take], label[take], rank[take], empty[take]
+            to_first = empty & (rank == 0)
+            first[key[to_first]] = label[to_first]
+            second[key[~to_first]] = label[~to_first]
+            touched.append(key)
+
+            # A counterparty receiving a label other than its own learns now
+            k_at = slot[key]
+            hit = (k_at >= 0) & (k_at != label)
+            row, k_hit = key[hit] // n, k_at[hit]
+            new = np.isinf(learn[row + rows.start, k_hit])
+            learn[row[new] + rows.start, k_hit[new]] = t
+            left -= np.bincount(row[new], minlength=s)
+
+            # Placements with every counterparty informed stop spreading
+            live = left[key // n] > 0
+            key, label = key[live], label[live]
+            nxt = _expand(indptr, indices, key, n)
+            nxt = nxt * K + np.repeat(label, degree[key % n])
+            nxt = nxt[second[nxt // K] == -1]
+            if nxt.size:
+                t_next = t + gossip_sec
+                if t_next not in pending:
+                    pending[t_next] = []
+                    heapq.heappush(heap, t_next)
+                pending[t_next].append(nxt)
+        done = np.concatenate(touched)
+        first[done], second[done], slot[done] = -1, -1, -1
+    return learn
+
+
+def extracted_credit(arrival_sec, learn_sec, credit_uMHR, drain_rate=DRAIN_RATE_uMHR):
+    """Credit each counterparty serves between the spend and the fraud
+    news (broadcasts over credit_uMHR)."""
+    window = np.asarray(learn_sec) - np.asarray(arrival_sec)
+    return np.minimum(credit_uMHR, drain_rate * np.maximum(window, 0.0))
+
+
+def replay_attacks(indptr, indices, K, placements=PLACEMENTS, placement="nearest",
+                   route_sec=ROUTE_HOP_SEC, gossip_sec=GOSSIP_INTERVAL_SEC, rng=None):
+    """Run the race for a batch of placements on one topology.
+
+    Returns a dict with attacker (P,), counterparties, arrival_sec,
+    learn_sec and window_sec (all (P, K)).
+    """
+    rng = np.random.default_rng(rng)
+    attacker, counterparties, route_hops = place_attacks(indptr, indices, K,
+                                                         placements, placement, rng)
+    arrival = route_hops * route_sec
+    learn = learn_times(indptr, indices, attacker, counterparties, arrival, gossip_sec)
+    return {"attacker": attacker, "counterparties": counterparties,
+            "arrival_sec": arrival, "learn_sec": learn, "window_sec": learn - arrival}
+
+
+# --- REALIZED GAIN ----------------------------------------------------------
+
+def _topology(N, topology, rng):
+    if topology == "grid":
+        return grid_mesh(int(round(np.sqrt(N))))
+    return random_peer_graph(int(N), rng=rng)
+
+
+@cached
+def measure_realized(N_values, K_values, C_values, hop_values=(GOSSIP_INTERVAL_SEC,),
+                     placements=PLACEMENTS, topology="grid", placement="nearest",
+                     drain_rate=DRAIN_RATE_uMHR, seed=0):
+    """Realized share of the gain() upper bound per (N, K, C, gossip delay
+    per hop) and placement.
+
+    One topology per N; K is capped at N - 1 counterparties. Every delay
+    in hop_values replays the same placements. Returns {"N", "K", "C",
+    "hop_sec": axis arrays, "fraction": (len N, len K, len C, len hop, P)}.
+    """
+    rng = np.random.default_rng(seed)
+    C_values = np.asarray(C_values, dtype=float)
+    hop_values = np.asarray(hop_values, dtype=float)
+    fraction = np.empty((len(N_values), len(K_values), len(C_values), len(hop_values),
+                         placements))
+    sizes = []
+    for i, N in enumerate(N_values):
+        indptr, indices = _topology(N, topology, rng)
+        n = len(indptr) - 1
+        for j, K in enumerate(K_values):
+            k = min(int(K), n - 1)
+            attacker, counterparties, route_hops = place_attacks(indptr, indices, k,
+                                                                 placements, placement, rng)
+            arrival = route_hops * ROUTE_HOP_SEC
+            for h, hop in enumerate(hop_values):
+                learn = learn_times(indptr, indices, attacker, counterparties, arrival, hop)
+                window = np.maximum(learn - arrival, 0.0)
+                for c, C in enumerate(C_values):
+                    got = np.minimum(C, drain_rate * window).sum(axis=1)
+                    fraction[i, j, c, h] = got / gain(k, C)
+        sizes.append(n)
+    return {"N": np.array(sizes), "K": np.asarray(K_values), "C": C_values,
+            "hop_sec": hop_values, "fraction": fraction}
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _reference_learn(indptr, indices, attacker, counterparties, arrival, gossip_sec):
+    """learn_c written out with one plain BFS per counterparty."""
+    learn = np.full(counterparties.shape, np.inf)
+    for p, (a, cps) in enumerate(zip(attacker, counterparties)):
+        for j, src in enumerate(cps):
+            dist = {int(src): 0}
+            queue = [int(src)]
+            for u in queue:
+                for v in indices[indptr[u]:indptr[u + 1]].tolist():
+                    if v != a and v not in dist:
+                        dist[v] = dist[u] + 1
+                        queue.append(v)
+            for c, dst in enumerate(cps):
+                if c != j and int(dst) in dist:
+                    learn[p, c] = min(learn[p, c], arrival[p, j] + dist[int(dst)] * gossip_sec)
+    return learn
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- DOUBLE-SPEND RACE SIMULATOR")
+    print("=" * 70)
+    print(f"\n  Spend routed at {ROUTE_HOP_SEC:.0f}s/hop, records gossiped at "
+          f"{GOSSIP_INTERVAL_SEC}s/hop, credit drawn at {DRAIN_RATE_uMHR} uMHR/s")
+
+    # Correctness: two-label event loop against per-counterparty BFS
+    ok = True
+    for topology, n, placement in [("random", 400, "nearest"), ("random", 400, "random"),
+                                   ("grid", 400, "nearest")]:
+        indptr, indices = _topology(n, topology, 1)
+        race = replay_attacks(indptr, indices, 6, 40, placement, rng=2)
+        ref = _reference_learn(indptr, indices, race["attacker"], race["counterparties"],
+                               race["arrival_sec"], GOSSIP_INTERVAL_SEC)
+        ok &= bool(np.array_equal(race["learn_sec"], ref))
+    print(f"\n  Event loop matches per-counterparty BFS (random/grid, nearest/random): {ok}")
+
+    # Realized gain per topology and placement
+    K = 10
+    print(f"\n  K = {K} channels; share = extracted / (K x C), 99th-percentile placement:")
+    print(f"  {'Topology':>16s}  {'placement':>9s}  {'runs':>6s}  {'window p50':>10s}  "
+          f"{'p99':>6s}  {'C=1k':>5s}  {'C=10k':>5s}  {'C=100k':>6s}  {'time':>6s}")
+    print(f"  {'-'*16}  {'-'*9}  {'-'*6}  {'-'*10}  {'-'*6}  {'-'*5}  {'-'*5}  {'-'*6}  {'-'*6}")
+    for topology, N, placement, runs in [("grid", 10_000, "nearest", 10_000),
+                                         ("grid", 10_000, "random", 300),
+                                         ("grid", 1_000_000, "nearest", 10_000),
+                                         ("random", 10_000, "nearest", 300),
+                                         ("random", 10_000, "random", 300)]:
+        indptr, indices = _topology(N, topology, 3)
+        t0 = time.perf_counter()
+        race = replay_attacks(indptr, indices, K, runs, placement, rng=4)
+        elapsed = time.perf_counter() - t0
+        window = race["window_sec"]
+        shares = [np.quantile(extracted_credit(race["arrival_sec"], race["learn_sec"], C)
+                              .sum(axis=1) / gain(K, C), 0.99)
+                  for C in (1_000, 10_000, 100_000)]
+        print(f"  {topology + f' {N:,}':>16s}  {placement:>9s}  {runs:>6,d}  "
+              f"{np.median(window):>9.0f}s  {np.quantile(window, 0.99):>5.0f}s  "
+              f"{shares[0]:>5.0%}  {shares[1]:>5.0%}  {shares[2]:>6.0%}  {elapsed:>5.1f}s")
+
+    # The sweep's default gain, against the gain() bound it replaces
+    res = sweep_parameters()
+    bound_ratio = res["gain_bound_uMHR"] / res["cost_uMHR"]
+    print(f"\n  Double-spend sweep, {len(res['T'])} scenarios:")
+    print(f"  {'':>23s}  {'profitable':>10s}  {'max ratio':>10s}")
+    print(f"  {'gain() upper bound':>23s}  {np.sum(bound_ratio >= 1):>10d}  "
+          f"{bound_ratio.max():>10.2e}")
+    print(f"  {'realized, p99 placement':>23s}  {res['profitable'].sum():>10d}  "
+          f"{res['ratio'].max():>10.2e}")
+    ok_bound = bool(np.all(res["gain_uMHR"] <= res["gain_bound_uMHR"] * (1 + 1e-12)))
+    print(f"  Realized gain never exceeds the upper bound: {ok_bound}")
+
+    # Colluders stretch the window, and with it the gossip delay per hop
+    M_values = (0, 2_500, 5_000)
+    res = sweep_parameters(N_values=(10_000,), M_values=M_values)
+    gains = res["gain_uMHR"].reshape(-1, len(M_values))
+    print(f"\n  N = 10,000 with M colluders (gossip delay per hop from the window):")
+    for m, hop, ratio in zip(M_values, res["hop_sec"][:len(M_values)],
+                             res["ratio"].reshape(-1, len(M_values)).max(axis=0)):
+        print(f"    M={m:>5,d}: {hop:>5.0f}s/hop, max ratio {ratio:.2e}")
+    ok_collusion = bool(np.all(np.diff(gains, axis=1) >= 0) and np.any(np.diff(gains, axis=1) > 0))
+    print(f"  Realized gain grows with the colluders: {ok_collusion}")
+
+    if not (ok and ok_bound and ok_collusion):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Mehr Network -- Parallel Columnar Double-Spend Sweep Engine
+
+Scales double_spend_analysis.sweep_parameters from its fixed 5×5×4×4 grid
+to continuous ranges over T, K, C, N, packets_per_min and collusion M at
+millions of points.
+
+The cartesian grid is split into contiguous row chunks. Each chunk is
+evaluated with one broadcast call to evaluate_scenarios (no per-row Python
+objects), chunks are spread across a process pool, and every chunk is
+written as an uncompressed NPZ file of flat columns. Readers stream the
+chunks back with optional row filters, so selecting the profitable rows of
+a 10^8-point sweep never materializes the whole table.
+
+Columnar results from this engine and from sweep_parameters have the same
+layout, so print_table and print_key_findings read either. The gain is the
+realized share from double_spend_race, measured once per sweep and shared
+by every chunk; gain_bound_uMHR keeps the gain() upper bound.
+"""
+
+import glob
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from double_spend_analysis import (PACKETS_PER_MIN_DEFAULT, SWEEP_AXES, evaluate_scenarios,
+                                   realized_gain_table)
+
+CHUNK_ROWS = 250_000               # rows per chunk (~30 MB of columns)
+
+
+# --- GRID CHUNKING ----------------------------------------------------------
+
+def _as_axes(axes):
+    """Normalize {name: values} to a tuple of 1-D arrays in SWEEP_AXES order."""
+    unknown = set(axes) - set(SWEEP_AXES)
+    if unknown:
+        raise ValueError(f"unknown sweep axes: {sorted(unknown)}")
+    defaults = {"packets_per_min": [PACKETS_PER_MIN_DEFAULT], "M": [0]}
+    missing = [name for name in SWEEP_AXES if name not in axes and name not in defaults]
+    if missing:
+        raise ValueError(f"missing sweep axes: {missing}")
+    return tuple(np.atleast_1d(np.asarray(axes.get(name, defaults.get(name))))
+                 for name in SWEEP_AXES)
+
+
+def evaluate_chunk(axis_values, start, stop, path=None, measured_window=None,
+                   realized_gain=None):
+    """Evaluate grid rows [start, stop) in T-major order.
+
+    Writes the columns to `path` as NPZ when given and returns the path;
+    otherwise returns the columns.
+    """
+    shape = tuple(len(v) for v in axis_values)
+    coords = np.unravel_index(np.arange(start, stop), shape)
+    columns = evaluate_scenarios(*(v[c] for v, c in zip(axis_values, coords)),
+                                 measured_window=measured_window,
+                                 realized_gain=realized_gain)
+    if path is None:
+        return columns
+    np.savez(path, **columns)
+    return path
+
+
+def sweep(axes, out_dir=None, chunk_rows=CHUNK_ROWS, workers=None,
+          measured_window=None, realized_gain=None):
+    """Evaluate the cartesian product of `axes` in parallel chunks.
+
+    Args:
+        axes: {axis name: values}; names from SWEEP_AXES. packets_per_min
+            and M default to the single values 10 and 0.
+        out_dir: directory for chunk_NNNNN.npz files. When None, chunks are
+            returned in memory and concatenated.
+        chunk_rows: rows per chunk
+        workers: process pool size (None = os.cpu_count(); 1 = in-process)
+        measured_window: (N_points, window_sec) table from
+            gossip_engine.window_table; None keeps the log2(N) model
+        realized_gain: (N, K, C, fraction) table from
+            gain_tables.gain_table; None measures the default
+            realized_gain_table() once here
+
+    Returns:
+        out_dir when writing to disk, else columnar results.
+    """
+    axis_values = _as_axes(axes)
+    if realized_gain is None:
+        realized_gain = realized_gain_table()
+    total = int(np.prod([len(v) for v in axis_values]))
+    bounds = [(start, min(start + chunk_rows, total))
+              for start in range(0, total, chunk_rows)]
+    paths = [None] * len(bounds)
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        paths = [os.path.join(out_dir, f"chunk_{i:05d}.npz") for i in range(len(bounds))]
+
+    if workers == 1 or len(bounds) == 1:
+        parts = [evaluate_chunk(axis_values, a, b, p, measured_window, realized_gain)
+                 for (a, b), p in zip(bounds, paths)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_chunk, axis_values, a, b, p, measured_window,
+                                   realized_gain)
+                       for (a, b), p in zip(bounds, paths)]
+            parts = [f.result() for f in futures]
+
+    if out_dir is not None:
+        return out_dir
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+# --- COLUMNAR STORE ---------------------------------------------------------
+
+def iter_chunks(out_dir, columns=None):
+    """Yield each chunk of a stored sweep as {column: array}, in row order."""
+    for path in sorted(glob.glob(os.path.join(out_dir, "chunk_*.npz"))):
+        with np.load(path) as chunk:
+            names = chunk.files if columns is None else columns
+            yield {name: chunk[name] for name in names}
+
+
+def load_sweep(out_dir, columns=None, where=None):
+    """Load a stored sweep, keeping only rows where `where(chunk)` is True.
+
+    Filtering is applied chunk by chunk, so memory is bounded by the chunk
+    size plus the selected rows.
+    """
+    parts = []
+    for chunk in iter_chunks(out_dir):
+        if where is not None:
+            mask = where(chunk)
+            chunk = {name: col[mask] for name, col in chunk.items()}
+        if columns is not None:
+            chunk = {name: chunk[name] for name in columns}
+        parts.append(chunk)
+    if not parts:
+        return {}
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def sweep_summary(out_dir):
+    """Streaming totals over a stored sweep: rows, profitable rows (realized
+    and under the gain() bound), max G/C."""
+    rows = profitable = bound_profitable = 0
+    max_ratio = -np.inf
+    for chunk in iter_chunks(out_dir, ["profitable", "ratio", "gain_bound_uMHR", "cost_uMHR"]):
+        rows += len(chunk["ratio"])
+        profitable += int(chunk["profitable"].sum())
+        bound_profitable += int((chunk["gain_bound_uMHR"] >= chunk["cost_uMHR"]).sum())
+        max_ratio = max(max_ratio, float(chunk["ratio"].max()))
+    return {"rows": rows, "profitable": profitable, "bound_profitable": bound_profitable,
+            "max_ratio": max_ratio}
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- COLUMNAR DOUBLE-SPEND SWEEP")
+    print("=" * 70)
+
+    axes = {
+        "T": np.unique(np.logspace(0, 4.5, 40).astype(int)),
+        "K": np.unique(np.logspace(0, 3, 25).astype(int)),
+        "C_requested": np.logspace(3, 7, 25),
+        "N": np.logspace(2, 6, 10).astype(int),
+        "packets_per_min": [1, 10, 100],
+        "M": [0, 10, 100],
+    }
+    total = int(np.prod([len(v) for v in _as_axes(axes)]))
+    print(f"\n  Grid: {' x '.join(f'{k}={len(np.atleast_1d(v))}' for k, v in axes.items())}"
+          f" = {total:,} scenarios")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        t0 = time.perf_counter()
+        sweep(axes, out_dir)
+        elapsed = time.perf_counter() - t0
+        print(f"  Evaluated in {elapsed:.2f}s ({total / elapsed:,.0f} scenarios/s)")
+
+        summary = sweep_summary(out_dir)
+        print(f"  Profitable scenarios: {summary['profitable']:,} of {summary['rows']:,}"
+              f" (max G/C = {summary['max_ratio']:.4f});"
+              f" {summary['bound_profitable']:,} under the gain() bound")
+
+        profitable = load_sweep(out_dir, where=lambda c: c["profitable"])
+        if len(profitable["T"]):
+            easiest = np.argmin(profitable["T"])
+            print(f"  Easiest: T={profitable['T'][easiest]}, K={profitable['K'][easiest]}, "
+                  f"C={profitable['C_requested'][easiest]:,.0f} uMHR, "
+                  f"packets/min={profitable['packets_per_min'][easiest]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Mehr Network -- Shared Emission Schedule Kernel
+
+One importable copy of the halving emission schedule used by every
+analysis script, replacing the per-script epoch_reward / scaled_emission /
+cumulative_supply_at / circulating_supply_at_epoch copies.
+
+Each EmissionSchedule precomputes, once, the reward of every halving
+period and a prefix-sum table of supply at each halving boundary.
+Cumulative supply at any epoch is then one table lookup plus one partial
+period, O(1) per query, and accepts scalars or NumPy arrays of epochs.
+The prefix sums are accumulated in the same order as the old interval
+walk, so scalar results are bit-for-bit identical to it.
+
+Three schedules are provided:
+  MHR_SCHEDULE       float MHR, pure halving (partition analyses)
+  uMHR_SCHEDULE      integer uMHR, pure halving (epoch partition analysis)
+  TAIL_MHR_SCHEDULE  integer MHR with a fixed 100 MHR tail floor
+                     (defense comparison)
+
+The supply-proportional tail floor from mhr-token.md (0.1% of circulating
+supply per year) is applied by reward() when a circulating supply is given.
+
+All constants are drawn directly from the Mehr protocol specification.
+"""
+
+import numpy as np
+
+# --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
+
+INITIAL_EPOCH_REWARD_uMHR = 10**12       # mhr-token.md: uMHR per epoch
+INITIAL_EPOCH_REWARD = 10**6             # MHR per epoch (= 10^12 μMHR)
+HALVING_INTERVAL = 100_000               # mhr-token.md: every 100,000 epochs
+MAX_SHIFT = 63                           # mhr-token.md: shift capped at 63
+REFERENCE_SIZE = 100                     # active-set scaling denominator
+TAIL_EMISSION_RATE = 0.001               # mhr-token.md: 0.1% of supply/year
+TAIL_REWARD = 100                        # fixed floor reward per epoch (MHR)
+EPOCHS_PER_YEAR = 52_600                 # ~1 epoch per 10 minutes
+SUPPLY_CEILING_uMHR = 2**64              # mhr-token.md: theoretical μMHR ceiling
+
+
+# --- SCHEDULE ---------------------------------------------------------------
+
+class EmissionSchedule:
+    """Halving emission schedule with a precomputed prefix-sum table.
+
+    Args:
+        initial_reward: reward per epoch before the first halving
+        integer: use integer right shifts (exact uMHR/MHR) instead of
+            float division
+        tail_reward: fixed per-epoch floor (0 = no fixed floor)
+    """
+
+    def __init__(self, initial_reward, integer=False, tail_reward=0):
+        self.initial_reward = initial_reward
+        self.integer = integer
+        self.tail_reward = tail_reward
+
+        rewards = []
+        for shift in range(MAX_SHIFT + 1):
+            if integer:
+                halved = initial_reward >> shift
+            else:
+                halved = initial_reward / (2 ** shift)
+            rewards.append(max(halved, tail_reward))
+
+        # boundary_supply[h] = supply minted before epoch h * HALVING_INTERVAL
+        supply = 0 if integer else 0.0
+        boundary_supply = []
+        for reward in rewards:
+            boundary_supply.append(supply)
+            supply += reward * HALVING_INTERVAL
+
+        self.rewards = rewards
+        self.boundary_supply = boundary_supply
+        dtype = np.int64 if integer else np.float64
+        self._rewards_arr = np.array(rewards, dtype=dtype)
+        self._boundary_arr = np.array(boundary_supply, dtype=dtype)
+
+    def reward(self, epoch, circulating_supply=None):
+        """Per-epoch reward, with the supply-proportional tail floor when
+        circulating_supply is given. Accepts scalars or NumPy arrays."""
+        if not isinstance(epoch, np.ndarray) and not isinstance(circulating_supply, np.ndarray):
+            halved = self.rewards[min(epoch // HALVING_INTERVAL, MAX_SHIFT)]
+            if circulating_supply is not None and circulating_supply > 0:
+                tail_floor = circulating_supply * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR
+                tail_floor = int(tail_floor) if self.integer else tail_floor
+                return max(halved, tail_floor)
+            return halved
+
+        epoch = np.maximum(np.asarray(epoch, dtype=np.int64), 0)
+        shift = np.minimum(epoch // HALVING_INTERVAL, MAX_SHIFT)
+        halved = self._rewards_arr[shift]
+        if circulating_supply is None:
+            return halved
+        supply = np.asarray(circulating_supply)
+        tail_floor = np.where(supply > 0,
+                              supply * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR, 0)
+        if self.integer:
+            tail_floor = tail_floor.astype(np.int64)
+        return np.maximum(halved, tail_floor)
+
+    def scaled(self, N, epoch):
+        """Emission scaled by a partition's active set size. Accepts scalars
+        or NumPy arrays for N and epoch."""
+        if not isinstance(N, np.ndarray) and not isinstance(epoch, np.ndarray):
+            return ((min(N, REFERENCE_SIZE) / REFERENCE_SIZE)
+                    * self.rewards[min(epoch // HALVING_INTERVAL, MAX_SHIFT)])
+        return (np.minimum(N, REFERENCE_SIZE) / REFERENCE_SIZE) * self.reward(epoch)
+
+    def cumulative(self, epoch):
+        """Total supply minted in epochs [0, epoch). O(1) per query;
+        accepts scalars or NumPy arrays."""
+        if not isinstance(epoch, np.ndarray):
+            epoch = max(int(epoch), 0)
+            h = min(epoch // HALVING_INTERVAL, MAX_SHIFT)
+            return self.boundary_supply[h] + self.rewards[h] * (epoch - h * HALVING_INTERVAL)
+
+        epoch = np.maximum(np.asarray(epoch, dtype=np.int64), 0)
+        h = np.minimum(epoch // HALVING_INTERVAL, MAX_SHIFT)
+        return self._boundary_arr[h] + self._rewards_arr[h] * (epoch - h * HALVING_INTERVAL)
+
+
+MHR_SCHEDULE = EmissionSchedule(INITIAL_EPOCH_REWARD)
+uMHR_SCHEDULE = EmissionSchedule(INITIAL_EPOCH_REWARD_uMHR, integer=True)
+TAIL_MHR_SCHEDULE = EmissionSchedule(INITIAL_EPOCH_REWARD, integer=True,
+                                     tail_reward=TAIL_REWARD)
+
+
+# --- CONVENIENCE FUNCTIONS --------------------------------------------------
+
+def halving_segments(start_epoch, epochs):
+    """Yield (offset, length, epoch) for each run of constant emission."""
+    offset = 0
+    while offset < epochs:
+        epoch = start_epoch + offset
+        next_halving = (epoch // HALVING_INTERVAL + 1) * HALVING_INTERVAL
+        length = min(next_halving - epoch, epochs - offset)
+        yield offset, length, epoch
+        offset += length
+
+
+def epoch_reward(epoch_number):
+    """Exact emission formula from mhr-token.md (in MHR, not μMHR)."""
+    return MHR_SCHEDULE.reward(epoch_number)
+
+
+def scaled_emission(N, epoch_number):
+    """Scaled emission for an N-node partition (MHR)."""
+    return MHR_SCHEDULE.scaled(N, epoch_number)
+
+
+def cumulative_supply_at(epoch):
+    """Total circulating supply at given epoch (MHR, no tail)."""
+    return MHR_SCHEDULE.cumulative(epoch)
+
+
+def circulating_supply_at_epoch(target_epoch):
+    """Total circulating supply at given epoch (exact integer uMHR, no tail)."""
+    return uMHR_SCHEDULE.cumulative(target_epoch)
+
+
+# --- REFERENCE WALK ---------------------------------------------------------
+
+def cumulative_walk(schedule, epoch):
+    """Original interval-by-interval walk, kept as the reference."""
+    supply = 0 if schedule.integer else 0.0
+    current = 0
+    while current < epoch:
+        reward = schedule.reward(current)
+        next_halving = ((current // HALVING_INTERVAL) + 1) * HALVING_INTERVAL
+        epochs_at_rate = min(next_halving, epoch) - current
+        supply += reward * epochs_at_rate
+        current += epochs_at_rate
+    return supply
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- EMISSION SCHEDULE PREFIX TABLE vs INTERVAL WALK")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    epochs = np.concatenate([
+        np.arange(0, 3 * HALVING_INTERVAL + 1, 997),
+        np.arange(0, 64) * HALVING_INTERVAL,
+        rng.integers(0, 64 * HALVING_INTERVAL, 2_000),
+    ])
+    mismatches = 0
+    for name, schedule in [("MHR", MHR_SCHEDULE), ("uMHR", uMHR_SCHEDULE),
+                           ("MHR+tail", TAIL_MHR_SCHEDULE)]:
+        table = schedule.cumulative(epochs)
+        bad = sum(1 for e, v in zip(epochs, table)
+                  if schedule.cumulative(int(e)) != cumulative_walk(schedule, int(e))
+                  or v != schedule.cumulative(int(e)))
+        mismatches += bad
+        print(f"  {name:<10} {len(epochs):>6,} epochs checked: {bad} mismatches")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
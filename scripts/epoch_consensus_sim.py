@@ -0,0 +1,520 @@
+"""
+Mehr Network -- Agent-Based Epoch Consensus Simulator
+
+Runs the epoch state machine of epoch-compaction.md (Epoch Triggers,
+Epoch Proposer Selection, Epoch Lifecycle) node by node over a gossip
+graph, to measure what can_reach_consensus, partition_analysis and
+recovery_rounds in epoch_partition_analysis.py estimate in closed form.
+
+Every gossip round:
+  1. Online nodes settle; each settlement lands in the origin slot of
+     the settling node's partition group.
+  2. One push-pull exchange per live link (same group, both online,
+     not lost) carries settlement knowledge, the best proposal seen and
+     the newest activated epoch one hop.
+  3. Nodes holding a proposal ACK it, or NAK it when their own count
+     since the last epoch exceeds the proposal's by more than 5%. A NAK
+     starts a NAK_WAIT_ROUNDS timer; if no better proposal arrives the
+     node re-proposes. An ACK reaches the proposer after the same number
+     of hops the proposal took to arrive, and the proposer activates the
+     epoch once can_reach_consensus holds for the proposal's active set.
+  4. Nodes that meet the trigger (epoch_trigger_met, vectorized) and the
+     eligibility rules may propose: epoch number + 1, their settlement
+     counts, and their view of the active set as the 67% denominator.
+
+Node state is struct-of-arrays (one NumPy array per field, one entry per
+node) and a round is a fixed number of CSR gather/reduce passes, so a
+100,000-node active set steps at tens of rounds per second.
+
+Modelling assumptions (not spec values):
+  - settlement knowledge is a per-slot high-water count, so a group's
+    history must be linear between split and heal (it is for the
+    split -> heal events used here)
+  - "settled within the last 2 epochs" is tracked in rounds
+    (ACTIVE_SET_WINDOW_ROUNDS), so a stalled minority's active set can
+    still shrink to its own members -- partition_analysis's long-term case
+  - eligible nodes propose with probability 1 / active_set_size per
+    round, and an unactivated proposal expires after
+    PROPOSAL_TIMEOUT_ROUNDS, after which its proposer may try again
+"""
+
+import time
+import numpy as np
+
+from epoch_partition_analysis import (GOSSIP_INTERVAL_SEC, GSET_TRIGGER_BYTES,
+                                      NAK_WAIT_ROUNDS, SETTLEMENT_HASH_BYTES,
+                                      SETTLEMENT_TRIGGER_LARGE,
+                                      SMALL_PARTITION_MIN_ROUNDS, can_reach_consensus,
+                                      epoch_trigger_met, partition_analysis,
+                                      recovery_rounds)
+from gossip_engine import LINK_LOSS, PEER_DEGREE, random_peer_graph
+
+# --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
+
+NAK_TOLERANCE = 0.05                     # epoch-compaction.md: within 5% -> ACK
+MIN_PROPOSER_LINKS = 3                   # direct links needed to propose
+
+# --- SIMULATION ASSUMPTIONS -------------------------------------------------
+
+ACTIVE_SET_WINDOW_ROUNDS = 2 * SMALL_PARTITION_MIN_ROUNDS
+PROPOSAL_TIMEOUT_ROUNDS = 60             # ~1 hour without activation
+SETTLE_RATE = 0.005                      # settlements per online node per round
+
+
+# --- TRIGGERS ---------------------------------------------------------------
+
+def small_trigger_threshold(active_set_size):
+    """small_partition_settlement_trigger over arrays."""
+    return np.maximum(200, np.asarray(active_set_size) * 10)
+
+
+def epoch_trigger_mask(settlements, gset_bytes, active_set_size, rounds_since_last):
+    """epoch_trigger_met over arrays: True where any trigger fires."""
+    return ((settlements >= SETTLEMENT_TRIGGER_LARGE)
+            | (gset_bytes >= GSET_TRIGGER_BYTES)
+            | ((settlements >= small_trigger_threshold(active_set_size))
+               & (rounds_since_last >= SMALL_PARTITION_MIN_ROUNDS)))
+
+
+# --- GOSSIP -----------------------------------------------------------------
+
+def _pull_max(vals, indptr, live, empty):
+    """Per node, the max of its CSR edge values over live edges (empty if none).
+    vals is overwritten."""
+    vals[~live] = empty
+    out = np.full((len(indptr) - 1,) + vals.shape[1:], empty, dtype=vals.dtype)
+    has = indptr[1:] > indptr[:-1]
+    if len(vals):
+        out[has] = np.maximum.reduceat(vals, indptr[:-1][has], axis=0)
+    return out
+
+
+def bfs_order(indptr, indices, start):
+    """Nodes in breadth-first order from start (unreached nodes last), so
+    a prefix of the order is a connected region of the mesh."""
+    n = len(indptr) - 1
+    seen = np.zeros(n, dtype=bool)
+    seen[start] = True
+    order = [np.array([start])]
+    frontier = order[0]
+    while len(frontier):
+        counts = indptr[frontier + 1] - indptr[frontier]
+        edge = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts) \
+            + np.arange(counts.sum())
+        nbrs = indices[edge]
+        nbrs = nbrs[~seen[nbrs]]
+        nbrs = nbrs[np.sort(np.unique(nbrs, return_index=True)[1])]
+        seen[nbrs] = True
+        order.append(nbrs)
+        frontier = nbrs
+    order.append(np.flatnonzero(~seen))
+    return np.concatenate(order)
+
+
+# --- SIMULATOR --------------------------------------------------------------
+
+class EpochConsensusSim:
+    """Epoch consensus over n nodes, all in the initial active set.
+
+    Args:
+        n: nodes
+        n_groups: partition groups (settlement origin slots) available
+        settle_rate: settlements per online node per round
+        active_window: rounds a node stays in the active set after settling
+        link_loss: per-exchange loss probability
+        graph: CSR (indptr, indices); default random_peer_graph(n)
+        rng: seed or Generator
+    """
+
+    def __init__(self, n, n_groups=2, settle_rate=SETTLE_RATE,
+                 active_window=ACTIVE_SET_WINDOW_ROUNDS, link_loss=LINK_LOSS,
+                 degree=PEER_DEGREE, graph=None, rng=None):
+        self.rng = np.random.default_rng(rng)
+        self.n = n
+        self.settle_rate = settle_rate
+        self.active_window = active_window
+        self.link_loss = link_loss
+        self.indptr, self.indices = graph or random_peer_graph(n, degree, self.rng)
+        self.row = np.repeat(np.arange(n), np.diff(self.indptr))
+        self.round = 0
+
+        # Node state, one array per field
+        self.group = np.zeros(n, dtype=np.int16)
+        self.online = np.ones(n, dtype=bool)
+        self.epoch = np.zeros(n, dtype=np.int32)
+        self.snap = np.zeros(n, dtype=np.int32)          # activated proposal id
+        self.last_epoch_round = np.zeros(n, dtype=np.int32)
+        self.best = np.full(n, -1, dtype=np.int32)       # best live proposal id
+        self.best_since = np.zeros(n, dtype=np.int32)
+        self.nak_for = np.full(n, -1, dtype=np.int32)
+        self.nak_until = np.zeros(n, dtype=np.int32)
+        self.proposed_round = np.full(n, -PROPOSAL_TIMEOUT_ROUNDS, dtype=np.int32)
+        self.known = np.zeros((n_groups, n), dtype=np.int64)      # per origin slot
+        # Last round each group heard a settlement from each node
+        self.heard = np.zeros((n_groups, n), dtype=np.int32)
+        self.generated = np.zeros(n_groups, dtype=np.int64)
+
+        # Proposal table; id 0 is the genesis epoch every node starts on
+        self.n_props = 0
+        self.p_counts = np.zeros((64, n_groups), dtype=np.int64)
+        self.p_target = np.zeros(64, dtype=np.int32)
+        self.p_active = np.zeros(64, dtype=np.int64)
+        self.p_round = np.zeros(64, dtype=np.int32)
+        self.p_proposer = np.zeros(64, dtype=np.int64)
+        self.p_activated = np.zeros(64, dtype=bool)
+        self._add_proposals(np.array([-1]), np.zeros((1, n_groups), np.int64),
+                            np.zeros(1), np.array([n]))
+        self.p_activated[0] = True
+        self._update_links()
+
+    # --- events ---
+
+    def split(self, labels):
+        """Partition the network: labels[i] is node i's group."""
+        self.group = np.asarray(labels, dtype=np.int16)
+        self.heard[:] = self.heard.max(axis=0)
+        self._update_links()
+
+    def heal(self):
+        """Reconnect every group into group 0."""
+        self.split(np.zeros(self.n, dtype=np.int16))
+
+    def set_online(self, mask):
+        self.online = np.asarray(mask, dtype=bool)
+        self._update_links()
+
+    def add_settlements(self, count, nodes):
+        """count settlements made in the nodes' group(s), known to all of `nodes`."""
+        nodes = np.asarray(nodes)
+        for g in np.flatnonzero(np.bincount(self.group[nodes], minlength=len(self.generated))):
+            members = nodes[self.group[nodes] == g]
+            self.generated[g] += count
+            self.known[g, members] = self.generated[g]
+            self.heard[g, members] = self.round
+
+    def _update_links(self):
+        src, dst = self.row, self.indices
+        self.live = (self.online[src] & self.online[dst]
+                     & (self.group[src] == self.group[dst]))
+        self.live_degree = np.bincount(src[self.live], minlength=self.n)
+
+    # --- proposal table ---
+
+    def _add_proposals(self, proposer, counts, target, active):
+        k = len(proposer)
+        while self.n_props + k > len(self.p_target):
+            grow = len(self.p_target)
+            self.p_counts = np.concatenate([self.p_counts, np.zeros_like(self.p_counts[:grow])])
+            for name in ["p_target", "p_active", "p_round", "p_proposer", "p_activated"]:
+                col = getattr(self, name)
+                setattr(self, name, np.concatenate([col, np.zeros_like(col[:grow])]))
+        ids = np.arange(self.n_props, self.n_props + k)
+        self.p_counts[ids] = counts
+        self.p_target[ids] = target
+        self.p_active[ids] = active
+        self.p_round[ids] = self.round
+        self.p_proposer[ids] = proposer
+        self.n_props += k
+
+        # Ranks (last slot = "none" for id -1): conflicting proposals by
+        # highest settlement count, ties to the lowest proposer; activated
+        # epochs by epoch number first
+        n_p = self.n_props
+        total = self.p_counts[:n_p].sum(axis=1)
+        self._best_order = np.lexsort((-self.p_proposer[:n_p], total))
+        self._snap_order = np.lexsort((-self.p_proposer[:n_p], total, self.p_target[:n_p]))
+        self._best_rank = np.full(n_p + 1, -1, dtype=np.int64)
+        self._best_rank[self._best_order] = np.arange(n_p)
+        self._snap_rank = np.full(n_p + 1, -1, dtype=np.int64)
+        self._snap_rank[self._snap_order] = np.arange(n_p)
+        self._target = np.append(self.p_target[:n_p], -1)
+        return ids
+
+    # --- round ---
+
+    def active_set_view(self):
+        """Per node: active set size as seen from its group."""
+        counts = (self.heard >= self.round - self.active_window).sum(axis=1)
+        return counts[self.group]
+
+    def since_epoch(self):
+        """Per node: settlements it knows of beyond its epoch snapshot."""
+        base = np.take(self.p_counts, self.snap, axis=0).T
+        return np.maximum(self.known - base, 0).sum(axis=0)
+
+    def step(self):
+        settle = self.online & (self.rng.random(self.n) < self.settle_rate)
+        if settle.any():
+            self.add_settlements(1, np.flatnonzero(settle))
+
+        live = self.live & (self.rng.random(len(self.indices)) >= self.link_loss)
+        self._gossip(live)
+        self._vote()
+        self._propose()
+        self.round += 1
+
+    def _gossip(self, live):
+        t = self.round
+        indptr, indices = self.indptr, self.indices
+        for slot in self.known:
+            if slot.min() < slot.max():
+                np.maximum(slot, _pull_max(slot[indices], indptr, live, 0), out=slot)
+        receiver_epoch = np.repeat(self.epoch, np.diff(indptr))
+
+        # Best proposal for an epoch number above the receiver's
+        if (self.best >= 0).any():
+            rank = self._best_rank[self.best]
+            fresh = self._target[self.best][indices] > receiver_epoch
+            pulled = _pull_max(rank[indices], indptr, live & fresh, -1)
+            better = pulled > rank
+            self.best[better] = self._best_order[pulled[better]]
+            self.best_since[better] = t
+
+        # Newer activated epochs are adopted on contact
+        if self.epoch.min() < self.epoch.max():
+            fresh = self.p_target[self.snap][indices] > receiver_epoch
+            pulled = _pull_max(self._snap_rank[self.snap][indices], indptr, live & fresh, -1)
+            adopt = np.flatnonzero(pulled >= 0)
+            if len(adopt):
+                self._adopt(adopt, self._snap_order[pulled[adopt]])
+
+    def _adopt(self, nodes, ids):
+        self.epoch[nodes] = self.p_target[ids]
+        self.snap[nodes] = ids
+        self.last_epoch_round[nodes] = self.round
+        self.best[nodes] = np.where(self._target[self.best[nodes]] > self.epoch[nodes],
+                                    self.best[nodes], -1)
+        self.nak_for[nodes] = -1
+
+    def _vote(self):
+        t = self.round
+        holders = np.flatnonzero(self.online & (self.best >= 0))
+        expired = self.p_round[self.best[holders]] + PROPOSAL_TIMEOUT_ROUNDS < t
+        self.best[holders[expired]] = -1
+        holders = holders[~expired]
+        if not len(holders):
+            return
+        p = self.best[holders]
+        base = np.take(self.p_counts, self.snap[holders], axis=0)
+        local = np.maximum(self.known[:, holders].T - base, 0).sum(axis=1)
+        offered = np.maximum(np.take(self.p_counts, p, axis=0) - base, 0).sum(axis=1)
+        nak = local > (1 + NAK_TOLERANCE) * offered
+
+        new_nak = nak & (self.nak_for[holders] != p)
+        self.nak_for[holders[new_nak]] = p[new_nak]
+        self.nak_until[holders[new_nak]] = t + NAK_WAIT_ROUNDS
+
+        # An ACK travels back over as many hops as the proposal took
+        arrived = ~nak & (2 * self.best_since[holders] - self.p_round[p] <= t)
+        acks = np.bincount(p[arrived], minlength=self.n_props)
+        for pid in np.flatnonzero(acks):
+            proposer = self.p_proposer[pid]
+            if (not self.p_activated[pid] and self.online[proposer]
+                    and self.epoch[proposer] < self.p_target[pid]
+                    and can_reach_consensus(int(self.p_active[pid]), int(acks[pid]))):
+                self.p_activated[pid] = True
+                self._adopt(np.array([proposer]), np.array([pid]))
+
+    def _propose(self):
+        t = self.round
+        view = self.active_set_view()
+        since = self.since_epoch()
+        triggered = epoch_trigger_mask(since, since * SETTLEMENT_HASH_BYTES, view,
+                                       t - self.last_epoch_round)
+        eligible = (self.online & triggered
+                    & (since >= np.minimum(SETTLEMENT_TRIGGER_LARGE, small_trigger_threshold(view)))
+                    & (self.live_degree >= np.minimum(MIN_PROPOSER_LINKS, view / 2))
+                    & (t - self.proposed_round >= PROPOSAL_TIMEOUT_ROUNDS))
+        fresh = (self.best < 0) & (self.rng.random(self.n) * view < 1)
+        after_nak = (self.nak_for >= 0) & (self.best == self.nak_for) & (t >= self.nak_until)
+        nodes = np.flatnonzero(eligible & (fresh | after_nak))
+        if not len(nodes):
+            return
+        ids = self._add_proposals(nodes, self.known[:, nodes].T, self.epoch[nodes] + 1, view[nodes])
+        self.best[nodes] = ids
+        self.best_since[nodes] = t
+        self.nak_for[nodes] = -1
+        self.proposed_round[nodes] = t
+
+    def run(self, rounds, until=None):
+        """Step up to `rounds` rounds; stop early once until(self) is true.
+        Returns the rounds stepped."""
+        for i in range(rounds):
+            if until is not None and until(self):
+                return i
+            self.step()
+        return rounds
+
+    # --- observations ---
+
+    def activated(self):
+        """Ids of activated proposals (excluding genesis)."""
+        return np.flatnonzero(self.p_activated[1:self.n_props]) + 1
+
+    def covers(self, totals):
+        """Per node: its epoch snapshot includes every settlement in totals."""
+        return (np.take(self.p_counts, self.snap, axis=0) >= totals).all(axis=1)
+
+
+# --- EXPERIMENTS ------------------------------------------------------------
+
+def region_labels(sim, fraction, rng):
+    """Group 0 = a connected region of `fraction` of the nodes, grown
+    breadth-first from a random node; group 1 = the rest."""
+    order = bfs_order(sim.indptr, sim.indices, rng.integers(sim.n))
+    labels = np.ones(sim.n, dtype=np.int16)
+    labels[order[:int(fraction * sim.n)]] = 0
+    return labels
+
+
+def liveness_trial(n, online_fraction, rounds=60, rng=None):
+    """Rounds until the first epoch activates with a random online subset
+    holding a full trigger's worth of settlements (None if it never does)."""
+    rng = np.random.default_rng(rng)
+    sim = EpochConsensusSim(n, n_groups=1, settle_rate=0.0, rng=rng)
+    online = np.zeros(n, dtype=bool)
+    online[rng.permutation(n)[:int(round(online_fraction * n))]] = True
+    sim.set_online(online)
+    sim.add_settlements(SETTLEMENT_TRIGGER_LARGE, np.flatnonzero(online))
+    stepped = sim.run(rounds, until=lambda s: len(s.activated()))
+    return stepped if len(sim.activated()) else None
+
+
+def partition_trial(n, fraction, rounds, settle_rate=0.05, rng=None):
+    """Split n nodes into (fraction, 1 - fraction) with a trigger's worth
+    of settlements each; returns each side's first activation round."""
+    rng = np.random.default_rng(rng)
+    sim = EpochConsensusSim(n, settle_rate=settle_rate, rng=rng)
+    labels = region_labels(sim, fraction, rng)
+    sim.split(labels)
+    for g in range(2):
+        sim.add_settlements(SETTLEMENT_TRIGGER_LARGE, np.flatnonzero(labels == g))
+    first = [None, None]
+
+    def done(s):
+        for pid in s.activated():
+            g = labels[s.p_proposer[pid]]
+            if first[g] is None:
+                first[g] = s.round
+        return None not in first
+
+    sim.run(rounds, until=done)
+    return first
+
+
+def recovery_trial(n, split_rounds=40, fraction=0.7, max_rounds=400, rng=None):
+    """Rounds from heal until every online node sits on an epoch covering
+    all settlements made before the heal (None if not within max_rounds).
+
+    Both sides start with a trigger's worth of settlements; the majority
+    activates an epoch during the split, the minority stalls. Each side
+    then makes another trigger's worth before the partition heals.
+    """
+    rng = np.random.default_rng(rng)
+    sim = EpochConsensusSim(n, settle_rate=0.0, rng=rng)
+    labels = region_labels(sim, fraction, rng)
+    sim.split(labels)
+    for _ in range(2):
+        for g in range(2):
+            sim.add_settlements(SETTLEMENT_TRIGGER_LARGE, np.flatnonzero(labels == g))
+        sim.run(split_rounds)
+    totals = sim.generated.copy()
+    sim.heal()
+    stepped = sim.run(max_rounds, until=lambda s: s.covers(totals).all())
+    return stepped if sim.covers(totals).all() else None
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _quantiles(values, qs=(0.5, 0.9)):
+    values = [v for v in values if v is not None]
+    if not values:
+        return ["--"] * (len(qs) + 1)
+    return [f"{np.quantile(values, q):.0f}" for q in qs] + [f"{max(values)}"]
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- AGENT-BASED EPOCH CONSENSUS SIMULATOR")
+    print("=" * 70)
+
+    # Vectorized trigger must agree with epoch_trigger_met
+    grid = np.meshgrid([0, 199, 200, 999, 1_000, 9_999, 10_000, 16_000, 20_000],
+                       [1, 20, 100, 999, 1_000, 10_000],
+                       [0, 999, 1_000, 5_000], indexing="ij")
+    settlements, active, rounds = (g.ravel() for g in grid)
+    mask = epoch_trigger_mask(settlements, settlements * SETTLEMENT_HASH_BYTES, active, rounds)
+    mismatches = sum(
+        bool(mask[i]) != epoch_trigger_met(int(settlements[i]),
+                                           int(settlements[i]) * SETTLEMENT_HASH_BYTES,
+                                           int(active[i]), int(rounds[i]))[0]
+        for i in range(len(mask)))
+    print(f"\n  epoch_trigger_mask vs epoch_trigger_met ({len(mask)} cases): "
+          f"{mismatches} mismatches")
+
+    print(f"\n  Step rate:")
+    for n in [1_000, 10_000, 100_000]:
+        sim = EpochConsensusSim(n, rng=0)
+        sim.add_settlements(SETTLEMENT_TRIGGER_LARGE, np.arange(n))
+        t0 = time.perf_counter()
+        sim.run(50)
+        elapsed = time.perf_counter() - t0
+        print(f"    {n:>9,d} nodes: {50 / elapsed:>7.1f} rounds/s  "
+              f"({len(sim.activated())} epochs, {sim.n_props - 1} proposals)")
+
+    # Liveness: share of trials activating an epoch vs the 67% rule
+    fractions = [0.5, 0.6, 0.65, 0.67, 0.7, 0.8, 1.0]
+    trials = 10
+    print(f"\n  Liveness: P(epoch activates within 60 rounds), {trials} trials")
+    print(f"  {'N':>8s}  " + "  ".join(f"{f:>6.0%}" for f in fractions)
+          + "   median rounds at 100%")
+    print(f"  {'-'*8}  " + "  ".join("-" * 6 for _ in fractions))
+    unsafe = 0
+    rng = np.random.default_rng(1)
+    for n in [100, 1_000, 10_000]:
+        measured, analytic, full = [], [], []
+        for f in fractions:
+            outcomes = [liveness_trial(n, f, rng=rng) for _ in range(trials)]
+            p = np.mean([o is not None for o in outcomes])
+            ok = can_reach_consensus(n, int(round(f * n)))
+            unsafe += int(p > 0 and not ok)
+            measured.append(f"{p:>6.0%}")
+            analytic.append(f"{'yes' if ok else 'no':>6s}")
+            full = outcomes
+        print(f"  {n:>8,d}  " + "  ".join(measured) + f"   {_quantiles(full)[0]:>5s}")
+        print(f"  {'model':>8s}  " + "  ".join(analytic))
+
+    # Partitions: short-term (pre-partition active set) vs long-term
+    window = ACTIVE_SET_WINDOW_ROUNDS
+    print(f"\n  Partitions (N=1,000): first activation round per side "
+          f"(active set window {window} rounds)")
+    print(f"  {'Side':>6s}  {'Short (model)':>14s}  {'Long (model)':>13s}  {'Measured':>9s}")
+    print(f"  {'-'*6}  {'-'*14}  {'-'*13}  {'-'*9}")
+    for frac in [0.8, 0.67, 0.6, 0.5]:
+        first = partition_trial(1_000, frac, window + 3 * PROPOSAL_TIMEOUT_ROUNDS, rng=rng)
+        for side, r in zip(partition_analysis(1_000, [frac, 1 - frac]), first):
+            print(f"  {side['fraction']:>6.0%}  {str(side['can_consensus_short_term']):>14s}  "
+                  f"{str(side['can_consensus_long_term']):>13s}  "
+                  f"{'never' if r is None else r:>9}")
+            unsafe += int(r is not None and r < window
+                          and not side["can_consensus_short_term"])
+
+    # Recovery after heal: distribution vs recovery_rounds
+    print(f"\n  Recovery after heal (70/30 split), rounds:")
+    print(f"  {'N':>8s}  {'best':>6s}  {'normal':>6s}  {'worst':>6s}  "
+          f"{'p50':>5s}  {'p90':>5s}  {'max':>5s}  {'failed':>6s}")
+    print(f"  {'-'*8}  {'-'*6}  {'-'*6}  {'-'*6}  {'-'*5}  {'-'*5}  {'-'*5}  {'-'*6}")
+    for n, trials in [(100, 20), (1_000, 20), (10_000, 10), (100_000, 3)]:
+        outcomes = [recovery_trial(n, rng=rng) for _ in range(trials)]
+        model = [recovery_rounds(n, s) for s in ["best", "normal", "worst"]]
+        print(f"  {n:>8,d}  " + "  ".join(f"{m:>6.1f}" for m in model) + "  "
+              + "  ".join(f"{q:>5s}" for q in _quantiles(outcomes))
+              + f"  {sum(o is None for o in outcomes):>6d}")
+    print(f"  (1 round = {GOSSIP_INTERVAL_SEC}s)")
+
+    if mismatches or unsafe:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
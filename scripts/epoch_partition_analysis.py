@@ -11,9 +11,13 @@ All constants are drawn directly from the Mehr protocol specification.
 import math
 import os
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from emission_schedule import (EPOCHS_PER_YEAR, TAIL_EMISSION_RATE,
+                               circulating_supply_at_epoch, halving_segments,
+                               uMHR_SCHEDULE)
+from gossip_engine import interpolate_window
+from output_paths import output_path, parse_analysis_args, pyplot
+from result_cache import cached, cached_figure
 
 # --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
 
@@ -30,10 +34,6 @@ BLOOM_BITS_PER_ELEM = 19.2              # at 0.01% FPR
 VERIFICATION_WINDOW_EPOCHS = 4           # crdt-ledger.md
 NAK_WAIT_ROUNDS = 3                      # crdt-ledger.md: wait after NAK
 EPOCH_DURATION_MIN = 10                  # mhr-token.md estimate
-INITIAL_EPOCH_REWARD = 10**12            # mhr-token.md: uMHR per epoch
-HALVING_INTERVAL = 100_000               # mhr-token.md: every 100,000 epochs
-TAIL_EMISSION_RATE = 0.001               # mhr-token.md: 0.1% of supply/year
-EPOCHS_PER_YEAR = 52_600                 # mhr-token.md estimate
 
 # --- EPOCH TRIGGERS ----------------------------------------------------------
 
@@ -115,34 +115,29 @@ def time_to_gset_limit(settlement_rate_per_min, limit_bytes=GSET_TRIGGER_BYTES):
     settlements_to_limit = limit_bytes / SETTLEMENT_HASH_BYTES
     return settlements_to_limit / settlement_rate_per_min
 
+
+# (label, mesh nodes, settlement policy) simulated by payment_channels.py
+SETTLEMENT_SCENARIOS = (("20-node village", 20, "per_epoch"),
+                        ("100-node mesh", 100, "per_epoch"),
+                        ("1,000 nodes, hourly", 1_000, "hourly"),
+                        ("1,000-node mesh", 1_000, "per_epoch"))
+
+
+def measured_settlement_rates():
+    """{label: settlements/min} for SETTLEMENT_SCENARIOS, measured on
+    simulated payment channels at the default relay traffic."""
+    from payment_channels import measured_settlement_rate  # imports this module
+    return {label: measured_settlement_rate(n, policy=policy)
+            for label, n, policy in SETTLEMENT_SCENARIOS}
+
 # --- EMISSION SCHEDULE & OVERMINTING ----------------------------------------
 
 def epoch_reward(epoch_number, circulating_supply=None):
     """Exact emission formula from mhr-token.md."""
-    shift = min(epoch_number // HALVING_INTERVAL, 63)
-    halved = INITIAL_EPOCH_REWARD >> shift
-    if circulating_supply is not None and circulating_supply > 0:
-        tail_floor = int(circulating_supply * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR)
-        return max(halved, tail_floor)
-    return halved
-
-
-def circulating_supply_at_epoch(target_epoch):
-    """Compute cumulative supply by summing epoch rewards."""
-    supply = 0
-    # Sum in chunks of halving intervals for efficiency
-    current_epoch = 0
-    while current_epoch < target_epoch:
-        shift = min(current_epoch // HALVING_INTERVAL, 63)
-        reward = INITIAL_EPOCH_REWARD >> shift
-        # How many epochs at this reward level?
-        next_halving = (current_epoch // HALVING_INTERVAL + 1) * HALVING_INTERVAL
-        epochs_at_rate = min(next_halving, target_epoch) - current_epoch
-        supply += reward * epochs_at_rate
-        current_epoch += epochs_at_rate
-    return supply
+    return uMHR_SCHEDULE.reward(epoch_number, circulating_supply)
 
 
+@cached
 def overminting(num_partitions, epoch_number):
     """Excess supply from N partitions each minting a full epoch reward."""
     supply = circulating_supply_at_epoch(epoch_number)
@@ -161,16 +156,67 @@ def overminting(num_partitions, epoch_number):
         "excess_pct_of_supply": (excess / supply * 100) if supply > 0 else 0,
     }
 
+
+def minted_timeline(start_epoch, n_epochs, supply=None):
+    """Cumulative uMHR minted by one partition for every duration 0..n_epochs.
+
+    Includes the tail-floor feedback: each epoch mints
+    epoch_reward(epoch, supply) and supply grows by that reward. Epochs
+    where the halved reward still exceeds the tail floor are filled per
+    halving segment in one array pass; only epochs where the floor binds
+    are stepped.
+
+    supply: partition's circulating supply at start_epoch (default: the
+    global supply at that epoch).
+    Returns an int64 array of length n_epochs + 1 (index = duration).
+    """
+    if supply is None:
+        supply = circulating_supply_at_epoch(start_epoch)
+    rewards = np.empty(n_epochs, dtype=np.int64)
+    for offset, length, epoch in halving_segments(start_epoch, n_epochs):
+        halved = epoch_reward(epoch)
+        supplies = supply + halved * np.arange(length, dtype=np.int64)
+        floors = (supplies * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR).astype(np.int64)
+        binds = np.flatnonzero(floors > halved)
+        k = length if binds.size == 0 else binds[0]
+        rewards[offset:offset + k] = halved
+        supply += halved * k
+        # Floor binds: same arithmetic as epoch_reward(epoch + i, supply)
+        for i in range(k, length):
+            reward = max(halved, int(supply * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR))
+            rewards[offset + i] = reward
+            supply += reward
+    timeline = np.zeros(n_epochs + 1, dtype=np.int64)
+    np.cumsum(rewards, out=timeline[1:])
+    return timeline
+
+
+def overminting_timeline(num_partitions, start_epoch, n_epochs):
+    """Cumulative excess supply for every partition duration 0..n_epochs.
+
+    Each of the num_partitions partitions mints the full epoch reward
+    against its own growing supply, so the excess over a single network
+    is (num_partitions - 1) × what one partition mints.
+    Returns an int64 array of length n_epochs + 1 (index = duration).
+    """
+    return (num_partitions - 1) * minted_timeline(start_epoch, n_epochs)
+
 # --- RECOVERY MODEL ---------------------------------------------------------
 
-def recovery_rounds(N, scenario="normal"):
+def recovery_rounds(N, scenario="normal", measured=None):
     """Estimated gossip rounds to reach consensus after partition heals.
 
     best:   both partitions at same epoch, no conflicts
     normal: competing proposals, one NAK cycle
     worst:  multiple NAK cycles + large state divergence
+
+    measured: optional (N_points, window_sec) table from
+    gossip_engine.window_table; replaces the log2(N) convergence rounds.
     """
-    base = math.log2(max(N, 2))  # gossip convergence
+    if measured is not None:
+        base = float(interpolate_window(measured, N)) / GOSSIP_INTERVAL_SEC
+    else:
+        base = math.log2(max(N, 2))  # gossip convergence
     if scenario == "best":
         return base + 1  # one proposal round
     elif scenario == "normal":
@@ -318,7 +364,11 @@ def _true_balance(balance_A, settlements_A_post, balance_B, settlements_B_post):
 
 # --- PLOTTING ----------------------------------------------------------------
 
-def plot_all():
+@cached_figure("epoch_partition_analysis.png")
+def plot_all(rates=None):
+    """Eight-panel figure. rates: measured_settlement_rates() output for
+    plot 3 (default: simulated here, cached)."""
+    plt = pyplot()
     fig, axes = plt.subplots(4, 2, figsize=(16, 28))
     fig.suptitle("Mehr Network -- Epoch Consensus Under Partitions", fontsize=16, y=0.99)
 
@@ -372,9 +422,11 @@ def plot_all():
 
     # -- Plot 3: GSet memory pressure --
     ax = axes[1, 0]
-    rates = {"Low (0.5/min)": 0.5, "Medium (2/min)": 2, "High (10/min)": 10}
+    if rates is None:
+        rates = measured_settlement_rates()
     for label, rate in rates.items():
         mins, gset_bytes = gset_growth_timeline(rate, 72)
+        label = f"{label} ({rate:,.1f}/min)"
         ax.plot(mins / 60, gset_bytes / 1024, label=label, linewidth=2)
     ax.axhline(y=GSET_TRIGGER_BYTES / 1024, color="orange", linestyle="--",
                linewidth=2, label="500 KB trigger")
@@ -417,19 +469,10 @@ def plot_all():
     ax = axes[2, 0]
     days = np.arange(0, 31, 0.1)
     epochs_per_day = EPOCHS_PER_YEAR / 365
+    durations = (days * epochs_per_day).astype(int)
     for start_epoch in [0, 100_000, 500_000]:
-        cumulative_excess = []
-        supply = circulating_supply_at_epoch(start_epoch)
-        for d in days:
-            n_epochs = int(d * epochs_per_day)
-            excess = 0
-            for e in range(n_epochs):
-                ep = start_epoch + e
-                reward = epoch_reward(ep, supply)
-                excess += reward  # 2 partitions -> 1 extra epoch_reward per epoch
-                supply += reward  # supply grows in both partitions
-            cumulative_excess.append(excess)
-        cumulative_excess = np.array(cumulative_excess, dtype=float)
+        timeline = overminting_timeline(2, start_epoch, durations[-1])
+        cumulative_excess = timeline[durations].astype(float)
         supply_at_start = circulating_supply_at_epoch(start_epoch)
         pct = cumulative_excess / supply_at_start * 100 if supply_at_start > 0 else cumulative_excess
         label = f"Starting epoch {start_epoch:,}"
@@ -504,10 +547,8 @@ def plot_all():
                     color="white" if abs(old_val) > 30000 else "black")
 
     plt.tight_layout(rect=[0, 0, 1, 0.97])
-    os.makedirs("scripts/output", exist_ok=True)
-    plt.savefig("scripts/output/epoch_partition_analysis.png", dpi=150, bbox_inches="tight")
+    plt.savefig(output_path("epoch_partition_analysis.png"), dpi=150, bbox_inches="tight")
     plt.close()
-    print("  Saved: scripts/output/epoch_partition_analysis.png")
 
 
 def print_tables():
@@ -552,13 +593,13 @@ def print_tables():
 
     # -- GSet pressure --
     lines.append("\n3. GSET MEMORY PRESSURE (time to 500 KB trigger)")
-    lines.append(f"   {'Rate':>20} {'Time to 500KB':>15} {'Time to 520KB':>15}")
-    lines.append("   " + "-" * 54)
-    for label, rate in [("0.5 settl/min", 0.5), ("2 settl/min", 2),
-                        ("10 settl/min", 10), ("50 settl/min", 50)]:
+    lines.append(f"   Settlement rates simulated on payment channels (payment_channels.py)")
+    lines.append(f"   {'Network':>20} {'Rate':>12} {'Time to 500KB':>15} {'Time to 520KB':>15}")
+    lines.append("   " + "-" * 67)
+    for label, rate in measured_settlement_rates().items():
         t500 = time_to_gset_limit(rate, GSET_TRIGGER_BYTES)
         t520 = time_to_gset_limit(rate, ESP32_RAM_BYTES)
-        lines.append(f"   {label:>20} {t500/60:>12.1f} hrs {t520/60:>12.1f} hrs")
+        lines.append(f"   {label:>20} {rate:>7.1f}/min {t500/60:>12.1f} hrs {t520/60:>12.1f} hrs")
 
     # -- Overminting --
     lines.append("\n4. OVERMINTING BOUNDS")
@@ -670,16 +711,19 @@ def print_tables():
     table_text = "\n".join(lines)
     print(table_text)
 
-    os.makedirs("scripts/output", exist_ok=True)
-    with open("scripts/output/epoch_partition_table.txt", "w") as f:
+    path = output_path("epoch_partition_table.txt")
+    with open(path, "w") as f:
         f.write(table_text)
-    print("\n  Saved: scripts/output/epoch_partition_table.txt")
+    print(f"\n  Saved: {os.path.relpath(path)}")
 
 
 # --- MAIN --------------------------------------------------------------------
 
 if __name__ == "__main__":
+    args = parse_analysis_args(__doc__.splitlines()[1])
     print_tables()
-    print("\nGenerating plots...")
-    plot_all()
+    if args.plots:
+        print("\nGenerating plots...")
+        plot_all(rates=measured_settlement_rates())
+        print(f"  Saved: {os.path.relpath(output_path('epoch_partition_analysis.png'))}")
     print("\nDone.")
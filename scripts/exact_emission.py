@@ -0,0 +1,291 @@
+"""
+Mehr Network -- Exact Integer Emission and Supply Ceiling Engine
+
+Integer-only nodes mint `max(10^12 >> shift, supply // TAIL_DIVISOR)` uMHR
+per epoch in u64, where the tail floor (0.1% of circulating supply per
+year) is an integer division. The analyses approximate this two ways:
+float MHR (MHR_SCHEDULE) and int64 uMHR with a float tail floor
+(uMHR_SCHEDULE.reward). Neither checks the 2^64 uMHR ceiling, and int64
+overflows at half of it.
+
+The tail floor makes supply a sequential recursion,
+s[n+1] = s[n] + P × max(h[n], s[n] // D), so it cannot be written in closed
+form. This engine still evaluates it in NumPy uint64 blocks, exactly:
+
+  1. guess the rewards of a block of epochs from a float64 estimate
+  2. supply before each epoch = start + exclusive cumsum(rewards)
+  3. recompute rewards from that supply; repeat until nothing changes
+
+This is Jacobi iteration on a triangular system, so the fixed point is the
+exact sequential result. The blocks are sized so that the compounding
+within a block is small (B × P / D <= 1/64), which keeps it to a handful of
+sweeps. A wrap in the uint64 cumsum, or a supply above 2^64 - 1, marks the
+epoch that crosses the ceiling. That epoch, not a silently wrapped value, is
+reported.
+
+P is the number of partitions minting a full reward each epoch against the
+merged supply (partitions that re-merge every epoch: the compounding worst
+case of overminting). P partitions that stay apart for the whole horizon
+each follow the single-network path, so their merged supply is P times it.
+
+float_supply runs the same recursion in float64 MHR for comparison.
+"""
+
+import time
+
+import numpy as np
+
+from emission_schedule import (EPOCHS_PER_YEAR, HALVING_INTERVAL, INITIAL_EPOCH_REWARD,
+                               INITIAL_EPOCH_REWARD_uMHR, MAX_SHIFT, SUPPLY_CEILING_uMHR,
+                               TAIL_EMISSION_RATE)
+
+TAIL_DIVISOR = round(EPOCHS_PER_YEAR / TAIL_EMISSION_RATE)   # supply // D = tail floor
+UINT64_MAX = SUPPLY_CEILING_uMHR - 1
+INT64_LIMIT = 2**63                      # first supply an int64 array cannot hold
+MAX_BLOCK = 2**20                        # epochs per block (uint64: 8 MB per array)
+MIN_BLOCK = 256
+
+assert TAIL_DIVISOR * TAIL_EMISSION_RATE == EPOCHS_PER_YEAR
+
+
+# --- REWARDS ----------------------------------------------------------------
+
+def halved_rewards(epochs):
+    """10^12 >> min(epoch // HALVING_INTERVAL, MAX_SHIFT) as uint64 uMHR."""
+    shift = np.minimum(np.asarray(epochs, dtype=np.int64) // HALVING_INTERVAL, MAX_SHIFT)
+    return np.right_shift(np.uint64(INITIAL_EPOCH_REWARD_uMHR), shift.astype(np.uint64))
+
+
+def block_size(partitions):
+    """Epochs per block such that in-block compounding stays below 1/64."""
+    return int(np.clip(TAIL_DIVISOR // (64 * partitions), MIN_BLOCK, MAX_BLOCK))
+
+
+# --- EXACT ENGINE -----------------------------------------------------------
+
+def _exact_block(s0, halved, partitions):
+    """Supply after each epoch of one block, exactly, by Jacobi sweeps.
+
+    Returns (after, before, overflow, sweeps): supply after and before each
+    epoch as uint64, saturated at UINT64_MAX from the first epoch that
+    crosses the ceiling, whose index is overflow (None if none).
+    """
+    P = np.uint64(partitions)
+    headroom = np.uint64(UINT64_MAX - int(s0))
+    # Starting guess: the larger of the halving-only path and the float
+    # compounding path (floor truncation loses ~P/2 uMHR per epoch)
+    k = np.arange(len(halved))
+    linear = float(s0) + partitions * (np.cumsum(halved, dtype=np.float64) - halved)
+    compound = float(s0) * (1 + partitions / TAIL_DIVISOR) ** k - 0.5 * partitions * k
+    guess = np.minimum(np.maximum(linear, compound), 2.0**64 - 2**12).astype(np.uint64)
+    rewards = np.maximum(halved, guess // np.uint64(TAIL_DIVISOR)) * P
+    sweeps = 0
+    while True:
+        sweeps += 1
+        total = np.cumsum(rewards)
+        bad = (total > headroom) | (total < rewards)        # past 2^64 - 1, or wrapped
+        after = total + s0
+        overflow = int(np.argmax(bad)) if bad.any() else None
+        if overflow is not None:
+            after[overflow:] = UINT64_MAX
+        before = np.concatenate([[s0], after[:-1]])
+        new = np.maximum(halved, before // np.uint64(TAIL_DIVISOR)) * P
+        if np.array_equal(new, rewards):
+            return after, before, overflow, sweeps
+        rewards = new
+
+
+def exact_supply(n_epochs, partitions=1, start_epoch=0, start_supply=0,
+                 checkpoints=(), thresholds=()):
+    """Exact uMHR supply over n_epochs of the integer emission rule.
+
+    Args:
+        n_epochs: epochs to mint
+        partitions: P, full rewards minted per epoch against the merged supply
+        start_epoch, start_supply: where the run starts (supply in uMHR)
+        checkpoints: epoch counts n at which to report the supply
+        thresholds: supplies (uMHR) whose first crossing to report
+
+    Returns a dict with:
+        supply: {n: supply after n epochs, Python int, or None past overflow}
+        crossings: {threshold: smallest n with supply >= threshold, or None}
+        overflow: smallest n with supply >= 2^64 (uint64 overflow), or None
+        tail_from: first epoch offset where the tail floor exceeds the
+            halved reward, or None
+        float_floor: (count, first offset) of epochs where the analyses'
+            float tail floor int(s × rate / EPOCHS_PER_YEAR) gives a different
+            reward than s // TAIL_DIVISOR
+        sweeps: Jacobi sweeps over all blocks
+    """
+    checkpoints = sorted(set(int(n) for n in checkpoints) | {n_epochs})
+    thresholds = [int(t) for t in thresholds]
+    out = {"supply": {}, "crossings": dict.fromkeys(thresholds), "overflow": None,
+           "tail_from": None, "float_floor": (0, None), "sweeps": 0}
+    if 0 in checkpoints:
+        out["supply"][0] = int(start_supply)
+    for t in thresholds:
+        if start_supply >= t:
+            out["crossings"][t] = 0
+    s0 = np.uint64(start_supply)
+    size = block_size(partitions)
+    offset = 0
+    while offset < n_epochs:
+        length = min(size, n_epochs - offset)
+        epochs = start_epoch + offset + np.arange(length)
+        halved = halved_rewards(epochs)
+        after, before, overflow, sweeps = _exact_block(s0, halved, partitions)
+        out["sweeps"] += sweeps
+        valid = length if overflow is None else overflow
+        floor = before[:valid] // np.uint64(TAIL_DIVISOR)
+        binds = np.flatnonzero(floor > halved[:valid])
+        if out["tail_from"] is None and binds.size:
+            out["tail_from"] = offset + int(binds[0])
+        approx = (before[:valid].astype(np.float64) * TAIL_EMISSION_RATE
+                  / EPOCHS_PER_YEAR).astype(np.uint64)
+        differs = np.flatnonzero(np.maximum(halved[:valid], approx)
+                                 != np.maximum(halved[:valid], floor))
+        count, first = out["float_floor"]
+        out["float_floor"] = (count + differs.size,
+                              first if first is not None or not differs.size
+                              else offset + int(differs[0]))
+        for t in thresholds:
+            if out["crossings"][t] is None and valid and after[valid - 1] >= t:
+                out["crossings"][t] = offset + int(np.searchsorted(after, np.uint64(t))) + 1
+        for n in checkpoints:
+            if offset < n <= offset + valid:
+                out["supply"][n] = int(after[n - offset - 1])
+        if overflow is not None:
+            out["overflow"] = offset + overflow + 1
+            for t in thresholds:                        # the supply is now >= 2^64
+                if out["crossings"][t] is None:
+                    out["crossings"][t] = out["overflow"]
+            break
+        s0 = after[-1]
+        offset += length
+    for n in checkpoints:
+        out["supply"].setdefault(n, None)
+    return out
+
+
+def supply_walk(n_epochs, partitions=1, start_epoch=0, start_supply=0):
+    """Reference: the same rule one epoch at a time in Python ints."""
+    supply = start_supply
+    for epoch in range(start_epoch, start_epoch + n_epochs):
+        halved = INITIAL_EPOCH_REWARD_uMHR >> min(epoch // HALVING_INTERVAL, MAX_SHIFT)
+        supply += partitions * max(halved, supply // TAIL_DIVISOR)
+    return supply
+
+
+# --- FLOAT MODEL ------------------------------------------------------------
+
+def float_supply(n_epochs, partitions=1, checkpoints=(), max_sweeps=64):
+    """The same recursion in float64 MHR, as the float analyses compute it:
+    reward = max(10^6 / 2^shift, supply × rate / EPOCHS_PER_YEAR).
+
+    Returns {n: supply in MHR after n epochs} for checkpoints and n_epochs.
+    """
+    checkpoints = sorted(set(int(n) for n in checkpoints) | {n_epochs})
+    out = {0: 0.0} if 0 in checkpoints else {}
+    s0, size, offset = 0.0, block_size(partitions), 0
+    while offset < n_epochs:
+        length = min(size, n_epochs - offset)
+        shift = np.minimum((offset + np.arange(length)) // HALVING_INTERVAL, MAX_SHIFT)
+        halved = INITIAL_EPOCH_REWARD / 2.0 ** shift
+        rewards = halved * partitions
+        for _ in range(max_sweeps):
+            after = s0 + np.cumsum(rewards)
+            before = np.concatenate([[s0], after[:-1]])
+            new = np.maximum(halved, before * TAIL_EMISSION_RATE / EPOCHS_PER_YEAR) * partitions
+            if np.array_equal(new, rewards):
+                break
+            rewards = new
+        for n in checkpoints:
+            if offset < n <= offset + length:
+                out[n] = float(after[n - offset - 1])
+        s0 = float(after[-1])
+        offset += length
+    return out
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _epochs_label(n):
+    return "not reached" if n is None else f"{n:,} ({n / EPOCHS_PER_YEAR:,.0f} y)"
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- EXACT INTEGER EMISSION AND SUPPLY CEILING")
+    print("=" * 70)
+    ok = True
+
+    # Exactness against the Python-int walk, including the overflow epoch
+    print(f"\n  uint64 block engine vs Python-int walk:")
+    for P, n in [(1, 1_000_000), (100, 300_000), (1_000, 20_000)]:
+        res = exact_supply(n, P, checkpoints=[n // 3])
+        walk = supply_walk(n // 3, P)
+        match = res["supply"][n // 3] == walk
+        if res["overflow"] is not None:
+            k = res["overflow"]
+            match &= supply_walk(k - 1, P) <= UINT64_MAX < supply_walk(k, P)
+        ok &= match
+        print(f"    P={P:>5,}  {n // 3:>9,} epochs  supply {walk:>26,}  "
+              f"overflow {_epochs_label(res['overflow']):>20s}  match: {match}")
+
+    # Multi-century horizons with compounding overminting
+    horizon = 20_000_000
+    marks = [1_000_000, 10_000_000, horizon]
+    print(f"\n  {horizon:,} epochs (~{horizon / EPOCHS_PER_YEAR:,.0f} years); "
+          f"P partitions re-merging every epoch:")
+    print(f"  {'P':>6s}  {'tail binds at':>18s}  {'int64 overflow':>20s}  "
+          f"{'2^64 ceiling':>20s}  {'% of 2^64 at end':>16s}  {'sweeps':>7s}  {'time':>6s}")
+    print(f"  {'-'*6}  {'-'*18}  {'-'*20}  {'-'*20}  {'-'*16}  {'-'*7}  {'-'*6}")
+    runs = {}
+    for P in (1, 2, 10, 100, 1_000):
+        t0 = time.perf_counter()
+        res = runs[P] = exact_supply(horizon, P, checkpoints=marks,
+                                     thresholds=[2**53, INT64_LIMIT] + [
+                                         SUPPLY_CEILING_uMHR // q for q in (10, 100, 1_000)])
+        elapsed = time.perf_counter() - t0
+        end = res["supply"][horizon]
+        share = "overflowed" if end is None else f"{end / SUPPLY_CEILING_uMHR:.3%}"
+        print(f"  {P:>6,}  {_epochs_label(res['tail_from']):>18s}  "
+              f"{_epochs_label(res['crossings'][INT64_LIMIT]):>20s}  "
+              f"{_epochs_label(res['overflow']):>20s}  {share:>16s}  "
+              f"{res['sweeps']:>7,}  {elapsed:>5.2f}s")
+
+    # Partitions that never re-merge: merged supply = P × single-network supply
+    single = runs[1]
+    end = single["supply"][horizon]
+    beyond = np.log(SUPPLY_CEILING_uMHR / end) / np.log1p(1 / TAIL_DIVISOR)
+    print(f"  P=1 extrapolated at the tail rate: 2^64 after ~{horizon + beyond:,.0f} epochs "
+          f"(~{(horizon + beyond) / EPOCHS_PER_YEAR:,.0f} y) -- bounded only by burn and lost keys")
+    print(f"\n  P partitions apart for the whole horizon (merged = P × single network):")
+    for q in (10, 100, 1_000):
+        print(f"    P={q:>5,}: reaches 2^64 after {_epochs_label(single['crossings'][SUPPLY_CEILING_uMHR // q])}")
+
+    # Where float and integer results diverge
+    print(f"\n  Float vs exact integer (P=1):")
+    floats = float_supply(horizon, 1, checkpoints=marks)
+    for n in marks:
+        exact = single["supply"][n]
+        approx = floats[n] * 10**6
+        print(f"    after {n:>10,} epochs: exact {exact:>26,} uMHR, float MHR x 10^6 "
+              f"differs by {approx - exact:>+14,.0f} ({(approx - exact) / exact:+.2e})")
+    first_trunc = HALVING_INTERVAL * next(
+        shift for shift in range(MAX_SHIFT + 1)
+        if (INITIAL_EPOCH_REWARD_uMHR >> shift) << shift != INITIAL_EPOCH_REWARD_uMHR)
+    print(f"    10^12 >> shift first truncates at epoch {first_trunc:,} "
+          f"(10^12 = 2^12 x 5^12); float MHR halves exactly")
+    count, first = single["float_floor"]
+    print(f"    float tail floor (uMHR_SCHEDULE.reward) differs from supply // {TAIL_DIVISOR:,} "
+          f"at {count:,} epochs; first at {_epochs_label(first)}")
+    print(f"    supply exceeds 2^53 (float64 loses whole uMHR) after "
+          f"{_epochs_label(single['crossings'][2**53])}")
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Mehr Network -- Array-Backed GCounter Ledger Engine
+
+Whole-ledger version of the epoch_balance + delta-GCounter design that
+simulate_old_rebase / simulate_new_rebase in epoch_partition_analysis.py
+model for a single account (epoch-compaction.md, GCounter Rebase).
+
+Storage:
+  - epoch_balance: dense int64 array indexed by account
+  - delta_earned / delta_spent: GCounters holding one entry per
+    (account, processing node), stored sparse as sorted uint64 keys
+    (account << NODE_BITS | node) with int64 uMHR values
+Each processing node only increments its own entries, so two replicas
+merge by pointwise max of matching keys; keys present on one side only
+are copied. Merges and increments are sorted-key joins (searchsorted +
+insert), O(entries), with no per-account Python work.
+
+Run this file directly to reproduce the scalar rebase results for every
+account of a ledger and to measure merge throughput and memory at
+10^6 - 10^7 accounts.
+"""
+
+import time
+import numpy as np
+
+from epoch_partition_analysis import simulate_new_rebase, simulate_old_rebase
+
+NODE_BITS = 24                        # up to 16.7M processing nodes per key
+_NODE_MASK = np.uint64((1 << NODE_BITS) - 1)
+
+
+# --- GCOUNTER ---------------------------------------------------------------
+
+def _keys(accounts, nodes):
+    return (np.asarray(accounts, dtype=np.uint64) << np.uint64(NODE_BITS)) \
+        | np.asarray(nodes, dtype=np.uint64)
+
+
+def _combine(keys_a, vals_a, keys_b, vals_b, op):
+    """Join two sorted sparse maps; matching keys are combined with op."""
+    if not len(keys_a):
+        return keys_b.copy(), vals_b.copy()
+    idx = np.searchsorted(keys_a, keys_b)
+    match = keys_a[np.minimum(idx, len(keys_a) - 1)] == keys_b
+    vals = vals_a.copy()
+    vals[idx[match]] = op(vals[idx[match]], vals_b[match])
+    new = ~match
+    return (np.insert(keys_a, idx[new], keys_b[new]),
+            np.insert(vals, idx[new], vals_b[new]))
+
+
+class GCounter:
+    """Per-(account, node) grow-only counters as sorted sparse entries."""
+
+    def __init__(self, keys=None, values=None):
+        self.keys = np.empty(0, dtype=np.uint64) if keys is None else keys
+        self.values = np.empty(0, dtype=np.int64) if values is None else values
+
+    @staticmethod
+    def _batch(accounts, nodes, amounts):
+        """Sorted unique keys with repeated (account, node) amounts summed."""
+        keys = _keys(accounts, nodes)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        amounts = np.asarray(amounts, dtype=np.int64)[order]
+        first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        return keys[first], np.add.reduceat(amounts, first)
+
+    def increment(self, accounts, nodes, amounts):
+        """Node-local increments: add amounts to each (account, node) entry."""
+        if len(amounts):
+            keys, values = self._batch(accounts, nodes, amounts)
+            self.keys, self.values = _combine(self.keys, self.values, keys, values, np.add)
+
+    def merge(self, other):
+        """CRDT merge: pointwise max of matching entries. Returns a new GCounter."""
+        return GCounter(*_combine(self.keys, self.values, other.keys, other.values,
+                                  np.maximum))
+
+    def totals(self, n_accounts):
+        """Per-account sum over all nodes' entries (int64, exact)."""
+        out = np.zeros(n_accounts, dtype=np.int64)
+        if len(self.keys):
+            account = (self.keys >> np.uint64(NODE_BITS)).astype(np.int64)
+            first = np.flatnonzero(np.concatenate(([True], account[1:] != account[:-1])))
+            out[account[first]] = np.add.reduceat(self.values, first)
+        return out
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+
+# --- LEDGER -----------------------------------------------------------------
+
+class Ledger:
+    """One replica's account state: epoch_balance + delta GCounters.
+
+    Args:
+        epoch_balance: int64 balances frozen at the last epoch (per account)
+        epoch: epoch number of that snapshot
+    """
+
+    def __init__(self, epoch_balance, epoch=0):
+        self.epoch_balance = np.asarray(epoch_balance, dtype=np.int64).copy()
+        self.epoch = epoch
+        self.delta_earned = GCounter()
+        self.delta_spent = GCounter()
+
+    @property
+    def n_accounts(self):
+        return len(self.epoch_balance)
+
+    def settle(self, accounts, nodes, earned, spent):
+        """Apply a batch of settlements, each recorded by its processing node."""
+        self.delta_earned.increment(accounts, nodes, earned)
+        self.delta_spent.increment(accounts, nodes, spent)
+
+    def balances(self):
+        return (self.epoch_balance + self.delta_earned.totals(self.n_accounts)
+                - self.delta_spent.totals(self.n_accounts))
+
+    def rebase(self):
+        """Epoch boundary: fold deltas into epoch_balance and clear them."""
+        self.epoch_balance = self.balances()
+        self.delta_earned = GCounter()
+        self.delta_spent = GCounter()
+        self.epoch += 1
+
+    def merge(self, other):
+        """Merge two replicas of the same epoch (NEW design).
+
+        Per account the higher epoch_balance wins. The losing side's
+        post-rebase settlements come back as settlement proofs; because
+        each partition's processing nodes write disjoint GCounter entries,
+        that is exactly the pointwise-max merge of the delta GCounters.
+        """
+        if self.epoch != other.epoch:
+            raise ValueError("ledgers are at different epochs")
+        merged = Ledger(np.maximum(self.epoch_balance, other.epoch_balance), self.epoch)
+        merged.delta_earned = self.delta_earned.merge(other.delta_earned)
+        merged.delta_spent = self.delta_spent.merge(other.delta_spent)
+        return merged
+
+    @property
+    def nbytes(self):
+        return self.epoch_balance.nbytes + self.delta_earned.nbytes + self.delta_spent.nbytes
+
+
+def merge_single_value(ledger_a, ledger_b):
+    """OLD design merge: each side rebased to earned = balance, spent = 0,
+    then pointwise max of the aggregate earned / spent values."""
+    n = ledger_a.n_accounts
+    earned = np.maximum(ledger_a.epoch_balance + ledger_a.delta_earned.totals(n),
+                        ledger_b.epoch_balance + ledger_b.delta_earned.totals(n))
+    spent = np.maximum(ledger_a.delta_spent.totals(n), ledger_b.delta_spent.totals(n))
+    return earned - spent
+
+
+def true_balances(ledger_a, ledger_b):
+    """Higher base plus every post-rebase settlement from both sides."""
+    n = ledger_a.n_accounts
+    return (np.maximum(ledger_a.epoch_balance, ledger_b.epoch_balance)
+            + ledger_a.delta_earned.totals(n) + ledger_b.delta_earned.totals(n)
+            - ledger_a.delta_spent.totals(n) - ledger_b.delta_spent.totals(n))
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _random_partitions(n_accounts, settlements_per_side, rng, nodes_per_side=1_000):
+    """Two rebased partitions of one ledger with disjoint processing nodes."""
+    base = rng.integers(0, 10**9, n_accounts)
+    sides = []
+    for side in range(2):
+        ledger = Ledger(base)
+        # Pre-rebase settlements differ per side, then each side rebases
+        m = settlements_per_side
+        accounts = rng.integers(0, n_accounts, m)
+        ledger.settle(accounts, side * nodes_per_side + rng.integers(0, nodes_per_side, m),
+                      rng.integers(0, 10**6, m), rng.integers(0, 10**5, m))
+        ledger.rebase()
+        accounts = rng.integers(0, n_accounts, m)
+        ledger.settle(accounts, side * nodes_per_side + rng.integers(0, nodes_per_side, m),
+                      rng.integers(0, 10**6, m), rng.integers(0, 10**5, m))
+        sides.append(ledger)
+    return sides
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- ARRAY GCOUNTER LEDGER: REBASE + MERGE")
+    print("=" * 70)
+
+    # Reproduce the scalar model for every (balance_A, balance_B) account
+    grid = np.array([100_000, 200_000, 500_000, 1_000_000, 750_000, 123_456])
+    bal_A, bal_B = (g.ravel() for g in np.meshgrid(grid, grid, indexing="ij"))
+    n = len(bal_A)
+    accounts = np.arange(n)
+    a, b = Ledger(bal_A), Ledger(bal_B)
+    a.settle(accounts, np.zeros(n), np.full(n, 50_000), np.full(n, 20_000))
+    b.settle(accounts, np.ones(n), np.full(n, 30_000), np.full(n, 10_000))
+    new = a.merge(b).balances()
+    old = merge_single_value(a, b)
+    s_a = [{"earned": 50_000, "spent": 20_000}]
+    s_b = [{"earned": 30_000, "spent": 10_000}]
+    mismatches = sum(
+        new[i] != simulate_new_rebase(int(bal_A[i]), s_a, int(bal_B[i]), s_b)["merged_balance"]
+        or old[i] != simulate_old_rebase(int(bal_A[i]), s_a, int(bal_B[i]), s_b)["merged_balance"]
+        for i in range(n))
+    print(f"\n  {n} accounts vs scalar simulate_old/new_rebase: {mismatches} mismatches")
+
+    print(f"\n  {'Accounts':>12s}  {'Entries':>12s}  {'Merge':>8s}  {'Accounts/s':>12s}  "
+          f"{'B/account':>10s}  {'NEW errors':>10s}  {'OLD errors':>10s}")
+    print(f"  {'-'*12}  {'-'*12}  {'-'*8}  {'-'*12}  {'-'*10}  {'-'*10}  {'-'*10}")
+    rng = np.random.default_rng(0)
+    for n_accounts in [1_000_000, 10_000_000]:
+        a, b = _random_partitions(n_accounts, n_accounts, rng)
+        t0 = time.perf_counter()
+        merged = a.merge(b)
+        balances = merged.balances()
+        elapsed = time.perf_counter() - t0
+        truth = true_balances(a, b)
+        new_errors = int((balances != truth).sum())
+        old_errors = int((merge_single_value(a, b) != truth).sum())
+        entries = len(merged.delta_earned.keys) + len(merged.delta_spent.keys)
+        print(f"  {n_accounts:>12,d}  {entries:>12,d}  {elapsed:>7.2f}s  "
+              f"{n_accounts / elapsed:>12,.0f}  {merged.nbytes / n_accounts:>10.1f}  "
+              f"{new_errors:>10,d}  {old_errors:>10,d}")
+        mismatches += new_errors
+        del a, b, merged
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,33 +17,23 @@ All constants are drawn directly from the Mehr protocol specification.
 import math
 import os
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from emission_schedule import (HALVING_INTERVAL, REFERENCE_SIZE,
+                               cumulative_supply_at, scaled_emission)
+from output_paths import output_dir as get_output_dir, output_path, parse_analysis_args, pyplot
+from partition_engine import simulate_partition_segments
+from result_cache import cached, cached_figure
 
 # --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
 
-INITIAL_EPOCH_REWARD = 10**6       # MHR per epoch (bootstrap, = 10^12 μMHR)
-HALVING_INTERVAL = 100_000         # epochs per halving period
 BURN_RATE = 0.02                   # 2% service burn
 MINTING_CAP = 0.5                  # minting ≤ 50% of net income
-REFERENCE_SIZE = 100               # active-set scaling denominator
 SUPPLY_CEILING_uMHR = 2**64        # theoretical μMHR ceiling
 
 
-def epoch_reward(epoch_number):
-    """Exact emission formula from mhr-token.md (in MHR, not μMHR)."""
-    shift = min(epoch_number // HALVING_INTERVAL, 63)
-    return INITIAL_EPOCH_REWARD / (2 ** shift)
-
-
-def scaled_emission(N, epoch_number):
-    """Scaled emission for an N-node partition."""
-    return (min(N, REFERENCE_SIZE) / REFERENCE_SIZE) * epoch_reward(epoch_number)
-
-
 # --- SUPPLY DYNAMICS MODEL --------------------------------------------------
 
+@cached
 def simulate_partition(N, M_0, epochs, strategy="optimal", start_epoch=100_000):
     """Simulate supply dynamics in an isolated N-node partition.
 
@@ -54,29 +44,13 @@ def simulate_partition(N, M_0, epochs, strategy="optimal", start_epoch=100_000):
         strategy: "full_velocity" or "optimal" (minimum spending)
         start_epoch: starting epoch number (affects emission schedule)
 
+    Solved per halving segment by partition_engine (bit-for-bit identical
+    to stepping the recurrence one epoch at a time).
+
     Returns:
-        supply_history: list of supply values per epoch
+        supply_history: array of supply values per epoch
     """
-    S = M_0
-    history = [S]
-    for k in range(epochs):
-        E_s = scaled_emission(N, start_epoch + k)
-        # Minimum spend to saturate minting cap: 0.5 * 0.98 * A = E_s → A = E_s / 0.49
-        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
-
-        if strategy == "full_velocity":
-            A = S
-        else:  # optimal: minimize spending to maximize supply growth
-            if S < min_spend:
-                A = S  # must spend everything (not enough for minimum)
-            else:
-                A = min_spend
-
-        burns = BURN_RATE * A
-        income = (1 - BURN_RATE) * A
-        minting = min(E_s, MINTING_CAP * income)
-        S = S - burns + minting
-        history.append(S)
+    history, _ = simulate_partition_segments(N, M_0, epochs, strategy, start_epoch)
     return history
 
 
@@ -95,24 +69,54 @@ def cumulative_excess(N, start_epoch=100_000, num_halvings=20):
     return total
 
 
-def cumulative_supply_at(epoch):
-    """Approximate total circulating supply at given epoch."""
-    supply = 0.0
-    current = 0
-    while current < epoch:
-        reward = epoch_reward(current)
-        next_halving = ((current // HALVING_INTERVAL) + 1) * HALVING_INTERVAL
-        epochs_at_rate = min(next_halving, epoch) - current
-        supply += reward * epochs_at_rate
-        current += epochs_at_rate
-    return supply
+# --- PLOTTING ---------------------------------------------------------------
+
+@cached_figure("isolated_partition_analysis.png")
+def plot_all(N=3, M_0=100.0, epochs=1000, start_epoch=100_000):
+    """Two-panel figure: both strategies for an N-node partition, and the
+    optimal strategy across partition sizes."""
+    E_s = scaled_emission(N, start_epoch)
+    full_vel = simulate_partition(N, M_0, epochs, "full_velocity", start_epoch)
+    optimal = simulate_partition(N, M_0, epochs, "optimal", start_epoch)
+    plt = pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Left: strategy comparison
+    ax = axes[0]
+    x = range(len(full_vel))
+    ax.plot(x, full_vel, label="Full velocity (spends all)", color="#2196F3", linewidth=1.5)
+    ax.plot(x, optimal, label="Optimal (minimum spending)", color="#F44336", linewidth=1.5)
+    ax.axhline(y=E_s / BURN_RATE, color="#4CAF50", linestyle="--", linewidth=1,
+               label=f"Claimed equilibrium ({E_s/BURN_RATE:,.0f})")
+    ax.set_xlabel("Epoch")
+    ax.set_ylabel("Supply (MHR)")
+    ax.set_title(f"Isolated Partition Supply ({N}-node, post-bootstrap)")
+    ax.legend(fontsize=9)
+    ax.grid(True, alpha=0.3)
+    ax.ticklabel_format(style="plain")
+
+    # Right: partition size comparison
+    ax = axes[1]
+    for n, color in [(3, "#F44336"), (5, "#FF9800"), (10, "#4CAF50"),
+                     (50, "#2196F3"), (100, "#9C27B0")]:
+        hist = simulate_partition(n, M_0, epochs, "optimal", start_epoch)
+        ax.plot(range(len(hist)), hist, label=f"N={n}", color=color, linewidth=1.5)
+    ax.set_xlabel("Epoch")
+    ax.set_ylabel("Supply (MHR)")
+    ax.set_title("Optimal Attacker: Supply vs Partition Size")
+    ax.legend(fontsize=9)
+    ax.grid(True, alpha=0.3)
+    ax.ticklabel_format(style="plain")
+
+    plt.tight_layout()
+    fig.savefig(output_path("isolated_partition_analysis.png"), dpi=150)
+    plt.close(fig)
 
 
 # --- MAIN ANALYSIS ----------------------------------------------------------
 
-def main():
-    output_dir = os.path.join(os.path.dirname(__file__), "output")
-    os.makedirs(output_dir, exist_ok=True)
+def main(plots=True):
+    output_dir = get_output_dir()
 
     print("=" * 70)
     print("MEHR NETWORK -- ISOLATED PARTITION SUPPLY DYNAMICS")
@@ -195,39 +199,8 @@ def main():
         print(f"   {n:>5d}  {e_s:>12,.1f}  {annual:>16,.0f}  {annual_pct:>10.3f}"
               f"  {lifetime_pct:>12.1f}  ${cost:>9,d}")
 
-    # --- Plot ---
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-    # Left: strategy comparison
-    ax = axes[0]
-    x = range(len(full_vel))
-    ax.plot(x, full_vel, label="Full velocity (spends all)", color="#2196F3", linewidth=1.5)
-    ax.plot(x, optimal, label="Optimal (minimum spending)", color="#F44336", linewidth=1.5)
-    ax.axhline(y=E_s / BURN_RATE, color="#4CAF50", linestyle="--", linewidth=1,
-               label=f"Claimed equilibrium ({E_s/BURN_RATE:,.0f})")
-    ax.set_xlabel("Epoch")
-    ax.set_ylabel("Supply (MHR)")
-    ax.set_title(f"Isolated Partition Supply ({N}-node, post-bootstrap)")
-    ax.legend(fontsize=9)
-    ax.grid(True, alpha=0.3)
-    ax.ticklabel_format(style="plain")
-
-    # Right: partition size comparison
-    ax = axes[1]
-    for n, color in [(3, "#F44336"), (5, "#FF9800"), (10, "#4CAF50"),
-                     (50, "#2196F3"), (100, "#9C27B0")]:
-        hist = simulate_partition(n, M_0, 1000, "optimal", start_epoch)
-        ax.plot(range(len(hist)), hist, label=f"N={n}", color=color, linewidth=1.5)
-    ax.set_xlabel("Epoch")
-    ax.set_ylabel("Supply (MHR)")
-    ax.set_title("Optimal Attacker: Supply vs Partition Size")
-    ax.legend(fontsize=9)
-    ax.grid(True, alpha=0.3)
-    ax.ticklabel_format(style="plain")
-
-    plt.tight_layout()
-    fig.savefig(os.path.join(output_dir, "isolated_partition_analysis.png"), dpi=150)
-    plt.close(fig)
+    if plots:
+        plot_all(N, M_0, epochs, start_epoch)
 
     # --- Summary ---
     print(f"\n{'='*70}")
@@ -310,8 +283,8 @@ def main():
             f.write(f"  {n:>5d}  {e_s:>12,.1f}  {annual_pct:>15.1f}%"
                     f"  {lt_pct:>9.1f}%  ${cost:>9,d}\n")
 
-    print(f"\nOutput saved to {output_dir}/")
+    print(f"\nOutput saved to {os.path.relpath(output_dir)}/")
 
 
 if __name__ == "__main__":
-    main()
+    main(plots=parse_analysis_args(__doc__.splitlines()[1]).plots)
@@ -29,68 +29,30 @@ All constants from the Mehr protocol specification.
 import math
 import os
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from emission_schedule import (EPOCHS_PER_YEAR, cumulative_supply_at,
+                               epoch_reward, scaled_emission)
+from output_paths import output_dir as get_output_dir, output_path, parse_analysis_args, pyplot
+from partition_engine import simulate_partition_segments
+from result_cache import cached, cached_figure
 
 # ── PROTOCOL CONSTANTS (from spec) ──────────────────────────────────────────
 
-INITIAL_EPOCH_REWARD = 10**6       # MHR per epoch (= 10^12 μMHR)
-HALVING_INTERVAL     = 100_000     # epochs per halving period
 BURN_RATE            = 0.02        # 2% service burn
 MINTING_CAP          = 0.5         # minting ≤ 50% of net income
-REFERENCE_SIZE       = 100         # active-set scaling denominator
-EPOCHS_PER_YEAR      = 52_600      # ~1 epoch per 10 minutes
-
-
-def epoch_reward(epoch_number):
-    """Emission at a given epoch (MHR)."""
-    shift = min(epoch_number // HALVING_INTERVAL, 63)
-    return INITIAL_EPOCH_REWARD / (2 ** shift)
-
-
-def scaled_emission(N, epoch_number):
-    """Emission scaled by partition's active set size."""
-    return (min(N, REFERENCE_SIZE) / REFERENCE_SIZE) * epoch_reward(epoch_number)
-
-
-def cumulative_supply_at(epoch):
-    """Approximate total circulating supply at a given epoch."""
-    supply, current = 0.0, 0
-    while current < epoch:
-        reward = epoch_reward(current)
-        next_halving = ((current // HALVING_INTERVAL) + 1) * HALVING_INTERVAL
-        epochs_at_rate = min(next_halving, epoch) - current
-        supply += reward * epochs_at_rate
-        current += epochs_at_rate
-    return supply
 
 
 # ── SUPPLY DYNAMICS (from isolated_partition_analysis.py) ────────────────────
 
+@cached
 def simulate_partition(N, M_0, epochs, start_epoch=100_000):
     """Simulate optimal-attacker supply growth in an isolated N-node partition.
+
+    Phase 1: spend everything, exponential growth (1.47x/epoch).
+    Phase 2: spend minimum, linear growth (~0.96 × E_s/epoch).
+    Solved per halving segment by partition_engine.
     Returns (supply_history, phase1_end_epoch)."""
-    S = M_0
-    history = [S]
-    phase1_end = None
-    for k in range(epochs):
-        E_s = scaled_emission(N, start_epoch + k)
-        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))  # ~2.04 × E_s
-        if S < min_spend:
-            # Phase 1: spend everything, exponential growth (1.47x/epoch)
-            A = S
-        else:
-            # Phase 2: spend minimum, linear growth (~0.96 × E_s/epoch)
-            A = min_spend
-            if phase1_end is None:
-                phase1_end = k
-        burns = BURN_RATE * A
-        income = (1 - BURN_RATE) * A
-        minting = min(E_s, MINTING_CAP * income)
-        S = S - burns + minting
-        history.append(S)
-    return history, phase1_end
+    return simulate_partition_segments(N, M_0, epochs, "optimal", start_epoch)
 
 
 # ── LOCALHOST COST MODEL ────────────────────────────────────────────────────
@@ -121,11 +83,71 @@ LOCALHOST_COSTS = {
 EXISTING_CLAIM_PER_NODE_MONTHLY = 5  # $5/month per node
 
 
+# ── PLOTTING ────────────────────────────────────────────────────────────────
+
+@cached_figure("localhost_partition_analysis.png")
+def plot_all(N=100, M_0=1.0, years=5, start_epoch=100_000):
+    """Two-panel figure: the N-node localhost attack timeline from M_0,
+    and attack cost vs annual dilution by node count."""
+    epochs_to_sim = years * EPOCHS_PER_YEAR
+    history, _ = simulate_partition(N, M_0, epochs_to_sim, start_epoch)
+    E_s = scaled_emission(N, start_epoch)
+    supply_at_start = cumulative_supply_at(start_epoch)
+    plt = pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Left: localhost attack timeline
+    ax = axes[0]
+    epochs_plot = min(EPOCHS_PER_YEAR * 3, epochs_to_sim)  # 3 years
+    x = np.arange(epochs_plot + 1) / EPOCHS_PER_YEAR  # in years
+    ax.plot(x, [history[i] for i in range(epochs_plot + 1)],
+            color="#F44336", linewidth=2, label=f"Attacker supply ({N} virtual nodes)")
+    ax.axhline(y=E_s / BURN_RATE, color="#4CAF50", linestyle="--", linewidth=1,
+               label=f"Full-velocity equilibrium ({E_s/BURN_RATE:,.0f})")
+    ax.set_xlabel("Years since attack start")
+    ax.set_ylabel("Attacker MHR supply")
+    ax.set_title(f"Localhost {N}-Node Attack ({M_0:g} MHR initial, $60/yr)")
+    ax.legend(fontsize=9)
+    ax.grid(True, alpha=0.3)
+    ax.ticklabel_format(style="plain", axis="y")
+
+    # Right: cost comparison — old vs real
+    ax = axes[1]
+    nodes = [3, 10, 20, 50, 100, 200]
+    old_costs = [n * 60 for n in nodes]
+    real_costs = [60] * len(nodes)
+    annual_dilutions = [scaled_emission(n, start_epoch) * EPOCHS_PER_YEAR
+                        / supply_at_start * 100 for n in nodes]
+
+    ax2 = ax.twinx()
+    w = 0.35
+    x_pos = np.arange(len(nodes))
+    bars1 = ax.bar(x_pos - w/2, old_costs, w, color="#2196F3", alpha=0.7,
+                   label="Old claim (N × $60/yr)")
+    bars2 = ax.bar(x_pos + w/2, real_costs, w, color="#F44336", alpha=0.7,
+                   label="Real cost ($60/yr flat)")
+    ax2.plot(x_pos, annual_dilutions, "o-", color="#4CAF50", linewidth=2,
+             label="Annual dilution %", markersize=6)
+
+    ax.set_xlabel("Number of virtual nodes")
+    ax.set_ylabel("Annual cost ($)")
+    ax2.set_ylabel("Annual dilution (%)")
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels([str(n) for n in nodes])
+    ax.set_title("Attack Cost: Old Claim vs Reality")
+    ax.legend(loc="upper left", fontsize=9)
+    ax2.legend(loc="upper right", fontsize=9)
+    ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    fig.savefig(output_path("localhost_partition_analysis.png"), dpi=150)
+    plt.close(fig)
+
+
 # ── MAIN ANALYSIS ───────────────────────────────────────────────────────────
 
-def main():
-    output_dir = os.path.join(os.path.dirname(__file__), "output")
-    os.makedirs(output_dir, exist_ok=True)
+def main(plots=True):
+    output_dir = get_output_dir()
 
     START_EPOCH = 100_000  # post-bootstrap (first halving)
     supply_at_start = cumulative_supply_at(START_EPOCH)
@@ -344,54 +366,8 @@ def main():
 """)
 
     # ── Plot ────────────────────────────────────────────────────────────────
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-    # Left: localhost attack timeline
-    ax = axes[0]
-    epochs_plot = min(EPOCHS_PER_YEAR * 3, epochs_to_sim)  # 3 years
-    x = np.arange(epochs_plot + 1) / EPOCHS_PER_YEAR  # in years
-    ax.plot(x, [history[i] for i in range(epochs_plot + 1)],
-            color="#F44336", linewidth=2, label="Attacker supply (100 virtual nodes)")
-    ax.axhline(y=E_s / BURN_RATE, color="#4CAF50", linestyle="--", linewidth=1,
-               label=f"Full-velocity equilibrium ({E_s/BURN_RATE:,.0f})")
-    ax.set_xlabel("Years since attack start")
-    ax.set_ylabel("Attacker MHR supply")
-    ax.set_title("Localhost 100-Node Attack (1 MHR initial, $60/yr)")
-    ax.legend(fontsize=9)
-    ax.grid(True, alpha=0.3)
-    ax.ticklabel_format(style="plain", axis="y")
-
-    # Right: cost comparison — old vs real
-    ax = axes[1]
-    nodes = [3, 10, 20, 50, 100, 200]
-    old_costs = [n * 60 for n in nodes]
-    real_costs = [60] * len(nodes)
-    annual_dilutions = [scaled_emission(n, START_EPOCH) * EPOCHS_PER_YEAR
-                        / supply_at_start * 100 for n in nodes]
-
-    ax2 = ax.twinx()
-    w = 0.35
-    x_pos = np.arange(len(nodes))
-    bars1 = ax.bar(x_pos - w/2, old_costs, w, color="#2196F3", alpha=0.7,
-                   label="Old claim (N × $60/yr)")
-    bars2 = ax.bar(x_pos + w/2, real_costs, w, color="#F44336", alpha=0.7,
-                   label="Real cost ($60/yr flat)")
-    ax2.plot(x_pos, annual_dilutions, "o-", color="#4CAF50", linewidth=2,
-             label="Annual dilution %", markersize=6)
-
-    ax.set_xlabel("Number of virtual nodes")
-    ax.set_ylabel("Annual cost ($)")
-    ax2.set_ylabel("Annual dilution (%)")
-    ax.set_xticks(x_pos)
-    ax.set_xticklabels([str(n) for n in nodes])
-    ax.set_title("Attack Cost: Old Claim vs Reality")
-    ax.legend(loc="upper left", fontsize=9)
-    ax2.legend(loc="upper right", fontsize=9)
-    ax.grid(True, alpha=0.3)
-
-    plt.tight_layout()
-    fig.savefig(os.path.join(output_dir, "localhost_partition_analysis.png"), dpi=150)
-    plt.close(fig)
+    if plots:
+        plot_all(N, M_0, years_to_sim, START_EPOCH)
 
     # ── Save summary ────────────────────────────────────────────────────────
     summary_path = os.path.join(output_dir, "localhost_partition_table.txt")
@@ -439,7 +415,7 @@ def main():
         f.write("  The defense relies on halving (time) and dilution (self-harm),\n")
         f.write("  not on making the attack genuinely costly.\n")
 
-    print(f"\nOutput saved to {output_dir}/")
+    print(f"\nOutput saved to {os.path.relpath(output_dir)}/")
     print(f"  - localhost_partition_analysis.png")
     print(f"  - localhost_partition_table.txt")
 
@@ -467,4 +443,4 @@ The protocol needs either:
 
 
 if __name__ == "__main__":
-    main()
+    main(plots=parse_analysis_args(__doc__.splitlines()[1]).plots)
@@ -0,0 +1,46 @@
+"""
+Mehr Network -- Shared Output Directory
+
+Every analysis writes its figures and tables to one directory:
+$MEHR_OUTPUT_DIR when set (run_all.py sets it), otherwise scripts/output
+next to this file, whatever the working directory.
+
+Figures are optional: with --no-plots an analysis writes its tables only,
+and matplotlib is never imported (pyplot() loads it on first use), so
+table regeneration starts in a fraction of a second.
+"""
+
+import argparse
+import os
+
+OUTPUT_ENV = "MEHR_OUTPUT_DIR"
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+
+
+def output_dir():
+    """The output directory, created if missing."""
+    path = os.environ.get(OUTPUT_ENV) or DEFAULT_OUTPUT_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def output_path(filename):
+    """Path of an output file inside output_dir()."""
+    return os.path.join(output_dir(), filename)
+
+
+def pyplot():
+    """matplotlib.pyplot on the headless Agg backend, imported on first use."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def parse_analysis_args(description):
+    """Command-line options shared by the analyses; .plots is False under
+    --no-plots (tables only)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--no-plots", dest="plots", action="store_false",
+                        help="write the tables only; skip figures and matplotlib")
+    return parser.parse_args()
@@ -0,0 +1,327 @@
+"""
+Mehr Network -- Segment-Wise Partition Supply Engine
+
+Closed-form replacement for the per-epoch `simulate_partition` loops in
+isolated_partition_analysis.py, localhost_partition_analysis.py and
+sca_partition_analysis.py.
+
+The run is split into halving segments (constant E_s) and, inside each
+segment, into two phases:
+  1. Capital-starved: S < min_spend, attacker spends everything and
+     supply grows 1.47x per epoch. Bounded by log(min_spend/M_0)/log(1.47)
+     epochs, so it is stepped exactly.
+  2. Saturated: S >= min_spend, every epoch applies the same
+     (-burns, +minting) pair. Solved with one sequential NumPy cumsum over
+     the interleaved increments, which performs the identical float
+     operations in the identical order as the loop.
+
+Full-velocity runs converge to E_s/burn_rate; they are stepped until the
+float recurrence reaches its fixed point and the rest of the segment is
+filled in one shot.
+
+final_supply runs many (N, M_0, start_epoch) combinations in lockstep and
+returns only the final supply; in the saturated phase it skips whole
+stretches of a float binade at once, where the rounded per-epoch increment
+is periodic, so thousands of runs take well under a second.
+
+Results are bit-for-bit identical to the reference loop. Run this file
+directly to check that over a grid of (N, M_0, start_epoch, strategy).
+
+All constants are drawn directly from the Mehr protocol specification.
+"""
+
+import time
+import numpy as np
+
+from emission_schedule import HALVING_INTERVAL, halving_segments, scaled_emission
+
+# --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
+
+BURN_RATE = 0.02                   # 2% service burn
+MINTING_CAP = 0.5                  # minting ≤ 50% of net income
+
+
+# --- SEGMENT ENGINE ---------------------------------------------------------
+
+def _step(S, A, E_s):
+    """One epoch of the supply recurrence with spend A."""
+    burns = BURN_RATE * A
+    income = (1 - BURN_RATE) * A
+    minting = min(E_s, MINTING_CAP * income)
+    return S - burns + minting
+
+
+def _step_array(S, A, E_s):
+    """_step over arrays: the same float operations, elementwise."""
+    burns = BURN_RATE * A
+    income = (1 - BURN_RATE) * A
+    minting = np.minimum(E_s, MINTING_CAP * income)
+    return S - burns + minting
+
+
+def saturated_run(S, min_spend, E_s, length):
+    """Supply after each of `length` saturated epochs starting from S.
+
+    np.cumsum accumulates strictly left to right, so summing
+    [S, -burns, +minting, -burns, +minting, ...] reproduces
+    `S = S - burns + minting` exactly.
+    """
+    burns = BURN_RATE * min_spend
+    minting = min(E_s, MINTING_CAP * ((1 - BURN_RATE) * min_spend))
+    terms = np.empty(2 * length + 1)
+    terms[0] = S
+    terms[1::2] = -burns
+    terms[2::2] = minting
+    return np.cumsum(terms)[2::2]
+
+
+def simulate_partition_segments(N, M_0, epochs, strategy="optimal",
+                                start_epoch=100_000):
+    """Segment-wise equivalent of simulate_partition.
+
+    Args:
+        N: number of attacker nodes
+        M_0: initial MHR capital
+        epochs: number of epochs to simulate
+        strategy: "full_velocity" or "optimal" (minimum spending)
+        start_epoch: starting epoch number (affects emission schedule)
+
+    Returns:
+        (supply_history, phase1_end): supply_history is a float64 array of
+        length epochs + 1; phase1_end is the first epoch offset at which the
+        optimal attacker saturates the minting cap (None if it never does,
+        or for full velocity).
+    """
+    history = np.empty(epochs + 1)
+    history[0] = S = M_0
+    phase1_end = None
+
+    for offset, length, epoch in halving_segments(start_epoch, epochs):
+        E_s = scaled_emission(N, epoch)
+        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
+        k = 0
+
+        if strategy == "full_velocity":
+            while k < length:
+                S_next = _step(S, S, E_s)
+                k += 1
+                history[offset + k] = S_next
+                if S_next == S:
+                    # Float fixed point: every later epoch repeats it
+                    history[offset + k:offset + length + 1] = S
+                    k = length
+                S = S_next
+            continue
+
+        while k < length:
+            if S < min_spend:
+                # Phase 1: capital-starved, spend everything
+                S = _step(S, S, E_s)
+                k += 1
+                history[offset + k] = S
+                continue
+
+            # Phase 2: saturated, constant per-epoch increments
+            if phase1_end is None:
+                phase1_end = offset + k
+            run = saturated_run(S, min_spend, E_s, length - k)
+            # Supply only drops back under min_spend through float
+            # stagnation at huge S; hand those epochs back to stepping.
+            below = np.flatnonzero(run[:-1] < min_spend)
+            n = len(run) if below.size == 0 else below[0] + 1
+            history[offset + k + 1:offset + k + 1 + n] = run[:n]
+            k += n
+            S = history[offset + k]
+
+    return history, phase1_end
+
+
+# --- BATCHED FINAL SUPPLY ---------------------------------------------------
+
+def _binade_jump(S, burns, minting, E_s, min_spend, left):
+    """Exact supply after up to `left` saturated epochs, skipping ahead
+    inside S's binade.
+
+    Within a binade [2^e, 2^(e+1)) floats are multiples of one spacing u,
+    so while S - burns and S - burns + minting stay in it, the rounded step
+    depends only on the parity of S / u. The parity sequence settles after
+    one step into a period of at most two, so from the first step on every
+    second step adds the same exact amount C2 = x3 - x1, and the supply
+    after t steps is x1 or x2 plus a whole multiple of C2, with no rounding.
+
+    Returns (supply, epochs taken); epochs taken is 0 where a jump does not
+    apply (the caller steps those rows once).
+    """
+    x1 = _step_array(S, min_spend, E_s)
+    x2 = _step_array(x1, min_spend, E_s)
+    x3 = _step_array(x2, min_spend, E_s)
+    base = np.ldexp(1.0, np.frexp(S)[1] - 1)             # 2^e
+    ulp = np.ldexp(base, -52)
+    lo, hi = base + burns + 2 * ulp, 2 * base - minting - 2 * ulp
+    C2 = x3 - x1
+    ok = ((left >= 4) & (S >= lo) & (np.minimum(np.minimum(x1, x2), x3) >= lo)
+          & (np.maximum(np.maximum(x1, x2), x3) <= hi) & (C2 >= 0)
+          & (np.minimum(x1, x2) >= min_spend))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pairs = np.where(C2 > 0, np.floor((hi - x2) / C2) - 1, np.inf)
+    t = np.where(ok, np.minimum(left, 1 + 2 * np.maximum(pairs, 0)), 0).astype(np.int64)
+    j = np.maximum(t - 1, 0) // 2
+    jumped = np.where((t - 1) % 2 == 0, x1, x2) + j * C2
+    return np.where(t > 0, jumped, S), t
+
+
+def final_supply(N, M_0, epochs, strategy="optimal", start_epoch=100_000):
+    """Final supply of simulate_partition_segments for broadcastable arrays
+    of N, M_0 and start_epoch, bit-for-bit.
+
+    All runs advance in lockstep, one NumPy pass per round. Each round a
+    run either steps one epoch exactly as the loop does, skips to the end
+    of its halving segment at a float fixed point, or (optimal strategy,
+    saturated) jumps ahead within its float binade with _binade_jump. A
+    saturated run crosses only a few dozen binades, so the number of rounds
+    is independent of the run length.
+    """
+    N, S, epoch = np.broadcast_arrays(np.asarray(N), np.asarray(M_0, dtype=float),
+                                      np.asarray(start_epoch, dtype=np.int64))
+    shape = S.shape
+    N, S, epoch = N.ravel().copy(), S.ravel().copy(), epoch.ravel().copy()
+    end = epoch + epochs
+    active = np.flatnonzero(epoch < end)
+    while active.size:
+        n, s, e = N[active], S[active], epoch[active]
+        E_s = scaled_emission(n, e)
+        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
+        left = np.minimum((e // HALVING_INTERVAL + 1) * HALVING_INTERVAL, end[active]) - e
+        if strategy == "full_velocity":
+            starved = np.ones(active.size, dtype=bool)
+        else:
+            starved = s < min_spend
+        # Spend everything; a float fixed point repeats to the segment end
+        nxt = _step_array(s, s, E_s)
+        still = nxt == s
+        new_s = np.where(starved, nxt, s)
+        taken = np.where(starved, np.where(still, left, 1), 0)
+        # Saturated: jump within the binade, or step once
+        sat = ~starved
+        if sat.any():
+            burns = BURN_RATE * min_spend[sat]
+            minting = np.minimum(E_s[sat], MINTING_CAP * ((1 - BURN_RATE) * min_spend[sat]))
+            jumped, t = _binade_jump(s[sat], burns, minting, E_s[sat], min_spend[sat],
+                                     left[sat])
+            single = _step_array(s[sat], min_spend[sat], E_s[sat])
+            new_s[sat] = np.where(t > 0, jumped, single)
+            taken[sat] = np.maximum(t, 1)
+        S[active] = new_s
+        epoch[active] = e + taken
+        active = active[epoch[active] < end[active]]
+    return S.reshape(shape)
+
+
+def sweep_final_supply(N_values, M_0_values, start_epochs, epochs,
+                       strategy="optimal"):
+    """Final supply over a (N, M_0, start_epoch) grid.
+
+    Returns a float64 array of shape (len(N_values), len(M_0_values),
+    len(start_epochs)).
+    """
+    return final_supply(np.asarray(N_values)[:, None, None],
+                        np.asarray(M_0_values, dtype=float)[None, :, None], epochs,
+                        strategy, np.asarray(start_epochs)[None, None, :])
+
+
+# --- REFERENCE LOOP ---------------------------------------------------------
+
+def simulate_partition_loop(N, M_0, epochs, strategy="optimal", start_epoch=100_000):
+    """Original per-epoch loop, kept as the bit-for-bit reference."""
+    S = M_0
+    history = [S]
+    phase1_end = None
+    for k in range(epochs):
+        E_s = scaled_emission(N, start_epoch + k)
+        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
+        if strategy == "full_velocity":
+            A = S
+        elif S < min_spend:
+            A = S
+        else:
+            A = min_spend
+            if phase1_end is None:
+                phase1_end = k
+        burns = BURN_RATE * A
+        income = (1 - BURN_RATE) * A
+        minting = min(E_s, MINTING_CAP * income)
+        S = S - burns + minting
+        history.append(S)
+    return history, phase1_end
+
+
+def verify_against_loop(cases):
+    """Compare engine and loop on (N, M_0, epochs, strategy, start_epoch) cases.
+
+    Returns a list of cases whose history or phase1_end differ.
+    """
+    mismatches = []
+    for case in cases:
+        ref, ref_end = simulate_partition_loop(*case)
+        got, got_end = simulate_partition_segments(*case)
+        if ref_end != got_end or not np.array_equal(np.array(ref), got):
+            mismatches.append(case)
+    return mismatches
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- PARTITION ENGINE vs REFERENCE LOOP")
+    print("=" * 70)
+
+    cases = []
+    for strategy in ["optimal", "full_velocity"]:
+        for N in [1, 3, 10, 100, 500]:
+            for M_0 in [0.0, 1e-3, 1.0, 100.0, 1e7, 1e12]:
+                for start in [0, 99_990, 100_000, 250_000, 6_350_000]:
+                    cases.append((N, M_0, 3_000, strategy, start))
+    cases.append((100, 1.0, 5 * 52_600, "optimal", 100_000))
+    cases.append((3, 100.0, 5 * 52_600, "full_velocity", 100_000))
+
+    t0 = time.perf_counter()
+    mismatches = verify_against_loop(cases)
+    print(f"\n  {len(cases)} cases checked in {time.perf_counter() - t0:.1f}s: "
+          f"{len(mismatches)} mismatches")
+    for case in mismatches:
+        print(f"    MISMATCH: {case}")
+
+    epochs = 5 * 52_600
+    t0 = time.perf_counter()
+    simulate_partition_loop(100, 1.0, epochs)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    simulate_partition_segments(100, 1.0, epochs)
+    t_engine = time.perf_counter() - t0
+    print(f"\n  5-year run ({epochs:,} epochs): loop {t_loop*1000:.1f} ms, "
+          f"engine {t_engine*1000:.2f} ms ({t_loop/t_engine:.0f}x)")
+
+    N_values = np.arange(1, 101)
+    M_0_values = np.logspace(0, 6, 10)
+    starts = [100_000, 200_000, 300_000]
+    for strategy in ["optimal", "full_velocity"]:
+        t0 = time.perf_counter()
+        final = sweep_final_supply(N_values, M_0_values, starts, epochs, strategy)
+        elapsed = time.perf_counter() - t0
+        # Bit-for-bit against the per-run engine on a sample of the grid
+        rng = np.random.default_rng(0)
+        picks = [tuple(rng.integers(0, d) for d in final.shape) for _ in range(40)]
+        bad = sum(final[i, j, k] != simulate_partition_segments(
+                      N_values[i], M_0_values[j], epochs, strategy, starts[k])[0][-1]
+                  for i, j, k in picks)
+        mismatches += [("sweep", strategy)] * bad
+        print(f"  Sweep of {final.size:,} five-year runs ({strategy}): {elapsed:.2f}s, "
+              f"{bad} of {len(picks)} sampled runs differ from the engine")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Mehr Network -- Payment Channel Settlement Simulator
+
+epoch_partition_analysis drives GSet growth (gset_growth_timeline,
+time_to_gset_limit) and the epoch triggers with guessed settlement rates
+(0.5 to 50 per minute). This module derives the rate from the channel
+layer of payment-channels.md instead: bilateral channels between mesh
+neighbors, updated by VRF lottery wins and finalized into
+SettlementRecords under the documented settlement policies.
+
+ChannelSet holds every channel in struct-of-arrays form (one NumPy array
+per ChannelState field, one entry per channel):
+  - balances and sequence number; every accepted payment shifts the
+    balance and increments sequence by 1
+  - the last settled sequence, balance and round
+A batch of payment events is applied in one sort + cumsum pass. Events
+on the same channel apply in order; an event the payer cannot fund is
+rejected together with the rest of that channel's batch.
+
+Settlement policy (payment-channels.md, Settlement Timing):
+  - periodic finalization: a channel with unsettled updates settles once
+    interval_rounds have passed since its last settlement (recommended:
+    once per epoch); interval_rounds=0 settles after every update
+  - cooperative request: only once min_unsettled_uMHR has moved since
+    the last settlement
+  - abandonment: a channel with unsettled updates and no update for
+    ABANDON_EPOCHS epochs closes unilaterally with its last state
+Each SettlementRecord adds one 32-byte hash to the partition's
+SettlementGSet. epoch_trigger_met is checked every gossip round, and an
+epoch resets the GSet. Rounds are GOSSIP_INTERVAL_SEC seconds (one minute).
+
+Modelling assumptions (not spec values): channels are the links of a
+random mesh (gossip_engine.random_peer_graph), each channel carries
+Poisson traffic of packets_per_min per round with lottery wins at the
+adaptive difficulty (relay_lottery), and the payer of each win is either
+side with equal odds. Settlement hashes are a 64-bit mix of (channel,
+final_sequence): unique like Blake3, not cryptographic.
+"""
+
+import time
+import numpy as np
+
+from double_spend_analysis import PACKETS_PER_MIN_DEFAULT
+from epoch_partition_analysis import (EPOCH_DURATION_MIN, GSET_TRIGGER_BYTES,
+                                      SETTLEMENT_HASH_BYTES, epoch_trigger_met,
+                                      gset_growth_timeline, time_to_gset_limit)
+from gossip_engine import random_peer_graph
+from relay_lottery import payout_per_win, win_probability
+from result_cache import cached
+from settlement_gset import SettlementGSet
+
+# --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
+
+ABANDON_EPOCHS = 4                       # payment-channels.md: abandonment after 4 epochs
+
+# --- SIMULATION ASSUMPTIONS -------------------------------------------------
+
+CHANNELS_PER_NODE = 8                    # channels = mesh links, ~8 neighbors
+CHANNEL_DEPOSIT_uMHR = 1_000_000         # each side's opening balance
+EPOCH_ROUNDS = EPOCH_DURATION_MIN        # nominal epoch in 1-minute gossip rounds
+
+# Settlement policies: (interval_rounds, min_unsettled_uMHR)
+SETTLEMENT_POLICIES = {
+    "per_update": (0, 0),                # every lottery win settles (no batching)
+    "per_epoch": (EPOCH_ROUNDS, 0),      # recommended periodic finalization
+    "hourly": (60, 0),
+    "on_demand": (0, 50_000),            # request once 50,000 uMHR is owed
+}
+
+
+# --- SETTLEMENT HASHES ------------------------------------------------------
+
+_HASH_LANES = np.arange(4, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix64(x):
+    """splitmix64 finalizer over a uint64 array."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def settlement_hashes(channel, sequence):
+    """(n, 32) uint8 hashes, one per (channel, final_sequence) record."""
+    key = (np.asarray(channel, dtype=np.uint64) << np.uint64(32)) ^ np.asarray(sequence, dtype=np.uint64)
+    words = _mix64(key[:, None] + _HASH_LANES)
+    return np.ascontiguousarray(words).view(np.uint8).reshape(-1, SETTLEMENT_HASH_BYTES)
+
+
+# --- CHANNELS ---------------------------------------------------------------
+
+class ChannelSet:
+    """Bilateral payment channels in struct-of-arrays form."""
+
+    def __init__(self, party_a, party_b, deposit_uMHR=CHANNEL_DEPOSIT_uMHR):
+        self.party_a = np.asarray(party_a, dtype=np.int64)
+        self.party_b = np.asarray(party_b, dtype=np.int64)
+        n = len(self.party_a)
+        self.balance_a = np.full(n, deposit_uMHR, dtype=np.int64)
+        self.balance_b = np.full(n, deposit_uMHR, dtype=np.int64)
+        self.sequence = np.zeros(n, dtype=np.int64)
+        self.last_update = np.zeros(n, dtype=np.int64)
+        self.settled_sequence = np.zeros(n, dtype=np.int64)
+        self.settled_balance_a = self.balance_a.copy()
+        self.last_settled = np.zeros(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.party_a)
+
+    def apply_payments(self, channel, payer_is_a, amount, now):
+        """Apply a batch of payment events in order; returns the accepted mask.
+
+        Per channel the running balance must stay within [0, capacity]; the
+        first event that breaks it, and every later event on that channel in
+        this batch, is rejected.
+        """
+        channel = np.asarray(channel, dtype=np.int64)
+        accepted = np.zeros(len(channel), dtype=bool)
+        if not len(channel):
+            return accepted
+        order = np.argsort(channel, kind="stable")
+        ch = channel[order]
+        amount = np.broadcast_to(np.asarray(amount, dtype=np.int64), channel.shape)
+        delta = np.where(np.asarray(payer_is_a)[order], -1, 1) * amount[order]
+        starts = np.flatnonzero(np.concatenate(([True], ch[1:] != ch[:-1])))
+        lengths = np.diff(np.append(starts, len(ch)))
+        running = np.cumsum(delta)
+        running -= np.repeat(running[starts] - delta[starts], lengths)
+        bal = self.balance_a[ch] + running
+        bad = (bal < 0) | (bal > self.balance_a[ch] + self.balance_b[ch])
+        pos = np.arange(len(ch))
+        first_bad = np.minimum.reduceat(np.where(bad, pos, len(ch)), starts)
+        ok = pos < np.repeat(first_bad, lengths)
+        accepted[order] = ok
+
+        count = np.bincount(ch[ok], minlength=len(self))
+        net = np.zeros(len(self), dtype=np.int64)
+        np.add.at(net, ch[ok], delta[ok])
+        self.balance_a += net
+        self.balance_b -= net
+        self.sequence += count
+        self.last_update[count > 0] = now
+        return accepted
+
+    def due(self, now, interval_rounds=EPOCH_ROUNDS, min_unsettled_uMHR=0,
+            abandon_rounds=ABANDON_EPOCHS * EPOCH_ROUNDS):
+        """Channels whose settlement policy fires at round now."""
+        pending = self.sequence > self.settled_sequence
+        periodic = ((now - self.last_settled >= interval_rounds)
+                    & (np.abs(self.balance_a - self.settled_balance_a) >= min_unsettled_uMHR))
+        abandoned = now - self.last_update >= abandon_rounds
+        return np.flatnonzero(pending & (periodic | abandoned))
+
+    def settle(self, channels, now):
+        """Finalize channels at their current state; returns record hashes."""
+        self.settled_sequence[channels] = self.sequence[channels]
+        self.settled_balance_a[channels] = self.balance_a[channels]
+        self.last_settled[channels] = now
+        return settlement_hashes(channels, self.sequence[channels])
+
+
+def mesh_channels(n_nodes, degree=CHANNELS_PER_NODE, rng=None):
+    """One channel per link of a random mesh: (party_a, party_b), a < b."""
+    indptr, indices = random_peer_graph(n_nodes, degree, rng)
+    src = np.repeat(np.arange(n_nodes), np.diff(indptr))
+    keep = src < indices
+    return src[keep], indices[keep]
+
+
+# --- SIMULATION -------------------------------------------------------------
+
+def simulate_channels(n_nodes, rounds, packets_per_min=PACKETS_PER_MIN_DEFAULT,
+                      policy="per_epoch", degree=CHANNELS_PER_NODE, adaptive=True,
+                      epochs=True, rng=None):
+    """Run a mesh's channels for rounds gossip rounds.
+
+    Every round: lottery wins on each channel are applied as one payment
+    batch, due channels settle into the GSet, and epoch_trigger_met is
+    checked (epochs=False models stalled consensus: the GSet never resets).
+
+    Returns a dict with:
+        settlements, updates, rejected: per-round counts, shape (rounds,)
+        gset_bytes: GSet size after each round
+        epoch_rounds, epoch_reasons: round and trigger of each epoch
+        channels: channel count
+        elapsed_sec: wall time of the round loop
+    """
+    rng = np.random.default_rng(rng)
+    interval, min_unsettled = SETTLEMENT_POLICIES[policy]
+    chans = ChannelSet(*mesh_channels(n_nodes, degree, rng))
+    n = len(chans)
+    p = win_probability(packets_per_min, adaptive)
+    payout = np.int64(np.rint(payout_per_win(p)))
+    wins_per_round = packets_per_min * p
+
+    gset = SettlementGSet()
+    node_settled = np.full(n_nodes, -1, dtype=np.int64)
+    epoch_start, prev_start = 0, 0
+    out = {key: np.zeros(rounds, dtype=np.int64)
+           for key in ("settlements", "updates", "rejected", "gset_bytes")}
+    epoch_rounds, epoch_reasons = [], []
+    t0 = time.perf_counter()
+    for now in range(1, rounds + 1):
+        wins = rng.poisson(wins_per_round, size=n)
+        channel = np.repeat(np.arange(n), wins)
+        ok = chans.apply_payments(channel, rng.random(len(channel)) < 0.5, payout, now)
+        due = chans.due(now, interval, min_unsettled)
+        gset.add(chans.settle(due, now))
+        node_settled[chans.party_a[due]] = now
+        node_settled[chans.party_b[due]] = now
+
+        active = int(np.count_nonzero(node_settled >= prev_start))
+        fired, reason = epoch_trigger_met(len(gset), gset.nbytes, active, now - epoch_start)
+        i = now - 1
+        out["settlements"][i], out["updates"][i] = len(due), ok.sum()
+        out["rejected"][i], out["gset_bytes"][i] = len(ok) - ok.sum(), gset.nbytes
+        if epochs and fired:
+            epoch_rounds.append(now)
+            epoch_reasons.append(reason)
+            prev_start, epoch_start = epoch_start, now
+            gset = SettlementGSet()
+    out.update(epoch_rounds=np.array(epoch_rounds, dtype=np.int64),
+               epoch_reasons=np.array(epoch_reasons, dtype=str),
+               channels=n, elapsed_sec=time.perf_counter() - t0)
+    return out
+
+
+@cached
+def measured_settlement_rate(n_nodes, packets_per_min=PACKETS_PER_MIN_DEFAULT,
+                             policy="per_epoch", rounds=240, warmup=60, rng=0):
+    """Steady-state settlements per minute across a mesh of n_nodes, after
+    warmup rounds, with consensus stalled (the GSet keeps growing)."""
+    sim = simulate_channels(n_nodes, rounds, packets_per_min, policy,
+                            epochs=False, rng=rng)
+    return float(sim["settlements"][warmup:].mean())
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- PAYMENT CHANNEL SETTLEMENT SIMULATOR")
+    print("=" * 70)
+
+    # Correctness: batch payments against a sequential per-event replay
+    rng = np.random.default_rng(1)
+    chans = ChannelSet(np.zeros(50, dtype=np.int64), np.ones(50, dtype=np.int64), 1_000)
+    bal_a, bal_b = chans.balance_a.copy(), chans.balance_b.copy()
+    seq, blocked = chans.sequence.copy(), set()
+    channel = rng.integers(0, 50, 5_000)
+    payer = rng.random(5_000) < 0.6
+    amount = rng.integers(1, 300, 5_000)
+    expected = np.zeros(5_000, dtype=bool)
+    for i, (c, a_pays, amt) in enumerate(zip(channel, payer, amount)):
+        d = -amt if a_pays else amt
+        if c not in blocked and 0 <= bal_a[c] + d <= bal_a[c] + bal_b[c]:
+            bal_a[c] += d
+            bal_b[c] -= d
+            seq[c] += 1
+            expected[i] = True
+        else:
+            blocked.add(c)
+    accepted = chans.apply_payments(channel, payer, amount, now=1)
+    ok = bool(np.array_equal(accepted, expected) and np.array_equal(chans.balance_a, bal_a)
+              and np.array_equal(chans.balance_b, bal_b) and np.array_equal(chans.sequence, seq))
+    print(f"\n  Batch payments match sequential replay "
+          f"({accepted.sum():,} accepted, {(~accepted).sum():,} rejected): {ok}")
+    hashes = settlement_hashes(np.arange(100_000), np.arange(100_000) % 7)
+    ok_hash = len(SettlementGSet(hashes)) == len(hashes)
+    print(f"  100,000 settlement hashes distinct: {ok_hash}")
+
+    # Settlement rates per policy
+    print(f"\n  1,000-node mesh, {PACKETS_PER_MIN_DEFAULT} packets/min per channel, "
+          f"adaptive difficulty, 240 rounds:")
+    print(f"  {'Policy':>11s}  {'settl/min':>10s}  {'updates/min':>12s}  "
+          f"{'to 500 KB':>10s}  {'epochs':>7s}  {'first trigger':>16s}")
+    print(f"  {'-'*11}  {'-'*10}  {'-'*12}  {'-'*10}  {'-'*7}  {'-'*16}")
+    for policy in SETTLEMENT_POLICIES:
+        sim = simulate_channels(1_000, 240, policy=policy, rng=2)
+        rate = sim["settlements"][60:].mean()
+        first = (f"{sim['epoch_reasons'][0]} @{sim['epoch_rounds'][0]}"
+                 if len(sim["epoch_rounds"]) else "none")
+        print(f"  {policy:>11s}  {rate:>10.1f}  {sim['updates'][60:].mean():>12.1f}  "
+              f"{time_to_gset_limit(rate) / 60:>8.1f} h  {len(sim['epoch_rounds']):>7d}  "
+              f"{first:>16s}")
+
+    # Throughput and GSet growth vs the linear model, consensus stalled
+    print(f"\n  Throughput and GSet growth, per_epoch policy, consensus stalled:")
+    print(f"  {'Nodes':>9s}  {'channels':>9s}  {'settl/min':>10s}  {'settl/sec':>10s}  "
+          f"{'GSet @2h':>9s}  {'model @2h':>10s}")
+    print(f"  {'-'*9}  {'-'*9}  {'-'*10}  {'-'*10}  {'-'*9}  {'-'*10}")
+    for n_nodes in [20, 1_000, 10_000, 100_000]:
+        sim = simulate_channels(n_nodes, 120, epochs=False, rng=3)
+        rate = sim["settlements"][EPOCH_ROUNDS:].mean()
+        _, model = gset_growth_timeline(rate, 2)
+        print(f"  {n_nodes:>9,d}  {sim['channels']:>9,d}  {rate:>10.1f}  "
+              f"{sim['settlements'].sum() / sim['elapsed_sec']:>10,.0f}  "
+              f"{sim['gset_bytes'][-1] / 1024:>7.0f}KB  {model[-1] / 1024:>8.0f}KB")
+    print(f"  (settl/sec = simulator throughput; GSet trigger at "
+          f"{GSET_TRIGGER_BYTES // 1024} KB)")
+
+    if not (ok and ok_hash):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
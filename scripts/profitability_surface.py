@@ -0,0 +1,261 @@
+"""
+Mehr Network -- Adaptive Profitability Surface Engine
+
+Plot 4 of double_spend_analysis draws the G - L = 0 break-even frontier.
+A uniform grid fine enough to place that curve precisely over T up to
+10^5 epochs and K up to 10^4 channels spends almost all of its evaluations
+far from the curve. This engine refines only where it matters:
+
+  1. evaluate f at the corners of a coarse base x base grid (one
+     broadcast call per level, each lattice point evaluated once)
+  2. split every cell whose corners disagree in sign into four children,
+     for `levels` rounds (quadtree subdivision)
+  3. run marching squares on the finest crossing cells, with the zero
+     placed by linear interpolation along each edge, and chain the
+     segments into polylines
+
+The finest resolution is base x 2^levels cells per side, but the number
+of evaluations grows with the length of the frontier, not the area.
+Axes may be logarithmic. As with any corner-sampled method, a piece of
+frontier that enters and leaves a base cell through the same edge is
+missed, so base must resolve the curve's coarse shape.
+"""
+
+import numpy as np
+
+# --- LATTICE ----------------------------------------------------------------
+
+def _axis(lo, hi, n_cells, log):
+    """Coordinate of lattice index i along one axis (0..n_cells)."""
+    if log:
+        return lambda i: lo * (hi / lo) ** (np.asarray(i) / n_cells)
+    return lambda i: lo + (hi - lo) * np.asarray(i) / n_cells
+
+
+class _Lattice:
+    """f sampled on demand at integer lattice points, each at most once."""
+
+    def __init__(self, fn, x_of, y_of, side):
+        self.fn, self.x_of, self.y_of, self.side = fn, x_of, y_of, side
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0)
+
+    def __call__(self, i, j):
+        key = i * (self.side + 1) + j
+        known = np.zeros(key.shape, dtype=bool)
+        if len(self.keys):
+            pos = np.minimum(np.searchsorted(self.keys, key), len(self.keys) - 1)
+            known = self.keys[pos] == key
+        new = np.unique(key[~known])
+        if new.size:
+            ni, nj = np.divmod(new, self.side + 1)
+            vals = np.asarray(self.fn(self.x_of(ni), self.y_of(nj)), dtype=float)
+            keys = np.concatenate([self.keys, new])
+            order = np.argsort(keys, kind="stable")
+            self.keys = keys[order]
+            self.values = np.concatenate([self.values, vals])[order]
+        return self.values[np.searchsorted(self.keys, key)]
+
+
+# --- REFINEMENT -------------------------------------------------------------
+
+def _crossing_cells(lattice, base, levels):
+    """Finest-level cells (lower-left i, j) whose corners change sign."""
+    size = 2 ** levels
+    i, j = [a.ravel() * size for a in np.meshgrid(np.arange(base), np.arange(base),
+                                                 indexing="ij")]
+    for level in range(levels + 1):
+        corners = np.stack([lattice(i, j), lattice(i + size, j),
+                            lattice(i, j + size), lattice(i + size, j + size)])
+        positive = corners >= 0
+        split = positive.any(axis=0) & ~positive.all(axis=0)
+        i, j = i[split], j[split]
+        if level == levels:
+            return i, j
+        size //= 2
+        i = np.concatenate([i, i + size, i, i + size])
+        j = np.concatenate([j, j, j + size, j + size])
+
+
+def _segments(lattice, i, j):
+    """Marching-squares segments in unit cells (i, j).
+
+    Returns (edge_a, edge_b, point_a, point_b): the global edge keys each
+    segment joins and the interpolated zero on each edge, in lattice units.
+    Ambiguous saddles are resolved by the sign of the corner mean.
+    """
+    side = lattice.side
+    v00, v10 = lattice(i, j), lattice(i + 1, j)
+    v01, v11 = lattice(i, j + 1), lattice(i + 1, j + 1)
+    # Edges: bottom (i..i+1, j), top (i..i+1, j+1), left (i, j..j+1), right (i+1, j..j+1)
+    ends = [(v00, v10), (v01, v11), (v00, v01), (v10, v11)]
+    keys = [2 * (i * (side + 1) + j), 2 * (i * (side + 1) + j + 1),
+            2 * (i * (side + 1) + j) + 1, 2 * ((i + 1) * (side + 1) + j) + 1]
+    points = []
+    for e, (a, b) in enumerate(ends):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(a != b, a / (a - b), 0.5), 0.0, 1.0)
+        x = i + (t if e < 2 else (0.0 if e == 2 else 1.0))
+        y = j + (t if e >= 2 else (0.0 if e == 0 else 1.0))
+        points.append(np.stack([x, y], axis=-1))
+    crosses = np.stack([(a >= 0) != (b >= 0) for a, b in ends])      # (4, cells)
+
+    seg_a, seg_b = [], []
+    count = crosses.sum(axis=0)
+    two = count == 2
+    first = np.argmax(crosses, axis=0)
+    second = 3 - np.argmax(crosses[::-1], axis=0)
+    seg_a.append((first[two], np.flatnonzero(two)))
+    seg_b.append((second[two], np.flatnonzero(two)))
+    # Saddles: pair bottom-left / top-right, or bottom-right / top-left
+    saddle = np.flatnonzero(count == 4)
+    center_pos = (v00 + v10 + v01 + v11)[saddle] >= 0
+    same_as_00 = center_pos == (v00[saddle] >= 0)
+    pair_one = np.where(same_as_00, 3, 2)            # bottom joins right or left
+    seg_a += [(np.zeros(saddle.size, dtype=int), saddle), (np.ones(saddle.size, dtype=int), saddle)]
+    seg_b += [(pair_one, saddle), (5 - pair_one, saddle)]
+
+    edge_keys, edge_points = np.stack(keys), np.stack(points)
+    out = []
+    for side_list in (seg_a, seg_b):
+        e = np.concatenate([s[0] for s in side_list])
+        c = np.concatenate([s[1] for s in side_list])
+        out.append((edge_keys[e, c], edge_points[e, c]))
+    (ka, pa), (kb, pb) = out
+    return ka, kb, pa, pb
+
+
+def _chain(ka, kb, pa, pb):
+    """Join segments sharing an edge key into polylines (lattice units)."""
+    touching = {}
+    for s, (a, b) in enumerate(zip(ka.tolist(), kb.tolist())):
+        touching.setdefault(a, []).append(s)
+        touching.setdefault(b, []).append(s)
+    used = np.zeros(len(ka), dtype=bool)
+    # Open curves start at an edge used once (the domain boundary), loops anywhere
+    starts = [segs[0] for segs in touching.values() if len(segs) == 1] + list(range(len(ka)))
+    lines = []
+    for s in starts:
+        if used[s]:
+            continue
+        ka_s, kb_s = int(ka[s]), int(kb[s])
+        # Orient the first segment away from a boundary end
+        if len(touching[kb_s]) == 1 and len(touching[ka_s]) != 1:
+            key, pts = ka_s, [pb[s], pa[s]]
+        else:
+            key, pts = kb_s, [pa[s], pb[s]]
+        used[s] = True
+        while True:
+            nxt = [t for t in touching[key] if not used[t]]
+            if not nxt:
+                break
+            t = nxt[0]
+            used[t] = True
+            if int(ka[t]) == key:
+                key, point = int(kb[t]), pb[t]
+            else:
+                key, point = int(ka[t]), pa[t]
+            pts.append(point)
+        lines.append(np.array(pts))
+    return lines
+
+
+def frontier(fn, x_range, y_range, base=16, levels=6, log=(True, True)):
+    """Zero contour of fn over a rectangle, by adaptive quadtree refinement.
+
+    Args:
+        fn: fn(x, y) -> values, broadcasting over arrays
+        x_range, y_range: (lo, hi) of each axis
+        base: coarse cells per side
+        levels: quadtree refinements; finest grid is base * 2**levels cells
+        log: per axis, whether to subdivide in log space
+
+    Returns a dict with:
+        polylines: list of (m, 2) arrays of (x, y) points along f = 0
+        evaluations: number of fn evaluations (lattice points)
+        dense_evaluations: points a uniform grid at the finest level needs
+        cells: finest-level cells the frontier crosses
+    """
+    side = base * 2 ** levels
+    x_of = _axis(*x_range, side, log[0])
+    y_of = _axis(*y_range, side, log[1])
+    lattice = _Lattice(fn, x_of, y_of, side)
+    i, j = _crossing_cells(lattice, base, levels)
+    polylines = []
+    if i.size:
+        for line in _chain(*_segments(lattice, i, j)):
+            polylines.append(np.stack([x_of(line[:, 0]), y_of(line[:, 1])], axis=-1))
+    return {"polylines": polylines, "evaluations": len(lattice.keys),
+            "dense_evaluations": (side + 1) ** 2, "cells": int(i.size)}
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    import time
+    from breakeven_solver import breakeven_channels
+    from double_spend_analysis import (PACKETS_PER_MIN_DEFAULT, profit_margin,
+                                       realized_gain_table)
+
+    print("=" * 70)
+    print("MEHR NETWORK -- ADAPTIVE PROFITABILITY SURFACE")
+    print("=" * 70)
+
+    # Correctness: a circle of radius 0.3 on [-1, 1]^2
+    circle = frontier(lambda x, y: x**2 + y**2 - 0.09, (-1, 1), (-1, 1), base=8,
+                      levels=6, log=(False, False))
+    pts = np.concatenate(circle["polylines"])
+    err = np.abs(np.hypot(pts[:, 0], pts[:, 1]) - 0.3).max()
+    closed = [np.allclose(p[0], p[-1]) for p in circle["polylines"]]
+    ok_circle = len(circle["polylines"]) == 1 and all(closed) and err < 2 / (8 * 64)
+    print(f"\n  Circle r=0.3: {len(circle['polylines'])} closed polyline, "
+          f"{len(pts)} points, max radius error {err:.1e}: {ok_circle}")
+
+    # Break-even frontier of plot 4, checked against the whole-channel K*
+    # of breakeven_channels (continuous K lies at most one channel below it)
+    C = 50_000
+    realized = realized_gain_table()
+    print(f"\n  G - L = 0 over T in [10, 1e5], K in [1, 1e4], C = {C:,} uMHR/ch:")
+    print(f"  {'pkt/min':>8s}  {'finest':>11s}  {'evals':>8s}  {'dense':>12s}  "
+          f"{'share':>6s}  {'points':>7s}  {'max dlog10 K':>12s}  {'time':>6s}")
+    print(f"  {'-'*8}  {'-'*11}  {'-'*8}  {'-'*12}  {'-'*6}  {'-'*7}  {'-'*12}  {'-'*6}")
+    ok = ok_circle
+    none_in_range = []
+    for ppm in (0.1, 1, PACKETS_PER_MIN_DEFAULT):
+        for levels in (4, 8):
+            t0 = time.perf_counter()
+            res = frontier(lambda K, T: profit_margin(T, K, C, ppm, realized_gain=realized),
+                           (1, 1e4), (10, 1e5), base=16, levels=levels)
+            elapsed = time.perf_counter() - t0
+            side = 16 * 2**levels
+            if res["polylines"]:
+                K, T = np.concatenate(res["polylines"]).T
+                whole = breakeven_channels(T, C, ppm, realized_gain=realized)
+                error = np.abs(np.log10(K) - np.log10(whole))
+                worst = error.max()
+                # one log-K cell (4 decades) plus the rounding to whole channels
+                ok &= bool(np.all(error <= 4 / side + np.log10(1 + 1 / whole)))
+                n_pts, worst_s = len(K), f"{worst:.1e}"
+            else:
+                n_pts, worst_s = 0, "none"
+                if levels == 8:
+                    none_in_range.append(ppm)
+            print(f"  {ppm:>8g}  {side:>5d}x{side:<5d}  {res['evaluations']:>8,d}  "
+                  f"{res['dense_evaluations']:>12,d}  "
+                  f"{res['evaluations'] / res['dense_evaluations']:>6.2%}  {n_pts:>7,d}  "
+                  f"{worst_s:>12s}  {elapsed:>5.2f}s")
+    if none_in_range:
+        # No frontier: the solver needs more channels than the range at every T
+        T_check = np.geomspace(10, 1e5, 200)
+        beyond = all(bool(np.all(breakeven_channels(T_check, C, ppm, realized_gain=realized)
+                                 > 1e4)) for ppm in none_in_range)
+        ok &= beyond
+        print(f"  (at {', '.join(f'{ppm:g}' for ppm in none_in_range)} pkt/min no attack "
+              f"in range breaks even: {beyond})")
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
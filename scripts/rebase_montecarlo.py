@@ -0,0 +1,244 @@
+"""
+Mehr Network -- Monte Carlo Rebase Correctness Harness
+
+Scales the old-vs-new rebase check in epoch_partition_analysis.py
+(plot 8: a 4x4 grid, one settlement per side) to millions of random
+partition histories.
+
+Each case is one account whose ledger splits into partitions A and B:
+  - pre-partition balance B0
+  - pre-rebase settlements seen by both sides, by A only and by B only
+    (so epoch_balance differs between the sides)
+  - each side rebases, then records its own post-rebase settlements
+Settlement counts are Poisson and amounts uniform; every settlement is
+either an earning or a spend for the account.
+
+Merged balances are compared with the full-history ground truth
+(every distinct settlement applied exactly once) for:
+  model:  simulate_new_rebase, vectorized (agrees with _true_balance, which
+          also leaves out the losing side's unique pre-rebase settlements)
+  spec:   NEW design as specified in epoch-compaction.md -- the winning
+          epoch_balance, both sides' deltas, and settlement proofs for the
+          losing side's unique pre-rebase settlements; proofs lost to a
+          bloom false positive nobody catches are dropped
+  old:    single-value GCounter rebase (simulate_old_rebase)
+
+Cases run in chunks spread over a process pool, each chunk with its own
+SeedSequence-spawned RNG stream, and only fixed-size error summaries are
+returned and summed, so memory is bounded by one chunk.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from epoch_partition_analysis import (BLOOM_FPR, bloom_filter_stats,
+                                      simulate_new_rebase, simulate_old_rebase)
+
+CHUNK_CASES = 1_000_000
+DESIGNS = ("model", "spec", "old")
+ERROR_BINS = np.concatenate(([0.0, 1.0], np.logspace(1, 12, 12)))   # |error| uMHR
+
+# Random history shape (per case)
+MEAN_SHARED_PRE = 3.0                 # pre-rebase settlements both sides saw
+MEAN_UNIQUE_PRE = 1.5                 # pre-rebase settlements one side saw
+MEAN_POST = 2.0                       # post-rebase settlements per side
+MAX_AMOUNT_uMHR = 100_000
+
+
+# --- VECTORIZED MODELS ------------------------------------------------------
+
+def new_rebase_merged(bal_A, post_A, bal_B, post_B):
+    """simulate_new_rebase over arrays. post_X = (earned, spent) sums."""
+    (earned_A, spent_A), (earned_B, spent_B) = post_A, post_B
+    same = earned_A + earned_B - spent_A - spent_B
+    # Case 2: winner's base + winner's deltas + loser's deltas via proofs
+    a_wins = bal_A >= bal_B
+    winning_base = np.where(a_wins, bal_A, bal_B)
+    different = winning_base + earned_A + earned_B - spent_A - spent_B
+    return np.where(bal_A == bal_B, bal_A + same, different)
+
+
+def model_true_balance(bal_A, post_A, bal_B, post_B):
+    """_true_balance over arrays: higher base plus both sides' deltas."""
+    (earned_A, spent_A), (earned_B, spent_B) = post_A, post_B
+    return np.maximum(bal_A, bal_B) + earned_A + earned_B - spent_A - spent_B
+
+
+def old_rebase_merged(bal_A, post_A, bal_B, post_B):
+    """simulate_old_rebase over arrays."""
+    (earned_A, spent_A), (earned_B, spent_B) = post_A, post_B
+    return np.maximum(bal_A + earned_A, bal_B + earned_B) - np.maximum(spent_A, spent_B)
+
+
+# --- RANDOM HISTORIES -------------------------------------------------------
+
+def _settlement_sums(rng, counts):
+    """Per-case (earned, spent, net) sums of `counts` random settlements."""
+    total = int(counts.sum())
+    case = np.repeat(np.arange(len(counts)), counts)
+    amount = rng.integers(1, MAX_AMOUNT_uMHR + 1, total)
+    is_earn = rng.random(total) < 0.5
+    n = len(counts)
+    earned = np.bincount(case, np.where(is_earn, amount, 0), n).astype(np.int64)
+    spent = np.bincount(case, np.where(is_earn, 0, amount), n).astype(np.int64)
+    return earned, spent, earned - spent
+
+
+def random_histories(rng, n):
+    """n random partition histories as per-case integer arrays."""
+    B0 = rng.integers(0, 10**9, n)
+    _, _, shared = _settlement_sums(rng, rng.poisson(MEAN_SHARED_PRE, n))
+    unique_A_count = rng.poisson(MEAN_UNIQUE_PRE, n)
+    unique_B_count = rng.poisson(MEAN_UNIQUE_PRE, n)
+    _, _, unique_A = _settlement_sums(rng, unique_A_count)
+    _, _, unique_B = _settlement_sums(rng, unique_B_count)
+    post_A = _settlement_sums(rng, rng.poisson(MEAN_POST, n))[:2]
+    post_B = _settlement_sums(rng, rng.poisson(MEAN_POST, n))[:2]
+    return {
+        "bal_A": B0 + shared + unique_A, "bal_B": B0 + shared + unique_B,
+        "unique_A": unique_A, "unique_B": unique_B,
+        "unique_A_count": unique_A_count, "unique_B_count": unique_B_count,
+        "post_A": post_A, "post_B": post_B,
+        "truth": (B0 + shared + unique_A + unique_B
+                  + post_A[0] - post_A[1] + post_B[0] - post_B[1]),
+    }
+
+
+def merged_balances(h, rng):
+    """{design: merged balance array} for one batch of histories."""
+    model = new_rebase_merged(h["bal_A"], h["post_A"], h["bal_B"], h["post_B"])
+
+    # Spec: settlement proofs re-apply the loser's unique pre-rebase
+    # settlements (equal balances can still hide distinct settlements, so
+    # ties go to A); a proof is lost only on an uncaught bloom false positive
+    a_wins = h["bal_A"] >= h["bal_B"]
+    losing_net = np.where(a_wins, h["unique_B"], h["unique_A"])
+    losing_count = np.where(a_wins, h["unique_B_count"], h["unique_A_count"])
+    p_lost = BLOOM_FPR * (1 - bloom_filter_stats(1)["p_caught_in_window"])
+    lost = rng.binomial(losing_count, p_lost)
+    # Lost proofs are rare; draw their signed amounts only where they occur
+    lost_net = np.zeros(len(lost), dtype=np.int64)
+    hit = np.flatnonzero(lost)
+    lost_net[hit] = _settlement_sums(rng, lost[hit])[2]
+    spec = (np.maximum(h["bal_A"], h["bal_B"]) + losing_net - lost_net
+            + h["post_A"][0] - h["post_A"][1] + h["post_B"][0] - h["post_B"][1])
+
+    old = old_rebase_merged(h["bal_A"], h["post_A"], h["bal_B"], h["post_B"])
+    return {"model": model, "spec": spec, "old": old}
+
+
+# --- STREAMING AGGREGATION --------------------------------------------------
+
+def _summarize(errors):
+    magnitude = np.minimum(np.abs(errors).astype(np.float64), ERROR_BINS[-1])
+    return {
+        "cases": len(errors),
+        "wrong": int(np.count_nonzero(errors)),
+        "sum": float(errors.sum()),
+        "sum_abs": float(magnitude.sum()),
+        "max_abs": float(np.abs(errors).max(initial=0)),
+        "hist": np.histogram(magnitude, ERROR_BINS)[0],
+    }
+
+
+def _combine(a, b):
+    return {
+        "cases": a["cases"] + b["cases"], "wrong": a["wrong"] + b["wrong"],
+        "sum": a["sum"] + b["sum"], "sum_abs": a["sum_abs"] + b["sum_abs"],
+        "max_abs": max(a["max_abs"], b["max_abs"]), "hist": a["hist"] + b["hist"],
+    }
+
+
+def run_chunk(seed_seq, n):
+    """Simulate n histories on one RNG stream; returns per-design summaries."""
+    rng = np.random.default_rng(seed_seq)
+    histories = random_histories(rng, n)
+    merged = merged_balances(histories, rng)
+    summary = {d: _summarize(merged[d] - histories["truth"]) for d in DESIGNS}
+    summary["model_vs_scalar_truth"] = _summarize(
+        merged["model"] - model_true_balance(histories["bal_A"], histories["post_A"],
+                                             histories["bal_B"], histories["post_B"]))
+    return summary
+
+
+def run_harness(n_cases, seed=0, chunk_cases=CHUNK_CASES, workers=None):
+    """Run n_cases histories in parallel chunks; returns merged summaries."""
+    sizes = [min(chunk_cases, n_cases - start) for start in range(0, n_cases, chunk_cases)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    total = None
+    if workers == 1 or len(sizes) == 1:
+        results = (run_chunk(s, n) for s, n in zip(streams, sizes))
+        for part in results:
+            total = part if total is None else {k: _combine(total[k], part[k]) for k in total}
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(run_chunk, streams, sizes):
+            total = part if total is None else {k: _combine(total[k], part[k]) for k in total}
+    return total
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=10_000_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MEHR NETWORK -- MONTE CARLO REBASE CORRECTNESS")
+    print("=" * 70)
+
+    # The vectorized model must reproduce the scalar functions
+    rng = np.random.default_rng(args.seed)
+    sample = random_histories(rng, 2_000)
+    mismatches = 0
+    for i in range(2_000):
+        bal_A, bal_B = int(sample["bal_A"][i]), int(sample["bal_B"][i])
+        s_a = [{"earned": int(sample["post_A"][0][i]), "spent": int(sample["post_A"][1][i])}]
+        s_b = [{"earned": int(sample["post_B"][0][i]), "spent": int(sample["post_B"][1][i])}]
+        for scalar, vector in [(simulate_new_rebase, new_rebase_merged),
+                               (simulate_old_rebase, old_rebase_merged)]:
+            expected = scalar(bal_A, s_a, bal_B, s_b)["merged_balance"]
+            got = vector(sample["bal_A"][i], (sample["post_A"][0][i], sample["post_A"][1][i]),
+                         sample["bal_B"][i], (sample["post_B"][0][i], sample["post_B"][1][i]))
+            mismatches += int(got != expected)
+    print(f"\n  Vectorized vs scalar simulate_new/old_rebase (2,000 cases): "
+          f"{mismatches} mismatches")
+
+    workers = args.workers or os.cpu_count()
+    t0 = time.perf_counter()
+    summary = run_harness(args.cases, args.seed, workers=workers)
+    elapsed = time.perf_counter() - t0
+    print(f"  {args.cases:,} histories in {elapsed:.1f}s on {workers} worker(s) "
+          f"({args.cases / elapsed:,.0f} cases/s)")
+
+    print(f"\n  Merged balance vs full-history truth:")
+    print(f"  {'Design':<8s}  {'Wrong':>14s}  {'Mean error':>12s}  {'Mean |err|':>12s}  "
+          f"{'Max |err|':>12s}")
+    print(f"  {'-'*8}  {'-'*14}  {'-'*12}  {'-'*12}  {'-'*12}")
+    for design in DESIGNS:
+        s = summary[design]
+        print(f"  {design:<8s}  {s['wrong'] / s['cases']:>13.6%}  {s['sum'] / s['cases']:>12.1f}  "
+              f"{s['sum_abs'] / s['cases']:>12.1f}  {s['max_abs']:>12,.0f}")
+    print(f"  model vs _true_balance: {summary['model_vs_scalar_truth']['wrong']} wrong")
+
+    labels = ["0"] + [f"<{e:.0e}" for e in ERROR_BINS[2:]]
+    print(f"\n  |error| distribution (uMHR):")
+    print(f"  {'bin':>8s}  " + "  ".join(f"{d:>12s}" for d in DESIGNS))
+    for j, label in enumerate(labels):
+        counts = [summary[d]["hist"][j] for d in DESIGNS]
+        if any(counts):
+            print(f"  {label:>8s}  " + "  ".join(f"{c:>12,d}" for c in counts))
+
+    if mismatches or summary["model_vs_scalar_truth"]["wrong"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
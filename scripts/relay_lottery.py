@@ -0,0 +1,259 @@
+"""
+Mehr Network -- VRF Relay Lottery Income Monte Carlo
+
+double_spend_analysis.relay_income_per_epoch uses only the expected
+value of relay income (PER_PACKET_COST_uMHR per packet). Relays are
+actually paid by the VRF lottery (payment-channels.md): each relayed
+packet wins with probability p and a win pays PER_PACKET_COST_uMHR / p.
+The mean is the same, but income arrives in lumps. This module samples
+the payout streams so cost_of_cheating can be priced against income
+percentiles, not just the mean.
+
+Difficulty (payment-channels.md, Adaptive Difficulty):
+  win_probability = TARGET_UPDATES_PER_MIN / observed_packets_per_minute
+  clamped to [MIN_WIN_PROB, MAX_WIN_PROB], where observed is the trailing
+  TRAFFIC_WINDOW_MIN moving average. adaptive=False uses the fixed
+  LOTTERY_WIN_PROB.
+
+Two samplers, both batched over relays:
+  - lottery_income: total income over any horizon with one binomial
+    draw per relay (the sum of independent Bernoulli wins at a steady
+    difficulty is binomial), so 10^6 relays x a year cost one pass
+  - payout_stream: minute by minute with Poisson traffic and the
+    trailing-average difficulty, for per-epoch variance and the
+    difficulty dynamics themselves
+
+Epochs are simulated in real time: EPOCH_DURATION_MIN minutes of
+traffic each, so NETWORK_LIFETIME_EPOCHS is one year. relay_income_per_epoch
+counts packets_per_min x 60 x EPOCH_DURATION_MIN packets per epoch, i.e.
+INCOME_MODEL_SCALE real epochs of traffic; expected_income divides that
+factor out, and cost_of_cheating_quantiles multiplies it back in so its
+percentiles compare with the mean-model cost_of_cheating. Like that
+function, income is gross (before the 2% service burn).
+"""
+
+import time
+import numpy as np
+
+from double_spend_analysis import (EPOCH_DURATION_MIN, LOTTERY_PAYOUT_uMHR,
+                                   LOTTERY_WIN_PROB, NETWORK_LIFETIME_EPOCHS,
+                                   PACKETS_PER_MIN_DEFAULT, PER_PACKET_COST_uMHR,
+                                   cost_of_cheating, relay_income_per_epoch)
+
+# --- PROTOCOL CONSTANTS (from spec) -----------------------------------------
+
+TARGET_UPDATES_PER_MIN = 0.1            # payment-channels.md: one update per ~10 min
+MIN_WIN_PROB = 1 / 10_000               # payment-channels.md: difficulty clamp
+MAX_WIN_PROB = 1 / 5
+TRAFFIC_WINDOW_MIN = 5                  # payment-channels.md: trailing 5-minute average
+
+# --- SIMULATION ASSUMPTIONS -------------------------------------------------
+
+MINUTES_PER_EPOCH = EPOCH_DURATION_MIN  # traffic minutes per simulated epoch
+INCOME_MODEL_SCALE = (relay_income_per_epoch(1.0)      # real epochs of traffic per
+                      / (MINUTES_PER_EPOCH * PER_PACKET_COST_uMHR))  # model epoch (60)
+RELAY_CHUNK = 250_000                   # relays per payout_stream batch
+
+
+# --- DIFFICULTY -------------------------------------------------------------
+
+def win_probability(packets_per_min, adaptive=True):
+    """Per-packet win probability; accepts scalars or arrays. No observed
+    traffic prices at MAX_WIN_PROB."""
+    ppm = np.asarray(packets_per_min, dtype=float)
+    if not adaptive:
+        return np.full(ppm.shape, LOTTERY_WIN_PROB)
+    with np.errstate(divide="ignore"):
+        p = TARGET_UPDATES_PER_MIN / np.maximum(ppm, 0.0)
+    return np.clip(p, MIN_WIN_PROB, MAX_WIN_PROB)
+
+
+def payout_per_win(p):
+    """Reward on a win: per_packet_cost x (1 / win_probability)."""
+    return PER_PACKET_COST_uMHR / np.asarray(p, dtype=float)
+
+
+def expected_income(packets_per_min, n_epochs=1):
+    """Expected income (uMHR) over n_epochs real epochs:
+    relay_income_per_epoch with the INCOME_MODEL_SCALE factor divided out."""
+    return relay_income_per_epoch(packets_per_min) / INCOME_MODEL_SCALE * n_epochs
+
+
+# --- SAMPLERS ---------------------------------------------------------------
+
+def lottery_income(packets_per_min, n_epochs, n_relays=None, adaptive=True,
+                   rng=None):
+    """Total lottery income (uMHR) per relay over n_epochs.
+
+    packets_per_min is a scalar or one rate per relay; n_relays sets the
+    batch size for a scalar rate. Every relay relays its expected packet
+    count (as relay_income_per_epoch) at its steady-state difficulty, so
+    wins ~ Binomial(packets, p). n_epochs may be an array broadcastable
+    against the relays.
+    """
+    rng = np.random.default_rng(rng)
+    ppm = np.asarray(packets_per_min, dtype=float)
+    if n_relays is not None:
+        ppm = np.broadcast_to(ppm, (n_relays,))
+    packets = np.rint(ppm * MINUTES_PER_EPOCH * np.asarray(n_epochs)).astype(np.int64)
+    p = np.broadcast_to(win_probability(ppm, adaptive), packets.shape)
+    return rng.binomial(packets, p) * payout_per_win(p)
+
+
+def payout_stream(packets_per_min, n_epochs, n_relays=None, adaptive=True,
+                  rng=None, chunk=RELAY_CHUNK):
+    """Per-epoch lottery income (uMHR), shape (relays, n_epochs).
+
+    Each minute a relay sees Poisson(packets_per_min) packets, prices them
+    at the difficulty of its trailing TRAFFIC_WINDOW_MIN average (seeded
+    with the nominal rate), and wins Binomial(packets, p) payouts.
+
+    Returns a dict with:
+        income: per-epoch income, shape (relays, n_epochs)
+        first_win_min: minute of each relay's first win (inf if none)
+        win_prob: mean difficulty each relay ran at
+    """
+    rng = np.random.default_rng(rng)
+    ppm = np.asarray(packets_per_min, dtype=float)
+    ppm = np.broadcast_to(ppm, (n_relays,) if n_relays is not None else ppm.shape)
+    n = len(ppm)
+    income = np.zeros((n, n_epochs))
+    first_win = np.full(n, np.inf)
+    win_prob = np.zeros(n)
+    minutes = n_epochs * MINUTES_PER_EPOCH
+    for lo in range(0, n, chunk):
+        rate = ppm[lo:lo + chunk]
+        window = np.repeat(rate[:, None], TRAFFIC_WINDOW_MIN, axis=1)
+        total = window.sum(axis=1)
+        first = first_win[lo:lo + chunk]
+        for minute in range(minutes):
+            p = win_probability(total / TRAFFIC_WINDOW_MIN, adaptive)
+            packets = rng.poisson(rate)
+            wins = rng.binomial(packets, p)
+            income[lo:lo + chunk, minute // MINUTES_PER_EPOCH] += wins * payout_per_win(p)
+            first[(wins > 0) & np.isinf(first)] = minute
+            win_prob[lo:lo + chunk] += p
+            slot = minute % TRAFFIC_WINDOW_MIN
+            total += packets - window[:, slot]
+            window[:, slot] = packets
+    return {"income": income, "first_win_min": first_win, "win_prob": win_prob / minutes}
+
+
+def first_payout_minutes(packets_per_min, n_relays, adaptive=True, rng=None):
+    """Minutes until each relay's first win: with Poisson traffic thinned
+    by p, the wait is exponential with rate packets_per_min x p."""
+    rng = np.random.default_rng(rng)
+    ppm = np.broadcast_to(np.asarray(packets_per_min, dtype=float), (n_relays,))
+    return rng.exponential(1.0 / (ppm * win_probability(ppm, adaptive)))
+
+
+# --- INCOME PERCENTILES -----------------------------------------------------
+
+def income_quantiles(packets_per_min, n_epochs, qs=(0.01, 0.1, 0.5, 0.9, 0.99),
+                     n_relays=1_000_000, adaptive=True, rng=None):
+    """Quantiles of total income over n_epochs across n_relays relays."""
+    return np.quantile(lottery_income(packets_per_min, n_epochs, n_relays,
+                                      adaptive, rng), qs)
+
+
+def cost_of_cheating_quantiles(T_invested_epochs, qs=(0.01, 0.5, 0.99),
+                               packets_per_min=PACKETS_PER_MIN_DEFAULT,
+                               n_relays=1_000_000, adaptive=True, rng=None):
+    """cost_of_cheating priced at income percentiles instead of the mean.
+
+    The cost counts the income of the T invested epochs plus the remaining
+    lifetime, so each relay's sampled income over that horizon is converted
+    to a per-epoch rate, scaled by INCOME_MODEL_SCALE to the epoch income
+    relay_income_per_epoch models, and passed to cost_of_cheating. Returns
+    shape (len(T), len(qs)).
+    """
+    rng = np.random.default_rng(rng)
+    T = np.atleast_1d(np.asarray(T_invested_epochs))
+    horizon = np.maximum(NETWORK_LIFETIME_EPOCHS - T, 0) + T
+    out = np.empty((len(T), len(qs)))
+    for i, (t, h) in enumerate(zip(T, horizon)):
+        income = np.quantile(lottery_income(packets_per_min, h, n_relays, adaptive, rng), qs)
+        out[i] = cost_of_cheating(t, packets_per_min,
+                                  income_per_epoch=income / h * INCOME_MODEL_SCALE)
+    return out
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- VRF RELAY LOTTERY INCOME")
+    print("=" * 70)
+    print(f"\n  Fixed difficulty: p = 1/{1 / LOTTERY_WIN_PROB:.0f}, "
+          f"payout {LOTTERY_PAYOUT_uMHR} uMHR")
+    print(f"  Adaptive: p = {TARGET_UPDATES_PER_MIN}/ppm clamped to "
+          f"[1/{1 / MIN_WIN_PROB:.0f}, 1/{1 / MAX_WIN_PROB:.0f}], "
+          f"{TRAFFIC_WINDOW_MIN}-min trailing average")
+
+    # Per-epoch income and first payout across traffic levels
+    print(f"  {MINUTES_PER_EPOCH}-minute epochs; relay_income_per_epoch models "
+          f"{INCOME_MODEL_SCALE:.0f} epochs of traffic per epoch")
+    n_relays, n_epochs = 10_000, 144
+    print(f"\n  Per-epoch income, {n_relays:,} relays x {n_epochs} epochs "
+          f"(minute-level Poisson traffic):")
+    print(f"  {'ppm':>6s}  {'mode':>8s}  {'mean p':>8s}  {'EV/epoch':>9s}  {'mean':>9s}  "
+          f"{'CV':>6s}  {'P(zero)':>8s}  {'1st win':>8s}")
+    print(f"  {'-'*6}  {'-'*8}  {'-'*8}  {'-'*9}  {'-'*9}  {'-'*6}  {'-'*8}  {'-'*8}")
+    ok = True
+    rng = np.random.default_rng(1)
+    for ppm in [0.1, 1, 10, 100]:
+        for adaptive in (False, True):
+            s = payout_stream(ppm, n_epochs, n_relays, adaptive, rng)
+            income = s["income"]
+            ev = expected_income(ppm)
+            mean = income.mean()
+            se = income.std() / np.sqrt(income.size)
+            ok &= bool(abs(mean - ev) < 5 * se + 1e-9)
+            print(f"  {ppm:>6g}  {'adaptive' if adaptive else 'fixed':>8s}  "
+                  f"{s['win_prob'].mean():>8.4f}  {ev:>9,.0f}  {mean:>9,.0f}  "
+                  f"{income.std() / ev:>6.2f}  {(income == 0).mean():>8.1%}  "
+                  f"{np.median(s['first_win_min']):>6.0f}m")
+    print(f"  Monte Carlo means match expected_income (5 s.e.): {ok}")
+
+    # One-draw sampler agrees with the minute-level stream at steady traffic
+    stream = payout_stream(10, 3, 10_000, True, rng)["income"].sum(axis=1)
+    fast = lottery_income(10, 3, 10_000, True, rng)
+    ok_fast = bool(abs(stream.mean() - fast.mean()) < 0.02 * fast.mean()
+                   and abs(stream.std() / fast.std() - 1) < 0.1)
+    print(f"\n  3-epoch totals, stream vs one binomial draw: mean "
+          f"{stream.mean():,.0f} / {fast.mean():,.0f}, std {stream.std():,.0f} / "
+          f"{fast.std():,.0f}  (agree: {ok_fast})")
+
+    # 10^6 relays: year income quantiles and cost-of-cheating percentiles
+    t0 = time.perf_counter()
+    qs = (0.01, 0.5, 0.99)
+    print(f"\n  1,000,000 relays, income quantiles vs expected value:")
+    print(f"  {'ppm':>6s}  {'horizon':>8s}  {'EV':>14s}  {'p1':>14s}  {'p50':>14s}  {'p99':>14s}")
+    print(f"  {'-'*6}  {'-'*8}  {'-'*14}  {'-'*14}  {'-'*14}  {'-'*14}")
+    for ppm in [0.1, 10]:
+        for label, epochs in [("1 epoch", 1), ("1 day", 144), ("1 year", NETWORK_LIFETIME_EPOCHS)]:
+            q = income_quantiles(ppm, epochs, qs, adaptive=True, rng=rng)
+            ev = expected_income(ppm, epochs)
+            print(f"  {ppm:>6g}  {label:>8s}  {ev:>14,.0f}  " + "  ".join(f"{v:>14,.0f}" for v in q))
+
+    print(f"\n  Time to first payout, 1,000,000 relays (minutes, median / p99):")
+    for ppm in [0.1, 1, 10, 100]:
+        cells = [first_payout_minutes(ppm, 1_000_000, adaptive, rng) for adaptive in (False, True)]
+        print(f"  {ppm:>6g} ppm:  fixed {np.median(cells[0]):>7.1f} / {np.quantile(cells[0], 0.99):>7.1f}"
+              f"   adaptive {np.median(cells[1]):>6.1f} / {np.quantile(cells[1], 0.99):>6.1f}")
+
+    T = [10, 100, 1_000]
+    costs = cost_of_cheating_quantiles(T, qs, rng=rng)
+    print(f"\n  Cost of cheating at income percentiles (ppm={PACKETS_PER_MIN_DEFAULT}, adaptive):")
+    print(f"  {'T':>6s}  {'mean model':>14s}  {'p1':>14s}  {'p50':>14s}  {'p99':>14s}")
+    print(f"  {'-'*6}  {'-'*14}  {'-'*14}  {'-'*14}  {'-'*14}")
+    for t, row in zip(T, costs):
+        print(f"  {t:>6d}  {cost_of_cheating(t):>14,.0f}  " + "  ".join(f"{v:>14,.0f}" for v in row))
+    print(f"  (all 1,000,000-relay quantiles above: {time.perf_counter() - t0:.1f}s)")
+
+    if not (ok and ok_fast):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""
+Mehr Network -- Content-Addressed Simulation Result Cache
+
+Memoizes the simulation kernels across runs. A result is stored as one
+NPZ file under <output dir>/.cache, named by a SHA-256 key over:
+  - the kernel's source, plus the source of every function and class in
+    this directory it reaches through its globals (transitively), so an
+    edit to partition_engine invalidates simulate_partition
+  - the values of the module-level constants those functions read
+    (BURN_RATE, uMHR_SCHEDULE, ...)
+  - the bound call arguments, defaults applied
+  - the NumPy version
+Editing prose, plot styling or any unrelated function leaves the key
+unchanged; editing a protocol constant or kernel changes it.
+
+Figures are cached the same way by cached_figure: the PNGs a plot builder
+writes are stored beside the NPZ files under the same kind of key (plus
+the matplotlib version), and a hit copies them into the output directory
+without rendering.
+
+Results may be arrays, Python/NumPy scalars, strings, None, and tuples,
+lists or dicts of those; anything else (or any argument that cannot be
+hashed by value) is computed without caching. Hits refresh the files'
+mtimes and writes evict the least recently used files past
+MAX_CACHE_BYTES.
+
+Environment:
+    MEHR_CACHE=0              disable the cache (benchmarks do)
+    MEHR_CACHE_MAX_BYTES=N    LRU size limit (default 256 MB)
+"""
+
+import filecmp
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import linecache
+import os
+import shutil
+import tempfile
+import time
+import types
+
+import numpy as np
+
+from output_paths import output_dir, output_path
+
+CACHE_ENV = "MEHR_CACHE"
+MAX_BYTES_ENV = "MEHR_CACHE_MAX_BYTES"
+MAX_CACHE_BYTES = 256 * 2**20
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+stats = {"hits": 0, "misses": 0, "uncacheable": 0}
+
+
+def cache_dir():
+    path = os.path.join(output_dir(), ".cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_enabled():
+    return os.environ.get(CACHE_ENV, "1") != "0"
+
+
+# --- KEYS -------------------------------------------------------------------
+
+def _local(obj):
+    """Defined in a module of this directory."""
+    try:
+        return os.path.dirname(os.path.abspath(inspect.getfile(obj))) == SCRIPTS_DIR
+    except TypeError:
+        return False
+
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _last_line(code):
+    lines = [end for _, end, _, _ in code.co_positions() if end is not None]
+    lines += [_last_line(c) for c in code.co_consts if isinstance(c, types.CodeType)]
+    return max(lines, default=code.co_firstlineno)
+
+
+def _source(obj):
+    """Source of obj. Functions are read from their code's line range:
+    inspect.getsource tokenizes the file to find the block, which was most
+    of the time of a run served from the cache."""
+    code = getattr(obj, "__code__", None)
+    if code is None:
+        return inspect.getsource(obj)
+    lines = linecache.getlines(code.co_filename)
+    if not lines:
+        raise OSError(f"no source for {obj!r}")
+    return "".join(lines[code.co_firstlineno - 1:_last_line(code)])
+
+
+def _hash_value(h, value):
+    """Feed a value into h by content; TypeError if it has no stable form."""
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, (tuple, list)):
+        h.update(f"{type(value).__name__}[{len(value)}];".encode())
+        for item in value:
+            _hash_value(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict[{len(value)}];".encode())
+        for key in sorted(value, key=repr):
+            _hash_value(h, key)
+            _hash_value(h, value[key])
+    elif isinstance(value, (np.ndarray, np.generic)):
+        value = np.asarray(value)
+        if value.dtype == object:
+            raise TypeError("object arrays are not hashable by content")
+        h.update(f"ndarray:{value.dtype.str}:{value.shape};".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, np.dtype):
+        h.update(f"dtype:{value.str};".encode())
+    elif _local(type(value)):
+        h.update(f"{type(value).__qualname__}:".encode())
+        _hash_value(h, vars(value))
+    else:
+        raise TypeError(f"cannot hash {type(value).__name__} by content")
+
+
+def _hash_code(h, obj, seen):
+    """Source of obj plus everything local it reaches through its globals."""
+    obj = inspect.unwrap(obj)
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    h.update(_source(obj).encode())
+    if isinstance(obj, type):
+        for member in vars(obj).values():
+            if isinstance(member, (staticmethod, classmethod)):
+                member = member.__func__
+            if isinstance(member, types.FunctionType):
+                _hash_code(h, member, seen)
+        return
+    for name in sorted(_code_names(obj.__code__)):
+        if name not in obj.__globals__:
+            continue
+        value = obj.__globals__[name]
+        if isinstance(value, types.ModuleType):
+            continue
+        if callable(value) and not _local(type(value)):
+            if _local(value):
+                _hash_code(h, value, seen)
+            continue
+        h.update(f"{name}=".encode())
+        _hash_value(h, value)
+        if _local(type(value)):
+            _hash_code(h, type(value), seen)
+
+
+# --- NPZ ENCODING -----------------------------------------------------------
+
+def _encode(value, arrays):
+    """JSON schema node for value; arrays collects the NPZ members."""
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            raise TypeError("object arrays cannot be stored")
+        key = f"a{len(arrays)}"
+        arrays[key] = value
+        return {"t": "array", "k": key}
+    if isinstance(value, np.generic):
+        key = f"a{len(arrays)}"
+        arrays[key] = np.asarray(value)
+        return {"t": "npscalar", "k": key}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {"t": "py", "v": value}
+    if isinstance(value, (tuple, list)):
+        return {"t": type(value).__name__, "v": [_encode(v, arrays) for v in value]}
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return {"t": "dict", "v": [[k, _encode(v, arrays)] for k, v in value.items()]}
+    raise TypeError(f"cannot store {type(value).__name__}")
+
+
+def _decode(node, npz):
+    kind = node["t"]
+    if kind == "array":
+        return npz[node["k"]]
+    if kind == "npscalar":
+        return npz[node["k"]][()]
+    if kind == "py":
+        return node["v"]
+    if kind == "tuple":
+        return tuple(_decode(v, npz) for v in node["v"])
+    if kind == "list":
+        return [_decode(v, npz) for v in node["v"]]
+    return {k: _decode(v, npz) for k, v in node["v"]}
+
+
+def save_result(path, value):
+    arrays = {}
+    schema = json.dumps(_encode(value, arrays))
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, __schema__=np.array(schema), **arrays)
+        os.replace(tmp, path)      # atomic: parallel runners never see partial files
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_result(path):
+    with np.load(path) as npz:
+        return _decode(json.loads(str(npz["__schema__"])), npz)
+
+
+def evict(directory, max_bytes):
+    """Delete least recently used entries until the cache fits max_bytes."""
+    entries = []
+    for path in glob.glob(os.path.join(directory, "*")):
+        if path.endswith(".tmp"):
+            continue
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+# --- DECORATOR --------------------------------------------------------------
+
+def _prefix(fn):
+    # Named by file, not __module__, so script runs and imports share entries
+    return f"{os.path.splitext(os.path.basename(inspect.getfile(fn)))[0]}.{fn.__qualname__}"
+
+
+def _code_key(fn, versions):
+    h = hashlib.sha256(versions.encode())
+    _hash_code(h, fn, set())
+    return h.digest()
+
+
+def _call_key(code_key, signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    h = hashlib.sha256(code_key)
+    _hash_value(h, dict(bound.arguments))
+    return h.hexdigest()[:40]
+
+
+def _max_bytes():
+    return int(os.environ.get(MAX_BYTES_ENV, MAX_CACHE_BYTES))
+
+
+def cached(fn):
+    """Memoize fn on disk, keyed by its code, constants and arguments."""
+    signature = inspect.signature(fn)
+    prefix = _prefix(fn)
+    code_key = None
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        nonlocal code_key
+        if not cache_enabled():
+            return fn(*args, **kwargs)
+        try:
+            if code_key is None:
+                code_key = _code_key(fn, f"numpy {np.__version__};")
+            key = _call_key(code_key, signature, args, kwargs)
+        except (TypeError, OSError):
+            stats["uncacheable"] += 1
+            return fn(*args, **kwargs)
+
+        path = os.path.join(cache_dir(), f"{prefix}-{key}.npz")
+        try:
+            result = load_result(path)
+            os.utime(path)
+            stats["hits"] += 1
+            return result
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            pass
+
+        result = fn(*args, **kwargs)
+        stats["misses"] += 1
+        try:
+            save_result(path, result)
+        except TypeError:
+            stats["uncacheable"] += 1
+            return result
+        evict(os.path.dirname(path), _max_bytes())
+        return result
+
+    return wrapper
+
+
+# --- FIGURES ----------------------------------------------------------------
+
+def _copy_if_changed(src, dst):
+    """Copy src over dst unless dst already holds the same bytes."""
+    try:
+        if os.path.getsize(src) == os.path.getsize(dst) and filecmp.cmp(src, dst, shallow=False):
+            return
+    except FileNotFoundError:
+        pass
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def cached_figure(*filenames):
+    """Memoize a plot builder that writes filenames into output_dir().
+
+    Keyed like cached (the builder's code, the constants and functions it
+    reaches, its arguments) plus the matplotlib version. A hit copies the
+    stored files into the output directory, skipping any already identical,
+    and returns None without calling the builder, so matplotlib is never
+    imported; the builder should print nothing. A miss runs the builder and
+    stores its files under <prefix>-<key>-<filename>, then a JSON manifest
+    naming them, written last so a manifest means a complete entry.
+    """
+    def decorate(fn):
+        signature = inspect.signature(fn)
+        prefix = _prefix(fn)
+        code_key = None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            nonlocal code_key
+            if not cache_enabled():
+                return fn(*args, **kwargs)
+            import importlib.metadata      # only figure keys need it
+            try:
+                if code_key is None:
+                    versions = (f"numpy {np.__version__}; "
+                                f"matplotlib {importlib.metadata.version('matplotlib')};")
+                    code_key = _code_key(fn, versions)
+                key = _call_key(code_key, signature, args, kwargs)
+            except (TypeError, OSError, importlib.metadata.PackageNotFoundError):
+                stats["uncacheable"] += 1
+                return fn(*args, **kwargs)
+
+            directory = cache_dir()
+            manifest = os.path.join(directory, f"{prefix}-{key}.json")
+            stored = [os.path.join(directory, f"{prefix}-{key}-{name}") for name in filenames]
+            try:
+                with open(manifest) as f:
+                    json.load(f)
+                for path, name in zip(stored, filenames):
+                    _copy_if_changed(path, output_path(name))
+                for path in stored + [manifest]:
+                    os.utime(path)
+                stats["hits"] += 1
+                return None
+            except (FileNotFoundError, ValueError, KeyError, OSError):
+                pass
+
+            result = fn(*args, **kwargs)
+            stats["misses"] += 1
+            try:
+                for path, name in zip(stored, filenames):
+                    _copy_if_changed(output_path(name), path)
+            except FileNotFoundError:
+                stats["uncacheable"] += 1       # the builder did not write it
+                return result
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"files": list(filenames)}, f)
+            os.replace(tmp, manifest)
+            evict(directory, _max_bytes())
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- CONTENT-ADDRESSED RESULT CACHE")
+    print("=" * 70)
+
+    import defense_comparison
+    import double_spend_analysis
+    import result_cache          # the instance the kernels were decorated with
+    import epoch_partition_analysis
+    import isolated_partition_analysis
+    import sca_partition_analysis
+    from emission_schedule import EPOCHS_PER_YEAR
+
+    ok = True
+    # NPZ round trip keeps structure, dtypes and Python scalar types
+    sample = {"supply": np.arange(5, dtype=np.int64), "pair": (1.5, np.float32(2)),
+              "flags": [True, None, "x"], "big": 2**70}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sample.npz")
+        save_result(path, sample)
+        back = load_result(path)
+        same = (np.array_equal(back["supply"], sample["supply"])
+                and back["supply"].dtype == np.int64 and back["pair"] == sample["pair"]
+                and type(back["pair"][1]) is np.float32 and back["flags"] == sample["flags"]
+                and back["big"] == sample["big"])
+        print(f"\n  NPZ round trip of a nested result: {same}")
+        ok &= same
+
+    kernels = [
+        ("isolated.simulate_partition", isolated_partition_analysis.simulate_partition,
+         (100, 1.0, 5 * EPOCHS_PER_YEAR)),
+        ("sca.simulate_sca_attack", sca_partition_analysis.simulate_sca_attack,
+         (100, 1.0, 1_000, 5 * EPOCHS_PER_YEAR)),
+        ("double_spend.sweep_grid", double_spend_analysis.sweep_grid,
+         ((10, 100, 1_000), (1, 10, 100), (1_000, 100_000), (100, 10_000), (10,), (0,),
+          None, double_spend_analysis.realized_gain_table())),
+        ("defense.approach_a_dilution", defense_comparison.approach_a_dilution, (5, 0.1)),
+        ("epoch.overminting", epoch_partition_analysis.overminting, (3, 1_000_000)),
+    ]
+    print(f"\n  {'Kernel':<32s}  {'Compute':>9s}  {'Cached':>9s}  {'Identical':>9s}")
+    print(f"  {'-'*32}  {'-'*9}  {'-'*9}  {'-'*9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MEHR_OUTPUT_DIR"] = tmp
+        for name, fn, args in kernels:
+            t0 = time.perf_counter()
+            fresh = fn(*args)
+            t1 = time.perf_counter()
+            again = fn(*args)
+            t2 = time.perf_counter()
+            ref = fn.__wrapped__(*args)
+            identical = all(np.array_equal(a, b) for a, b in zip(
+                _leaves(ref), _leaves(again))) and len(_leaves(ref)) == len(_leaves(again))
+            ok &= identical and np.array_equal(_leaves(fresh)[0], _leaves(ref)[0])
+            print(f"  {name:<32s}  {(t1 - t0) * 1e3:>7.2f}ms  {(t2 - t1) * 1e3:>7.2f}ms  "
+                  f"{str(identical):>9s}")
+
+        # LRU: a hit refreshes the first kernel's entry, so a budget one
+        # byte short evicts the second kernel's (now least recent) entry
+        name, fn, args = kernels[0]
+        fn(*args)
+        entries = sorted(glob.glob(os.path.join(cache_dir(), "*.npz")), key=os.path.getmtime)
+        evict(cache_dir(), sum(os.path.getsize(p) for p in entries) - 1)
+        left = set(glob.glob(os.path.join(cache_dir(), "*.npz")))
+        lru_ok = entries[0] not in left and entries[-1] in left and len(left) < len(entries)
+        print(f"\n  LRU eviction: {len(entries)} -> {len(left)} entries, "
+              f"least recent evicted, {name} kept: {lru_ok}")
+        ok &= lru_ok
+
+        # Figures: a hit restores a deleted output without running the builder
+        calls = []
+
+        @cached_figure("sample.png")
+        def draw(scale):
+            calls.append(scale)
+            with open(output_path("sample.png"), "wb") as f:
+                f.write(bytes(range(256)) * scale)
+
+        draw(3)
+        os.unlink(output_path("sample.png"))
+        draw(3)
+        with open(output_path("sample.png"), "rb") as f:
+            restored = f.read() == bytes(range(256)) * 3
+        draw(4)
+        fig_ok = restored and calls == [3, 4]
+        print(f"  Figure cache: restored without redrawing, new arguments redrawn: {fig_ok}")
+        ok &= fig_ok
+        del os.environ["MEHR_OUTPUT_DIR"]
+
+    stats = result_cache.stats
+    print(f"  hits {stats['hits']}, misses {stats['misses']}, uncacheable {stats['uncacheable']}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def _leaves(value):
+    if isinstance(value, dict):
+        return [leaf for v in value.values() for leaf in _leaves(v)]
+    if isinstance(value, (tuple, list)):
+        return [leaf for v in value for leaf in _leaves(v)]
+    return [value]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Mehr Network -- Parallel Runner for the Docs Analyses
+
+Discovers the analysis scripts in this directory (*_analysis.py and
+*_comparison.py), runs each one as __main__ in its own worker process of
+a process pool, and writes every figure and table to one output
+directory (output_paths.OUTPUT_ENV, default scripts/output). Each
+script's console output goes to <name>.log in that directory, and a
+per-analysis timing table is printed at the end. With at least as many
+workers (and CPUs) as analyses, total wall time is that of the slowest
+analysis.
+
+Usage (from the repository root):
+    python -m scripts.run_all
+    python -m scripts.run_all --workers 2 --output-dir /tmp/mehr-out
+    python -m scripts.run_all --only partition
+    python -m scripts.run_all --no-plots       # tables only
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYSIS_PATTERNS = ("*_analysis.py", "*_comparison.py")
+PRELOAD_MODULES = ["numpy", "output_paths", "result_cache"]
+
+
+def discover_analyses(scripts_dir=SCRIPTS_DIR):
+    """{name: path} of the analysis scripts, sorted by name."""
+    paths = [p for pattern in ANALYSIS_PATTERNS
+             for p in glob.glob(os.path.join(scripts_dir, pattern))]
+    return {os.path.splitext(os.path.basename(p))[0]: p for p in sorted(paths)}
+
+
+def run_analysis(path, output_dir, args=()):
+    """Run one script as __main__ with command-line args; returns (seconds,
+    error or None). Console output is written to <output_dir>/<name>.log."""
+    from output_paths import OUTPUT_ENV
+    os.environ[OUTPUT_ENV] = output_dir
+    sys.argv = [path, *args]
+    name = os.path.splitext(os.path.basename(path))[0]
+    log = io.StringIO()
+    error = None
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            runpy.run_path(path, run_name="__main__")
+        except SystemExit as exc:
+            if exc.code not in (None, 0):
+                error = f"exit {exc.code}"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+    elapsed = time.perf_counter() - t0
+    with open(os.path.join(output_dir, f"{name}.log"), "w") as f:
+        f.write(log.getvalue())
+    return elapsed, error
+
+
+def _init_worker(scripts_dir):
+    # Analyses import their siblings as top-level modules
+    sys.path.insert(0, scripts_dir)
+
+
+def _worker_context():
+    """Forkserver where available, with NumPy and the shared modules
+    imported once in the server: each worker is a fork of that clean
+    process, so it starts in milliseconds instead of re-importing them,
+    which is most of the time of a run served from the result cache."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def run_all(analyses, output_dir, workers=None, args=()):
+    """Run {name: path} concurrently, passing args to each; returns
+    {name: (seconds, error)}."""
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    # One fresh process per analysis: no module state or pyplot figures
+    # leak from one script into the next
+    workers = workers or min(len(analyses), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=_worker_context(),
+                             initializer=_init_worker, initargs=(SCRIPTS_DIR,),
+                             max_tasks_per_child=1) as pool:
+        futures = {pool.submit(run_analysis, path, output_dir, args): name
+                   for name, path in analyses.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name] = future.result()
+            elapsed, error = results[name]
+            print(f"  {'FAILED' if error else 'done':>6s}  {name:<32s} {elapsed:>7.1f}s"
+                  + (f"  ({error})" if error else ""), flush=True)
+    return results
+
+
+def main():
+    sys.path.insert(0, SCRIPTS_DIR)
+    from output_paths import DEFAULT_OUTPUT_DIR, OUTPUT_ENV
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per analysis, up to the CPU count)")
+    parser.add_argument("--output-dir", default=os.environ.get(OUTPUT_ENV) or DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--only", default="", help="run analyses whose name contains this")
+    parser.add_argument("--no-plots", action="store_true", help="write the tables only")
+    args = parser.parse_args()
+
+    analyses = {name: path for name, path in discover_analyses().items() if args.only in name}
+    output_dir = os.path.abspath(args.output_dir)
+
+    print("=" * 70)
+    print("MEHR NETWORK -- RUN ALL ANALYSES")
+    print("=" * 70)
+    print(f"\n  {len(analyses)} analyses -> {output_dir}\n")
+
+    t0 = time.perf_counter()
+    results = run_all(analyses, output_dir, args.workers,
+                      ["--no-plots"] if args.no_plots else [])
+    wall = time.perf_counter() - t0
+
+    print(f"\n  {'Analysis':<32s}  {'Time':>8s}  {'Status':<6s}")
+    print(f"  {'-'*32}  {'-'*8}  {'-'*6}")
+    for name in analyses:
+        elapsed, error = results[name]
+        print(f"  {name:<32s}  {elapsed:>7.1f}s  {'FAILED' if error else 'ok':<6s}")
+    total = sum(elapsed for elapsed, _ in results.values())
+    slowest = max((elapsed for elapsed, _ in results.values()), default=0.0)
+    print(f"\n  Wall {wall:.1f}s  (sum of analyses {total:.1f}s, slowest {slowest:.1f}s)")
+
+    if any(error for _, error in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
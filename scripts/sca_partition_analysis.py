@@ -23,61 +23,26 @@ All constants from the Mehr protocol specification.
 import math
 import os
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 
-# -- PROTOCOL CONSTANTS -------------------------------------------------------
-
-INITIAL_EPOCH_REWARD = 10**6       # MHR per epoch
-HALVING_INTERVAL     = 100_000     # epochs per halving period
-BURN_RATE            = 0.02        # 2% service burn
-MINTING_CAP          = 0.5         # minting <= 50% of net income
-REFERENCE_SIZE       = 100         # active-set scaling denominator
-EPOCHS_PER_YEAR      = 52_600      # ~1 epoch per 10 minutes
-
-
-def epoch_reward(epoch_number):
-    shift = min(epoch_number // HALVING_INTERVAL, 63)
-    return INITIAL_EPOCH_REWARD / (2 ** shift)
-
-
-def scaled_emission(N, epoch_number):
-    return (min(N, REFERENCE_SIZE) / REFERENCE_SIZE) * epoch_reward(epoch_number)
-
-
-def cumulative_supply_at(epoch):
-    supply, current = 0.0, 0
-    while current < epoch:
-        reward = epoch_reward(current)
-        next_h = ((current // HALVING_INTERVAL) + 1) * HALVING_INTERVAL
-        epochs_at_rate = min(next_h, epoch) - current
-        supply += reward * epochs_at_rate
-        current += epochs_at_rate
-    return supply
+from emission_schedule import EPOCHS_PER_YEAR, cumulative_supply_at
+from output_paths import output_dir as get_output_dir, output_path, parse_analysis_args, pyplot
+from partition_engine import simulate_partition_segments
+from result_cache import cached, cached_figure
+from sca_lanes import simulate_sca_lanes
+from trust_graph import (COMMUNITY_SIZE, attacker_trust_scores, audit_discount,
+                         lone_village_scores)
 
 
+@cached
 def simulate_partition(N, M_0, epochs, start_epoch=100_000):
     """Optimal-attacker supply growth. Returns supply history."""
-    S = M_0
-    history = [S]
-    for k in range(epochs):
-        E_s = scaled_emission(N, start_epoch + k)
-        min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
-        if S < min_spend:
-            A = S
-        else:
-            A = min_spend
-        burns = BURN_RATE * A
-        income = (1 - BURN_RATE) * A
-        minting = min(E_s, MINTING_CAP * income)
-        S = S - burns + minting
-        history.append(S)
+    history, _ = simulate_partition_segments(N, M_0, epochs, "optimal", start_epoch)
     return history
 
 
 # -- SCA MODEL ----------------------------------------------------------------
 
+@cached
 def simulate_sca_attack(N, M_0, K_sca, total_epochs, start_epoch=100_000,
                         reconnect_cost_epochs=10):
     """Simulate attack with Service Continuity Attestation.
@@ -86,6 +51,9 @@ def simulate_sca_attack(N, M_0, K_sca, total_epochs, start_epoch=100_000,
     To restart, they must reconnect for reconnect_cost_epochs (during
     which the excess is visible and merge audit runs).
 
+    Single-lane wrapper around sca_lanes.simulate_sca_lanes; batch many
+    K_sca values through that directly.
+
     Args:
         N: virtual nodes
         M_0: initial capital
@@ -97,38 +65,13 @@ def simulate_sca_attack(N, M_0, K_sca, total_epochs, start_epoch=100_000,
     Returns:
         dict with attack metrics
     """
-    S = M_0
-    total_minted = 0.0
-    cycles = 0
-    epoch = 0
-
-    while epoch < total_epochs:
-        # Isolation phase: mint for K_sca epochs
-        mint_epochs = min(K_sca, total_epochs - epoch)
-        for k in range(mint_epochs):
-            E_s = scaled_emission(N, start_epoch + epoch + k)
-            min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
-            if S < min_spend:
-                A = S
-            else:
-                A = min_spend
-            burns = BURN_RATE * A
-            income = (1 - BURN_RATE) * A
-            minting = min(E_s, MINTING_CAP * income)
-            S = S - burns + minting
-            total_minted += minting
-        epoch += mint_epochs
-        cycles += 1
-
-        # Reconnection phase: no minting, visible to network
-        epoch += reconnect_cost_epochs
-
-    net_supply = cumulative_supply_at(start_epoch + total_epochs)
+    r = simulate_sca_lanes(K_sca, 0.0, reconnect_cost_epochs, N, M_0,
+                           total_epochs, start_epoch)
     return {
-        "total_minted": total_minted,
-        "final_supply": S,
-        "cycles": cycles,
-        "dilution_pct": S / net_supply * 100 if net_supply > 0 else 0,
+        "total_minted": float(r["total_minted"][0]),
+        "final_supply": float(r["final_supply"][0]),
+        "cycles": int(r["cycles"][0]),
+        "dilution_pct": float(r["dilution_pct"][0]),
     }
 
 
@@ -139,58 +82,101 @@ def simulate_sca_with_merge_audit(N, M_0, K_sca, total_epochs, start_epoch=100_0
     audit_discount: fraction of minting rejected at merge (0.0 = no audit, 1.0 = all rejected)
     For fresh identities: audit_discount = 1.0 (no cross-trust -> all minting rejected)
     For pre-planned with some trust: audit_discount < 1.0
+    (trust_graph.audit_discount derives it from a trust graph)
+    After each audit the balance is rebased and floored at M_0.
     """
-    S = M_0
-    total_accepted = 0.0
-    total_rejected = 0.0
-    cycles = 0
-    epoch = 0
-
-    while epoch < total_epochs:
-        # Isolation phase
-        cycle_minted = 0.0
-        mint_epochs = min(K_sca, total_epochs - epoch)
-        for k in range(mint_epochs):
-            E_s = scaled_emission(N, start_epoch + epoch + k)
-            min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
-            if S < min_spend:
-                A = S
-            else:
-                A = min_spend
-            burns = BURN_RATE * A
-            income = (1 - BURN_RATE) * A
-            minting = min(E_s, MINTING_CAP * income)
-            S = S - burns + minting
-            cycle_minted += minting
-        epoch += mint_epochs
-        cycles += 1
-
-        # Merge audit: discount the minting
-        rejected = cycle_minted * audit_discount
-        accepted = cycle_minted - rejected
-        S -= rejected  # balance rebased
-        S = max(S, M_0)  # floor at initial capital (can't go below what you started with)
-        total_accepted += accepted
-        total_rejected += rejected
-
-        # Reconnection phase
-        epoch += reconnect_cost_epochs
-
-    net_supply = cumulative_supply_at(start_epoch + total_epochs)
+    r = simulate_sca_lanes(K_sca, audit_discount, reconnect_cost_epochs, N, M_0,
+                           total_epochs, start_epoch)
     return {
-        "total_accepted": total_accepted,
-        "total_rejected": total_rejected,
-        "final_supply": S,
-        "cycles": cycles,
-        "dilution_pct": S / net_supply * 100 if net_supply > 0 else 0,
+        "total_accepted": float(r["total_accepted"][0]),
+        "total_rejected": float(r["total_rejected"][0]),
+        "final_supply": float(r["final_supply"][0]),
+        "cycles": int(r["cycles"][0]),
+        "dilution_pct": float(r["dilution_pct"][0]),
     }
 
 
+# -- PLOTTING -----------------------------------------------------------------
+
+@cached_figure("sca_partition_analysis.png")
+def plot_all(N=100, M_0=1.0, start_epoch=100_000, audit=None):
+    """Two-panel figure: first-year dilution by SCA lifetime and defense,
+    and the 5-year attacker supply. audit: (fresh, infiltrated) merge-audit
+    discounts (default: audited on the trust graph here)."""
+    if audit is None:
+        audit = audit_discount(attacker_trust_scores([0, N // 2], cluster_size=N))
+    fresh, infiltrated = (float(d) for d in audit)
+    plt = pyplot()
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Left: dilution comparison across defenses
+    ax = axes[0]
+    K_values = np.array([1000, 2500, 5000, 10000, 25000, 50000])
+    discounts = np.array([0.0, fresh, infiltrated])    # SCA only, fresh IDs, pre-planned
+    r = simulate_sca_lanes(K_values[:, None], discounts[None, :], N=N, M_0=M_0,
+                           total_epochs=EPOCHS_PER_YEAR, start_epoch=start_epoch)
+    sca_only, sca_audit_fresh, sca_audit_preplan = (
+        r["dilution_pct"].reshape(len(K_values), len(discounts)).T)
+
+    hist_1y = simulate_partition(N, M_0, EPOCHS_PER_YEAR, start_epoch)
+    baseline = hist_1y[-1] / cumulative_supply_at(start_epoch + EPOCHS_PER_YEAR) * 100
+    K_days = [K * 10 / 60 / 24 for K in K_values]
+
+    ax.axhline(y=baseline, color="#F44336", linestyle="--", linewidth=2,
+               label=f"No SCA (current): {baseline:.1f}%")
+    ax.plot(K_days, sca_only, "o-", color="#FF9800", linewidth=2,
+            label="SCA only", markersize=6)
+    ax.plot(K_days, sca_audit_preplan, "s-", color="#2196F3", linewidth=2,
+            label=f"SCA + audit ({infiltrated:.0%} discount)", markersize=6)
+    ax.plot(K_days, sca_audit_fresh, "^-", color="#4CAF50", linewidth=2,
+            label="SCA + audit (fresh IDs)", markersize=6)
+    ax.axvline(x=69, color="#9C27B0", linestyle=":", linewidth=1,
+               label="K=10K (~69 days)")
+    ax.set_xlabel("SCA lifetime K (days)")
+    ax.set_ylabel("First-year dilution (%)")
+    ax.set_title(f"Partition Attack: Defense Comparison (N={N})")
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(bottom=0)
+
+    # Right: 5-year supply trajectory comparison
+    ax = axes[1]
+    epochs_5y = 5 * EPOCHS_PER_YEAR
+
+    # Baseline (no SCA)
+    h_base = simulate_partition(N, M_0, epochs_5y, start_epoch)
+    x_years = np.arange(epochs_5y + 1) / EPOCHS_PER_YEAR
+
+    ax.plot(x_years, h_base, color="#F44336", linewidth=2, label="No SCA (current)")
+
+    # SCA only, K=10K (supply sampled every 50 epochs)
+    K = 10_000
+    r = simulate_sca_lanes(K, 0.0, N=N, M_0=M_0, total_epochs=epochs_5y,
+                           start_epoch=start_epoch,
+                           record_epochs=np.arange(0, epochs_5y + 1, 50))
+    ax.plot(r["record_epochs"] / EPOCHS_PER_YEAR, r["history"][0], color="#FF9800",
+            linewidth=2, label=f"SCA only (K={K:,d})")
+
+    # SCA + audit (fresh IDs) -> 0 net minting
+    ax.axhline(y=M_0, color="#4CAF50", linestyle="--", linewidth=2,
+               label="SCA + audit (fresh IDs): ~0")
+
+    ax.set_xlabel("Years since attack start")
+    ax.set_ylabel("Attacker MHR supply")
+    ax.set_title("5-Year Attack Supply: Defense Comparison")
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    ax.ticklabel_format(style="plain", axis="y")
+
+    plt.tight_layout()
+    fig.savefig(output_path("sca_partition_analysis.png"), dpi=150)
+    plt.close(fig)
+
+
 # -- MAIN ANALYSIS ------------------------------------------------------------
 
-def main():
-    output_dir = os.path.join(os.path.dirname(__file__), "output")
-    os.makedirs(output_dir, exist_ok=True)
+def main(plots=True):
+    output_dir = get_output_dir()
 
     START = 100_000
     N = 100
@@ -223,12 +209,15 @@ def main():
     print(header)
     print(f"   {'-'*12}  {'-'*10}  {'-'*14}  {'-'*14}  {'-'*10}")
 
-    for K in [1000, 2500, 5000, 10000, 25000, 50000, 100000]:
+    K_values = np.array([1000, 2500, 5000, 10000, 25000, 50000, 100000])
+    r1 = simulate_sca_lanes(K_values, 0.0, N=N, M_0=M_0,
+                            total_epochs=EPOCHS_PER_YEAR, start_epoch=START)
+    r5 = simulate_sca_lanes(K_values, 0.0, N=N, M_0=M_0,
+                            total_epochs=5 * EPOCHS_PER_YEAR, start_epoch=START)
+    for i, K in enumerate(K_values):
         days = K * 10 / 60 / 24
-        r1 = simulate_sca_attack(N, M_0, K, EPOCHS_PER_YEAR, START)
-        r5 = simulate_sca_attack(N, M_0, K, 5 * EPOCHS_PER_YEAR, START)
-        print(f"   {K:>12,d}  {days:>10.1f}  {r1['dilution_pct']:>13.2f}%  "
-              f"{r5['dilution_pct']:>13.2f}%  {r1['cycles']:>10d}")
+        print(f"   {K:>12,d}  {days:>10.1f}  {r1['dilution_pct'][i]:>13.2f}%  "
+              f"{r5['dilution_pct'][i]:>13.2f}%  {r1['cycles'][i]:>10d}")
 
     print(f"\n   Baseline (no SCA, unlimited):")
     hist_1y = simulate_partition(N, M_0, EPOCHS_PER_YEAR, START)
@@ -238,9 +227,23 @@ def main():
     # -- 3. SCA + merge audit --
     print(f"\n3. SCA + MERGE-TIME TRUST AUDIT")
     print("=" * 74)
-    print(f"   Fresh identities (no cross-trust): audit discount = 100%")
-    print(f"   Pre-planned (1 real trust link): audit discount = 99%")
-    print(f"   Pre-planned (infiltrated): audit discount = 50%")
+    # Discounts from the audit run on a trust graph of 1,000 honest nodes
+    # and the N-node cluster with 0, 1 and N/2 honest vouches. The attacker
+    # placing each vouch on its own node gives the spec's vouches / N; the
+    # same vouches on random cluster nodes, and legitimate villages
+    # reconnecting, are audited on the same graph model
+    fresh, one_link, infiltrated = (float(d) for d in audit_discount(
+        attacker_trust_scores([0, 1, N // 2], cluster_size=N)))
+    infiltrated_random = float(audit_discount(
+        attacker_trust_scores([N // 2], cluster_size=N, spread=False))[0])
+    village = audit_discount(lone_village_scores())
+    print(f"   Fresh identities (no cross-trust): audit discount = {fresh*100:.0f}%")
+    print(f"   Pre-planned (1 real trust link): audit discount = {one_link*100:.0f}%")
+    print(f"   Pre-planned (infiltrated, {N // 2} vouches): audit discount = "
+          f"{infiltrated*100:.0f}% (spec {100 - 100 * (N // 2) / N:.0f}%),\n"
+          f"      {infiltrated_random*100:.0f}% if the vouches land on random nodes")
+    print(f"   Legitimate village of {COMMUNITY_SIZE} (spec 0%): audit discount = "
+          f"{np.median(village)*100:.0f}% median, up to {village.max()*100:.0f}%")
     print()
 
     K = 10_000  # ~69 days, the recommended value
@@ -251,9 +254,10 @@ def main():
 
     for label, discount in [("No SCA, no audit (current)", -1),
                             ("SCA only (K=10K)", 0.0),
-                            ("SCA + audit, fresh IDs", 1.0),
-                            ("SCA + audit, 1 trust link", 0.99),
-                            ("SCA + audit, infiltrated", 0.50)]:
+                            ("SCA + audit, fresh IDs", fresh),
+                            ("SCA + audit, 1 trust link", one_link),
+                            ("SCA + audit, infiltrated", infiltrated),
+                            ("SCA + audit, infiltrated (random)", infiltrated_random)]:
         if discount == -1:
             # Baseline
             h1 = simulate_partition(N, M_0, EPOCHS_PER_YEAR, START)
@@ -286,9 +290,11 @@ def main():
     print(f"   {'K':>8s}  {'Days':>8s}  {'Atk 1yr':>10s}  {'Village impact':>18s}")
     print(f"   {'-'*8}  {'-'*8}  {'-'*10}  {'-'*18}")
 
-    for K in [1000, 2500, 5000, 10000, 25000]:
+    K_values = np.array([1000, 2500, 5000, 10000, 25000])
+    r = simulate_sca_lanes(K_values, fresh, N=N, M_0=M_0,
+                           total_epochs=EPOCHS_PER_YEAR, start_epoch=START)
+    for K, dilution in zip(K_values, r["dilution_pct"]):
         days = K * 10 / 60 / 24
-        r = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, 1.0)
         if days <= 7:
             village = "Loses minting in <1wk"
         elif days <= 17:
@@ -299,7 +305,7 @@ def main():
             village = "Loses minting in ~2mo"
         else:
             village = "Loses minting in ~6mo"
-        print(f"   {K:>8,d}  {days:>8.1f}  {r['dilution_pct']:>9.2f}%  {village:>18s}")
+        print(f"   {K:>8,d}  {days:>8.1f}  {dilution:>9.2f}%  {village:>18s}")
 
     print(f"""
    RECOMMENDATION: K = 10,000 epochs (~69 days)
@@ -341,98 +347,8 @@ def main():
 """)
 
     # -- Plot --
-    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-    # Left: dilution comparison across defenses
-    ax = axes[0]
-    K_values = [1000, 2500, 5000, 10000, 25000, 50000]
-    sca_only = []
-    sca_audit_fresh = []
-    sca_audit_preplan = []
-    for K in K_values:
-        r = simulate_sca_attack(N, M_0, K, EPOCHS_PER_YEAR, START)
-        sca_only.append(r['dilution_pct'])
-        r = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, 1.0)
-        sca_audit_fresh.append(r['dilution_pct'])
-        r = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, 0.50)
-        sca_audit_preplan.append(r['dilution_pct'])
-
-    baseline = hist_1y[-1] / supply_1y * 100
-    K_days = [K * 10 / 60 / 24 for K in K_values]
-
-    ax.axhline(y=baseline, color="#F44336", linestyle="--", linewidth=2,
-               label=f"No SCA (current): {baseline:.1f}%")
-    ax.plot(K_days, sca_only, "o-", color="#FF9800", linewidth=2,
-            label="SCA only", markersize=6)
-    ax.plot(K_days, sca_audit_preplan, "s-", color="#2196F3", linewidth=2,
-            label="SCA + audit (50% discount)", markersize=6)
-    ax.plot(K_days, sca_audit_fresh, "^-", color="#4CAF50", linewidth=2,
-            label="SCA + audit (fresh IDs)", markersize=6)
-    ax.axvline(x=69, color="#9C27B0", linestyle=":", linewidth=1,
-               label="K=10K (~69 days)")
-    ax.set_xlabel("SCA lifetime K (days)")
-    ax.set_ylabel("First-year dilution (%)")
-    ax.set_title("Partition Attack: Defense Comparison (N=100)")
-    ax.legend(fontsize=8)
-    ax.grid(True, alpha=0.3)
-    ax.set_ylim(bottom=0)
-
-    # Right: 5-year supply trajectory comparison
-    ax = axes[1]
-    epochs_5y = 5 * EPOCHS_PER_YEAR
-
-    # Baseline (no SCA)
-    h_base = simulate_partition(N, M_0, epochs_5y, START)
-    x_years = np.arange(epochs_5y + 1) / EPOCHS_PER_YEAR
-
-    ax.plot(x_years, h_base, color="#F44336", linewidth=2, label="No SCA (current)")
-
-    # SCA only, K=10K
-    K = 10_000
-    # Simulate cycle-by-cycle
-    S = M_0
-    h_sca = [S]
-    epoch = 0
-    while epoch < epochs_5y:
-        mint_ep = min(K, epochs_5y - epoch)
-        for k in range(mint_ep):
-            E_s = scaled_emission(N, START + epoch + k)
-            min_spend = E_s / (MINTING_CAP * (1 - BURN_RATE))
-            A = min(S, min_spend) if S < min_spend else min_spend
-            burns = BURN_RATE * A
-            income = (1 - BURN_RATE) * A
-            minting = min(E_s, MINTING_CAP * income)
-            S = S - burns + minting
-            h_sca.append(S)
-        epoch += mint_ep
-        # SCA expires -> no minting, but track time
-        reconnect = min(10, epochs_5y - epoch)
-        for _ in range(reconnect):
-            h_sca.append(S)
-        epoch += reconnect
-
-    # Pad if needed
-    while len(h_sca) < len(h_base):
-        h_sca.append(h_sca[-1])
-
-    x_sca = np.arange(len(h_sca)) / EPOCHS_PER_YEAR
-    ax.plot(x_sca[:len(h_base)], h_sca[:len(h_base)], color="#FF9800",
-            linewidth=2, label=f"SCA only (K={K:,d})")
-
-    # SCA + audit (fresh IDs) -> 0 net minting
-    ax.axhline(y=M_0, color="#4CAF50", linestyle="--", linewidth=2,
-               label="SCA + audit (fresh IDs): ~0")
-
-    ax.set_xlabel("Years since attack start")
-    ax.set_ylabel("Attacker MHR supply")
-    ax.set_title("5-Year Attack Supply: Defense Comparison")
-    ax.legend(fontsize=8)
-    ax.grid(True, alpha=0.3)
-    ax.ticklabel_format(style="plain", axis="y")
-
-    plt.tight_layout()
-    fig.savefig(os.path.join(output_dir, "sca_partition_analysis.png"), dpi=150)
-    plt.close(fig)
+    if plots:
+        plot_all(N, M_0, START, audit=(fresh, infiltrated))
 
     # -- Summary --
     print("=" * 74)
@@ -492,12 +408,12 @@ def main():
         r5 = simulate_sca_attack(N, M_0, K, 5 * EPOCHS_PER_YEAR, START)
         f.write(f"  {'SCA only (K=10K)':<35s}  {r1['dilution_pct']:>13.2f}%  {r5['dilution_pct']:>13.2f}%\n")
 
-        r1 = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, 1.0)
-        r5 = simulate_sca_with_merge_audit(N, M_0, K, 5 * EPOCHS_PER_YEAR, START, 1.0)
+        r1 = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, fresh)
+        r5 = simulate_sca_with_merge_audit(N, M_0, K, 5 * EPOCHS_PER_YEAR, START, fresh)
         f.write(f"  {'SCA + audit (fresh IDs)':<35s}  {r1['dilution_pct']:>13.2f}%  {r5['dilution_pct']:>13.2f}%\n")
 
-        r1 = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, 0.99)
-        r5 = simulate_sca_with_merge_audit(N, M_0, K, 5 * EPOCHS_PER_YEAR, START, 0.99)
+        r1 = simulate_sca_with_merge_audit(N, M_0, K, EPOCHS_PER_YEAR, START, one_link)
+        r5 = simulate_sca_with_merge_audit(N, M_0, K, 5 * EPOCHS_PER_YEAR, START, one_link)
         f.write(f"  {'SCA + audit (1 trust link)':<35s}  {r1['dilution_pct']:>13.2f}%  {r5['dilution_pct']:>13.2f}%\n")
 
         f.write(f"\nRecommended: K = 10,000 epochs (~69 days)\n")
@@ -505,10 +421,10 @@ def main():
         f.write(f"  Pre-planned: bounded to K epochs, visible on reconnect\n")
         f.write(f"  Legitimate village: mints for ~69 days, then pauses (can still transact)\n")
 
-    print(f"\nOutput saved to {output_dir}/")
+    print(f"\nOutput saved to {os.path.relpath(output_dir)}/")
     print(f"  - sca_partition_analysis.png")
     print(f"  - sca_partition_table.txt")
 
 
 if __name__ == "__main__":
-    main()
+    main(plots=parse_analysis_args(__doc__.splitlines()[1]).plots)
@@ -0,0 +1,177 @@
+"""
+Mehr Network -- Bit-Level Settlement Bloom Filter
+
+A real NumPy Bloom filter for the epoch snapshot's included_settlements
+field (epoch-compaction.md, Bloom Filter Sizing), used to check the
+analytic bloom_filter_stats model in epoch_partition_analysis.py against
+measured false positives, build time and memory.
+
+Construction:
+  - m = n x BLOOM_BITS_PER_ELEM bits, rounded up to a whole uint64 word,
+    stored as a little-endian uint64 buffer.
+  - k = BLOOM_K bit positions per settlement by double hashing:
+        pos_i = (h1 + i x h2) mod m,   i in [0, k)
+    where h1, h2 are the first two little-endian 64-bit words of the
+    32-byte settlement hash (h2 forced odd). The spec derives each h_i
+    with its own Blake3 call; settlement hashes are already uniform Blake3
+    output, so double hashing gives the same false positive rate at one
+    hash read per settlement.
+
+Insert and query are vectorized over batches of hashes. The filter ships
+as its raw word buffer -- no header -- so a saved filter can be memory
+mapped straight back, the way an epoch snapshot would carry it.
+"""
+
+import os
+import tempfile
+import time
+import numpy as np
+
+from epoch_partition_analysis import (BLOOM_BITS_PER_ELEM, BLOOM_FPR, BLOOM_K,
+                                      SETTLEMENT_HASH_BYTES, bloom_filter_stats)
+
+BATCH_ROWS = 1_000_000               # hashes per vectorized insert/query pass
+
+
+# --- FILTER -----------------------------------------------------------------
+
+def bloom_size_bits(n_settlements, bits_per_elem=BLOOM_BITS_PER_ELEM):
+    """Filter size in bits for n settlements, rounded up to 64-bit words."""
+    bits = int(np.ceil(n_settlements * bits_per_elem))
+    return max(64, -(-bits // 64) * 64)
+
+
+def synthetic_settlement_hashes(n, rng=None):
+    """n random 32-byte settlement hashes as a (n, 32) uint8 array."""
+    rng = np.random.default_rng(rng)
+    return np.frombuffer(rng.bytes(n * SETTLEMENT_HASH_BYTES),
+                         dtype=np.uint8).reshape(n, SETTLEMENT_HASH_BYTES)
+
+
+class SettlementBloom:
+    """Bloom filter over 32-byte settlement hashes in a uint64 buffer.
+
+    Args:
+        m_bits: filter size in bits (multiple of 64)
+        k: hash functions per settlement
+        words: existing uint64 buffer (e.g. a memmap) to wrap instead of
+            allocating a zeroed one
+    """
+
+    def __init__(self, m_bits, k=BLOOM_K, words=None):
+        if m_bits % 64:
+            raise ValueError("m_bits must be a multiple of 64")
+        if words is None:
+            words = np.zeros(m_bits // 64, dtype="<u8")
+        elif len(words) * 64 != m_bits:
+            raise ValueError("buffer size does not match m_bits")
+        self.m_bits = m_bits
+        self.k = k
+        self.words = words
+
+    @classmethod
+    def for_settlements(cls, n_settlements, k=BLOOM_K):
+        """Empty filter sized for n settlements at BLOOM_BITS_PER_ELEM."""
+        return cls(bloom_size_bits(n_settlements), k)
+
+    def _positions(self, hashes):
+        """(rows, k) uint64 bit positions for a (rows, 32) uint8 batch."""
+        lanes = np.ascontiguousarray(hashes[:, :16]).view("<u8")
+        h1, h2 = lanes[:, 0], lanes[:, 1] | np.uint64(1)
+        i = np.arange(self.k, dtype=np.uint64)
+        # uint64 products wrap mod 2^64 before the final mod m
+        return (h1[:, None] + i * h2[:, None]) % np.uint64(self.m_bits)
+
+    def add(self, hashes):
+        """Insert a (n, 32) uint8 batch of settlement hashes."""
+        for start in range(0, len(hashes), BATCH_ROWS):
+            pos = np.sort(self._positions(hashes[start:start + BATCH_ROWS]), axis=None)
+            word = pos >> np.uint64(6)
+            bit = np.uint64(1) << (pos & np.uint64(63))
+            # OR together the bits that land in the same word, then apply once
+            first = np.flatnonzero(np.concatenate(([True], word[1:] != word[:-1])))
+            self.words[word[first]] |= np.bitwise_or.reduceat(bit, first)
+
+    def contains(self, hashes):
+        """Boolean membership for a (n, 32) uint8 batch (may false-positive)."""
+        out = np.empty(len(hashes), dtype=bool)
+        for start in range(0, len(hashes), BATCH_ROWS):
+            pos = self._positions(hashes[start:start + BATCH_ROWS])
+            bits = (self.words[pos >> np.uint64(6)] >> (pos & np.uint64(63))) & np.uint64(1)
+            out[start:start + len(pos)] = bits.all(axis=1)
+        return out
+
+    def fill_ratio(self):
+        """Fraction of bits set."""
+        return int(np.unpackbits(self.words.view(np.uint8)).sum()) / self.m_bits
+
+    def expected_fpr(self, n_inserted):
+        """Analytic false positive rate (1 - e^(-kn/m))^k."""
+        return (1 - np.exp(-self.k * n_inserted / self.m_bits)) ** self.k
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def save(self, path):
+        """Write the raw little-endian word buffer (no header)."""
+        self.words.tofile(path)
+
+    @classmethod
+    def load(cls, path, k=BLOOM_K, mmap=True):
+        """Load a raw buffer written by save(); memory-mapped read-only by
+        default, so queries touch only the pages they need."""
+        if mmap:
+            words = np.memmap(path, dtype="<u8", mode="r")
+        else:
+            words = np.fromfile(path, dtype="<u8")
+        return cls(len(words) * 64, k, words)
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- SETTLEMENT BLOOM FILTER vs ANALYTIC MODEL")
+    print("=" * 70)
+    print(f"\n  k = {BLOOM_K}, {BLOOM_BITS_PER_ELEM} bits/settlement, "
+          f"target FPR {BLOOM_FPR:.2%}")
+    print(f"\n  {'Settlements':>12s}  {'Size':>10s}  {'Model':>10s}  {'Build':>8s}  "
+          f"{'Fill':>6s}  {'FPR measured':>13s}  {'FPR model':>10s}  {'FP/n model':>10s}")
+    print(f"  {'-'*12}  {'-'*10}  {'-'*10}  {'-'*8}  {'-'*6}  {'-'*13}  {'-'*10}  {'-'*10}")
+
+    rng = np.random.default_rng(0)
+    false_negatives = 0
+    for n in [1_000, 10_000, 100_000, 1_000_000, 10_000_000]:
+        inserted = synthetic_settlement_hashes(n, rng)
+        bloom = SettlementBloom.for_settlements(n)
+        t0 = time.perf_counter()
+        bloom.add(inserted)
+        build = time.perf_counter() - t0
+
+        false_negatives += int((~bloom.contains(inserted)).sum())
+        probes = max(n, 1_000_000)
+        fpr = bloom.contains(synthetic_settlement_hashes(probes, rng)).mean()
+        stats = bloom_filter_stats(n)
+        print(f"  {n:>12,d}  {bloom.nbytes / 1024:>7.1f} KB  {stats['bloom_size_kb']:>7.1f} KB  "
+              f"{build:>7.2f}s  {bloom.fill_ratio():>6.3f}  {fpr:>13.6f}  "
+              f"{bloom.expected_fpr(n):>10.6f}  {stats['expected_fp'] / n:>10.6f}")
+
+    # Ship the filter as a raw buffer and query it memory-mapped
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "included_settlements.bloom")
+        bloom.save(path)
+        shipped = SettlementBloom.load(path)
+        sample = np.concatenate([inserted[:50_000], synthetic_settlement_hashes(50_000, rng)])
+        same = bool(np.array_equal(shipped.contains(sample), bloom.contains(sample)))
+        print(f"\n  Saved {os.path.getsize(path) / 2**20:.1f} MB raw buffer; "
+              f"memory-mapped reload agrees: {same}")
+        del shipped
+
+    print(f"  False negatives: {false_negatives}")
+    if false_negatives or not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
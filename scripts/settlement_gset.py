@@ -0,0 +1,209 @@
+"""
+Mehr Network -- Compact Array-Backed Settlement GSet
+
+gset_growth_timeline and time_to_gset_limit in epoch_partition_analysis.py
+assume the GSet costs exactly settlements x SETTLEMENT_HASH_BYTES. This
+module provides the representation a node would actually use and measures
+it against that model and against a naive Python set of hashes.
+
+SettlementGSet keeps every 32-byte settlement hash in contiguous
+fixed-width NumPy 'S32' buffers (byte-wise ordering, no per-entry
+objects), organized as two sorted runs:
+  - main: the bulk of the set, binary-searched for membership
+  - tail: recent additions, merged into main once it passes 1/8 of main
+Batch add, batch membership and merge (union) are all sort / searchsorted
+passes. Storage is one buffer per run, so memory is 32 bytes per hash plus
+at most the tail's slack.
+
+Run this file directly for the memory benchmark (Linux /proc RSS).
+"""
+
+import ctypes
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from epoch_partition_analysis import (ESP32_RAM_BYTES, GSET_TRIGGER_BYTES,
+                                      SETTLEMENT_HASH_BYTES, time_to_gset_limit)
+
+HASH_DTYPE = np.dtype(f"S{SETTLEMENT_HASH_BYTES}")
+MIN_TAIL_ROWS = 4_096                # tail merges into main past max(this, main/8)
+
+
+# --- GSET -------------------------------------------------------------------
+
+def as_hashes(hashes):
+    """View a (n, 32) uint8 array (or S32 array) as a flat S32 array."""
+    hashes = np.asarray(hashes)
+    if hashes.dtype == HASH_DTYPE:
+        return hashes.ravel()
+    return np.ascontiguousarray(hashes, dtype=np.uint8).view(HASH_DTYPE).ravel()
+
+
+def _sorted_unique(values):
+    values = np.sort(values)
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _in_sorted(run, values):
+    """Membership of values in a sorted S32 run."""
+    if not len(run):
+        return np.zeros(len(values), dtype=bool)
+    idx = np.minimum(np.searchsorted(run, values), len(run) - 1)
+    return run[idx] == values
+
+
+class SettlementGSet:
+    """Grow-only set of settlement hashes in sorted fixed-width runs."""
+
+    def __init__(self, hashes=None):
+        self.main = np.empty(0, dtype=HASH_DTYPE)
+        self.tail = np.empty(0, dtype=HASH_DTYPE)
+        if hashes is not None:
+            self.add(hashes)
+
+    def __len__(self):
+        return len(self.main) + len(self.tail)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the hash buffers."""
+        return self.main.nbytes + self.tail.nbytes
+
+    def contains(self, hashes):
+        """Boolean membership for a batch of hashes."""
+        values = as_hashes(hashes)
+        return _in_sorted(self.main, values) | _in_sorted(self.tail, values)
+
+    def add(self, hashes):
+        """Insert a batch of hashes; returns how many were new."""
+        values = _sorted_unique(as_hashes(hashes))
+        values = values[~self.contains(values)]
+        if len(values):
+            self.tail = np.sort(np.concatenate([self.tail, values]))
+            if len(self.tail) > max(MIN_TAIL_ROWS, len(self.main) // 8):
+                self.compact()
+        return len(values)
+
+    def merge(self, other):
+        """CRDT merge: union with another SettlementGSet, in place."""
+        self.compact()
+        other_values = other.to_array()
+        new = other_values[~_in_sorted(self.main, other_values)]
+        self.main = np.sort(np.concatenate([self.main, new]))
+        return self
+
+    def compact(self):
+        """Fold the tail run into main."""
+        if len(self.tail):
+            self.main = np.sort(np.concatenate([self.main, self.tail]))
+            self.tail = np.empty(0, dtype=HASH_DTYPE)
+
+    def to_array(self):
+        """All hashes as one sorted S32 array."""
+        if not len(self.tail):
+            return self.main
+        return np.sort(np.concatenate([self.main, self.tail]))
+
+
+# --- MEMORY BENCHMARK -------------------------------------------------------
+
+def rss_bytes():
+    """Current resident set size of this process (Linux /proc).
+
+    Freed sort temporaries are first handed back with glibc malloc_trim so
+    the figure reflects live data, not allocator slack.
+    """
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _measure(kind, n, batch=1_000, seed=0):
+    """RSS growth from holding n hashes, added in settlement-sized batches.
+    Runs in a fresh worker so earlier allocations do not mask it."""
+    rng = np.random.default_rng(seed)
+    raw = [rng.bytes(batch * SETTLEMENT_HASH_BYTES) for _ in range(-(-n // batch))]
+    before = rss_bytes()
+    if kind == "array":
+        gset = SettlementGSet()
+        for chunk in raw:
+            gset.add(np.frombuffer(chunk, dtype=HASH_DTYPE))
+        gset.compact()
+    else:
+        gset = set()
+        for chunk in raw:
+            gset.update(chunk[i:i + SETTLEMENT_HASH_BYTES]
+                        for i in range(0, len(chunk), SETTLEMENT_HASH_BYTES))
+    return rss_bytes() - before
+
+
+def measured_bytes_per_settlement(n=1_000_000):
+    """{representation: RSS bytes per hash} for the array GSet and a Python set."""
+    out = {}
+    for kind in ["array", "python set"]:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            out[kind] = pool.submit(_measure, kind, n).result() / n
+    return out
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- ARRAY-BACKED GSET MEMORY vs MODEL")
+    print("=" * 70)
+
+    # Correctness: batch add / membership / merge against a Python set
+    rng = np.random.default_rng(1)
+    a = rng.integers(0, 256, (20_000, SETTLEMENT_HASH_BYTES), dtype=np.uint8)
+    b = np.concatenate([a[:5_000], rng.integers(0, 256, (20_000, SETTLEMENT_HASH_BYTES), dtype=np.uint8)])
+    ga, gb = SettlementGSet(), SettlementGSet()
+    for chunk in np.array_split(a, 37):
+        ga.add(chunk)
+    gb.add(b)
+    ga.merge(gb)
+    ref = {bytes(r) for r in a} | {bytes(r) for r in b}
+    probe = np.concatenate([b, rng.integers(0, 256, (5_000, SETTLEMENT_HASH_BYTES), dtype=np.uint8)])
+    ok = (len(ga) == len(ref)
+          and bool(np.array_equal(ga.contains(probe), [bytes(r) in ref for r in probe])))
+    print(f"\n  Union of {len(a):,} + {len(b):,} hashes: {len(ga):,} entries, "
+          f"matches Python set: {ok}")
+
+    t0 = time.perf_counter()
+    big = SettlementGSet()
+    hashes = rng.integers(0, 256, (1_000_000, SETTLEMENT_HASH_BYTES), dtype=np.uint8)
+    for chunk in np.array_split(hashes, 1_000):
+        big.add(chunk)
+    print(f"  1,000,000 hashes in 1,000 batches: {time.perf_counter() - t0:.2f}s, "
+          f"{big.nbytes / 2**20:.1f} MB")
+
+    per = measured_bytes_per_settlement()
+    per = {"model": SETTLEMENT_HASH_BYTES, **per}
+    print(f"\n  Measured RSS per settlement (1M hashes):")
+    for kind, bytes_each in per.items():
+        print(f"    {kind:<12s} {bytes_each:>7.1f} B  ({bytes_each / SETTLEMENT_HASH_BYTES:.2f}x model)")
+
+    print(f"\n  Time to the {GSET_TRIGGER_BYTES // 1024} KB trigger / "
+          f"{ESP32_RAM_BYTES // 1024} KB ESP32 budget (hours):")
+    print(f"  {'Rate':>14s}  " + "  ".join(f"{kind:>19s}" for kind in per))
+    for rate in [0.5, 2, 10, 50]:
+        cells = []
+        for bytes_each in per.values():
+            scale = SETTLEMENT_HASH_BYTES / bytes_each
+            t500 = time_to_gset_limit(rate, GSET_TRIGGER_BYTES) * scale / 60
+            t520 = time_to_gset_limit(rate, ESP32_RAM_BYTES) * scale / 60
+            cells.append(f"{t500:>8.1f} / {t520:>8.1f}")
+        print(f"  {rate:>9g}/min  " + "  ".join(f"{c:>19s}" for c in cells))
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
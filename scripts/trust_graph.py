@@ -0,0 +1,260 @@
+"""
+Mehr Network -- Synthetic Trust Graphs and the Merge-Time Trust Audit
+
+Derives the audit discount that defense_comparison.approach_a_dilution
+(cross_trust_fraction) and sca_partition_analysis.simulate_sca_with_merge_audit
+(audit_discount) otherwise take as a given scalar.
+
+Trust graph: a directed edge u -> v means v is in u.trusted_peers. Graphs
+are CSR (indptr, indices) arrays over node ids, rows = the truster, as in
+gossip_engine; there are no per-node Python objects, so 10^6 nodes fit.
+
+Synthetic structure (modelling assumptions, not spec values):
+  - honest nodes live in communities of COMMUNITY_SIZE; each trusts
+    INTRA_TRUST_DEGREE random community members and INTER_TRUST_DEGREE
+    random nodes anywhere in the honest network, and each link is
+    reciprocated with probability MUTUAL_FRACTION
+  - each attacker cluster is a localhost partition whose nodes trust
+    ATTACKER_TRUST_DEGREE cluster members, always mutually
+  - infiltration edges are real honest nodes vouching for attacker nodes
+    (honest -> attacker, reciprocated); spread=True puts each on a
+    distinct attacker node, the attacker's best use of its vouchers
+
+Merge-time trust audit (token-security.md, Step 3):
+  cross_trust(N) = number of nodes in M's active set that have N in
+                   their trusted_peers
+  partition_trust_score = sum(min(1, cross_trust(N))) / |P.active_set|
+  audit discount (share of the partition's minting rejected)
+                 = 1 - partition_trust_score
+"""
+
+import time
+import numpy as np
+
+# --- TRUST MODEL (assumptions) ----------------------------------------------
+
+COMMUNITY_SIZE = 50                      # nodes per honest community (village)
+INTRA_TRUST_DEGREE = 6                   # trusted peers inside the community
+INTER_TRUST_DEGREE = 1                   # trusted peers anywhere in the network
+MUTUAL_FRACTION = 0.8                    # share of trust links reciprocated
+ATTACKER_TRUST_DEGREE = 8                # trusted peers inside an attacker cluster
+
+
+# --- GRAPH CONSTRUCTION -----------------------------------------------------
+
+def directed_csr(n, src, dst):
+    """De-duplicated directed CSR (indptr, indices) from an edge list,
+    self-loops dropped; row u lists u's trusted peers in ascending order."""
+    src, dst = np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+    key = np.sort((src * n + dst)[src != dst])
+    key = key[np.concatenate(([True], key[1:] != key[:-1]))] if len(key) else key
+    src, indices = np.divmod(key, n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, indices
+
+
+def _with_reverse(src, dst, p, rng):
+    """Edge list plus the reverse of each edge with probability p."""
+    back = rng.random(len(src)) < p
+    return np.concatenate([src, dst[back]]), np.concatenate([dst, src[back]])
+
+
+def synthetic_trust_graph(n_honest, n_clusters=1, cluster_size=100, infiltration=0,
+                          spread=True, community_size=COMMUNITY_SIZE,
+                          intra_degree=INTRA_TRUST_DEGREE,
+                          inter_degree=INTER_TRUST_DEGREE,
+                          attacker_degree=ATTACKER_TRUST_DEGREE,
+                          mutual_fraction=MUTUAL_FRACTION, rng=None):
+    """Honest community network plus n_clusters attacker clusters.
+
+    Nodes 0..n_honest-1 are honest; cluster c holds the cluster_size nodes
+    after them starting at n_honest + c * cluster_size. infiltration is the
+    number of honest -> attacker vouches per cluster: a scalar, or one
+    value per cluster.
+
+    Returns a dict with:
+        indptr, indices: directed CSR, row u = u.trusted_peers
+        n: total node count
+        community: honest community id per node (-1 for attacker nodes)
+        cluster: attacker cluster id per node (-1 for honest nodes)
+    """
+    rng = np.random.default_rng(rng)
+    n = n_honest + n_clusters * cluster_size
+    honest = np.arange(n_honest, dtype=np.int64)
+    community = np.full(n, -1, dtype=np.int64)
+    community[:n_honest] = honest // community_size
+    cluster = np.full(n, -1, dtype=np.int64)
+    cluster[n_honest:] = np.arange(n_clusters * cluster_size) // cluster_size
+
+    # Honest: intra-community links, then long links across the network
+    base = community[:n_honest] * community_size
+    size = np.minimum(community_size, n_honest - base)
+    src = np.repeat(honest, intra_degree)
+    dst = (np.repeat(base, intra_degree)
+           + (rng.random(src.size) * np.repeat(size, intra_degree)).astype(np.int64))
+    src_long = np.repeat(honest, inter_degree)
+    dst_long = rng.integers(0, n_honest, size=src_long.size)
+    edges = [_with_reverse(src, dst, mutual_fraction, rng),
+             _with_reverse(src_long, dst_long, mutual_fraction, rng)]
+
+    # Attackers: mutual trust inside each cluster
+    atk = np.arange(n_honest, n, dtype=np.int64)
+    src = np.repeat(atk, attacker_degree)
+    dst = (np.repeat(n_honest + cluster[n_honest:] * cluster_size, attacker_degree)
+           + rng.integers(0, cluster_size, size=src.size))
+    edges.append(_with_reverse(src, dst, 1.0, rng))
+
+    # Infiltration: honest vouchers for attacker nodes, reciprocated
+    counts = np.broadcast_to(np.asarray(infiltration, dtype=np.int64), (n_clusters,))
+    if counts.sum():
+        owner = np.repeat(np.arange(n_clusters), counts)
+        rank = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        slot = rank % cluster_size if spread else rng.integers(0, cluster_size, size=rank.size)
+        voucher = rng.integers(0, n_honest, size=rank.size)
+        edges.append(_with_reverse(voucher, n_honest + owner * cluster_size + slot, 1.0, rng))
+
+    indptr, indices = directed_csr(n, np.concatenate([s for s, _ in edges]),
+                                   np.concatenate([d for _, d in edges]))
+    return {"indptr": indptr, "indices": indices, "n": n,
+            "community": community, "cluster": cluster}
+
+
+# --- MERGE-TIME TRUST AUDIT -------------------------------------------------
+
+def cross_trust(indptr, indices, main_active):
+    """cross_trust(N) for every node: how many nodes of M's active set
+    (boolean mask) have N in their trusted_peers."""
+    trusted = indices[np.repeat(np.asarray(main_active, dtype=bool), np.diff(indptr))]
+    return np.bincount(trusted, minlength=len(indptr) - 1)
+
+
+def partition_trust_scores(indptr, indices, main_active, partition):
+    """partition_trust_score of every reconnecting partition.
+
+    partition: per node, the id (0..P-1) of the partition whose active set
+    it belongs to, or -1. Returns a float array of length P: the share of
+    each partition's active set trusted by at least one node of M's
+    active set (an empty partition scores 0)."""
+    partition = np.asarray(partition)
+    member = partition >= 0
+    trusted = cross_trust(indptr, indices, main_active)[member] > 0
+    n_parts = int(partition.max()) + 1 if member.any() else 0
+    size = np.bincount(partition[member], minlength=n_parts)
+    hits = np.bincount(partition[member], weights=trusted, minlength=n_parts)
+    return np.where(size > 0, hits / np.maximum(size, 1), 0.0)
+
+
+def audit_discount(partition_trust_score):
+    """Share of a partition's minting rejected at merge."""
+    return 1.0 - np.asarray(partition_trust_score)
+
+
+def attacker_trust_scores(infiltration, cluster_size=100, n_honest=1_000,
+                          spread=True, rng=0):
+    """partition_trust_score of a localhost cluster per infiltration count.
+
+    One graph holds one attacker cluster per entry of infiltration; all
+    honest nodes form M's active set and every cluster reconnects as its
+    own partition."""
+    infiltration = np.atleast_1d(np.asarray(infiltration, dtype=np.int64))
+    g = synthetic_trust_graph(n_honest, len(infiltration), cluster_size,
+                              infiltration, spread, rng=rng)
+    return partition_trust_scores(g["indptr"], g["indices"], g["cluster"] < 0,
+                                  g["cluster"])
+
+
+def village_trust_scores(graph, communities):
+    """partition_trust_score when honest communities split off as their own
+    partitions, the rest of the honest network remaining M."""
+    community = graph["community"]
+    communities = np.asarray(communities)
+    split = np.isin(community, communities)
+    partition = np.full(graph["n"], -1, dtype=np.int64)
+    partition[split] = np.searchsorted(np.sort(communities), community[split])
+    return partition_trust_scores(graph["indptr"], graph["indices"],
+                                  (community >= 0) & ~split, partition)
+
+
+def lone_village_scores(n_honest=1_000, community_size=COMMUNITY_SIZE, rng=0):
+    """partition_trust_score of every honest community of an n_honest
+    network when it alone splits off and reconnects: what the audit
+    grants a legitimate village (the spec assumes 1.0)."""
+    g = synthetic_trust_graph(n_honest, 0, community_size=community_size, rng=rng)
+    return np.concatenate([village_trust_scores(g, [c])
+                           for c in range(int(g["community"].max()) + 1)])
+
+
+# --- MAIN -------------------------------------------------------------------
+
+def _reference_scores(graph, main_active, partition):
+    """Step 3 of the audit written out over Python sets."""
+    indptr, indices = graph["indptr"], graph["indices"]
+    trusted_peers = [set(indices[indptr[u]:indptr[u + 1]].tolist())
+                     for u in range(graph["n"])]
+    main_nodes = [u for u in range(graph["n"]) if main_active[u]]
+    scores = []
+    for p in range(int(partition.max()) + 1):
+        active = [u for u in range(graph["n"]) if partition[u] == p]
+        cross = [sum(N in trusted_peers[M] for M in main_nodes) for N in active]
+        scores.append(sum(min(1, c) for c in cross) / len(active))
+    return np.array(scores)
+
+
+def main():
+    print("=" * 70)
+    print("MEHR NETWORK -- TRUST GRAPH MERGE-TIME AUDIT")
+    print("=" * 70)
+    print(f"\n  Honest communities of {COMMUNITY_SIZE}, {INTRA_TRUST_DEGREE} local + "
+          f"{INTER_TRUST_DEGREE} long trust links, {MUTUAL_FRACTION:.0%} mutual")
+
+    # Correctness: vectorized audit against the spec's per-node definition
+    g = synthetic_trust_graph(300, 3, 40, [0, 7, 90], spread=False, rng=1)
+    partition = g["cluster"].copy()
+    partition[g["community"] == 2] = 3           # one honest village splits off too
+    main_active = partition < 0
+    vec = partition_trust_scores(g["indptr"], g["indices"], main_active, partition)
+    ref = _reference_scores(g, main_active, partition)
+    ok = bool(np.array_equal(vec, ref))
+    print(f"\n  Vectorized scores match the per-node definition: {ok}")
+
+    # The spec's attack outcomes, now derived from the graph
+    counts = [0, 1, 10, 50, 90, 100]
+    spec = np.array(counts) / 100
+    spread = attacker_trust_scores(counts)
+    random = attacker_trust_scores(counts, spread=False)
+    ok_spec = bool(np.array_equal(spread, spec))
+    print(f"\n  Localhost cluster of 100, reconnecting to 1,000 honest nodes:")
+    print(f"  {'Vouches':>8s}  {'spec score':>10s}  {'spread':>8s}  {'random':>8s}  "
+          f"{'discount':>9s}")
+    print(f"  {'-'*8}  {'-'*10}  {'-'*8}  {'-'*8}  {'-'*9}")
+    for k, s, a, b in zip(counts, spec, spread, random):
+        print(f"  {k:>8d}  {s:>10.2f}  {a:>8.2f}  {b:>8.2f}  {audit_discount(a):>9.0%}")
+    print(f"  Spread vouches reproduce the spec scores exactly: {ok_spec}")
+    lone = lone_village_scores()
+    print(f"  Each village of {COMMUNITY_SIZE} splitting off alone: score median "
+          f"{np.median(lone):.2f}, min {lone.min():.2f}")
+
+    # Scale: 10^6 honest nodes, ten clusters with growing infiltration
+    infiltration = np.arange(10) * 10
+    t0 = time.perf_counter()
+    big = synthetic_trust_graph(1_000_000, len(infiltration), 100, infiltration, rng=2)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    scores = partition_trust_scores(big["indptr"], big["indices"], big["cluster"] < 0,
+                                    big["cluster"])
+    t_audit = time.perf_counter() - t0
+    villages = village_trust_scores(big, np.arange(100))
+    ok_big = bool(np.array_equal(scores, infiltration / 100))
+    print(f"\n  {big['n']:,} nodes, {len(big['indices']):,} trust links: "
+          f"build {t_build:.2f}s, audit {t_audit:.2f}s")
+    print(f"  Cluster scores = vouches / 100: {ok_big}")
+    print(f"  100 legitimate villages of {COMMUNITY_SIZE} split off: score median "
+          f"{np.median(villages):.2f}, min {villages.min():.2f} (spec assumes 1.0)")
+
+    if not (ok and ok_spec and ok_big):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()